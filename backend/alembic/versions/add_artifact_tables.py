@@ -0,0 +1,46 @@
+"""Add artifact and testcaseresult_artifact tables
+
+Revision ID: add_artifact_tables
+Revises: move_testcaseresult_logs_out_of_row
+Create Date: 2025-03-27
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_artifact_tables'
+down_revision = 'move_testcaseresult_logs_out_of_row'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    
+    if 'artifact' not in tables:
+        op.create_table(
+            'artifact',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('digest', sa.String(), nullable=False, unique=True),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('content_type', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+    if 'testcaseresult_artifact' not in tables:
+        op.create_table(
+            'testcaseresult_artifact',
+            sa.Column('test_case_result_id', sa.Integer(), sa.ForeignKey('testcaseresult.id'), primary_key=True),
+            sa.Column('filename', sa.String(), primary_key=True),
+            sa.Column('artifact_id', sa.Integer(), sa.ForeignKey('artifact.id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_testcaseresult_artifact_artifact_id', 'testcaseresult_artifact', ['artifact_id'])
+
+
+def downgrade():
+    op.drop_index('ix_testcaseresult_artifact_artifact_id', table_name='testcaseresult_artifact')
+    op.drop_table('testcaseresult_artifact')
+    op.drop_table('artifact')
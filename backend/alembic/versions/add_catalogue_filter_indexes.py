@@ -0,0 +1,36 @@
+"""Add indexes for filtered test case and result queries
+
+Revision ID: add_catalogue_filter_indexes
+Revises: add_result_search_index
+Create Date: 2025-03-30
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_catalogue_filter_indexes'
+down_revision = 'add_result_search_index'
+branch_labels = None
+depends_on = None
+
+# testcaseresult(test_run_id) is served by ix_testcaseresult_test_run_id_id
+INDEXES = [
+    ('testcaseresult', 'ix_testcaseresult_test_case_id_test_run_id', ['test_case_id', 'test_run_id']),
+    ('testcase', 'ix_testcase_case_id_version', ['case_id', 'version']),
+    ('testcase', 'ix_testcase_test_suite_id', ['test_suite_id']),
+]
+
+
+def upgrade():
+    # Check if the indexes already exist
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    for table, name, columns in INDEXES:
+        if name not in [index['name'] for index in inspector.get_indexes(table)]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for table, name, _ in INDEXES:
+        op.drop_index(name, table_name=table)
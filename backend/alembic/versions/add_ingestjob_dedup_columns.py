@@ -0,0 +1,42 @@
+"""Add content_digest and idempotency_key to ingestjob table
+
+Revision ID: add_ingestjob_dedup_columns
+Revises: add_ingestjob_table
+Create Date: 2025-03-20
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ingestjob_dedup_columns'
+down_revision = 'add_ingestjob_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Check if columns already exist
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [col['name'] for col in inspector.get_columns('ingestjob')]
+    indexes = [index['name'] for index in inspector.get_indexes('ingestjob')]
+    
+    with op.batch_alter_table('ingestjob') as batch_op:
+        if 'content_digest' not in columns:
+            batch_op.add_column(sa.Column('content_digest', sa.String(), nullable=True))
+        if 'idempotency_key' not in columns:
+            batch_op.add_column(sa.Column('idempotency_key', sa.String(), nullable=True))
+    
+    if 'ix_ingestjob_content_digest' not in indexes:
+        op.create_index('ix_ingestjob_content_digest', 'ingestjob', ['content_digest'])
+    if 'uq_ingestjob_idempotency_key' not in indexes:
+        op.create_index('uq_ingestjob_idempotency_key', 'ingestjob', ['idempotency_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_ingestjob_idempotency_key', table_name='ingestjob')
+    op.drop_index('ix_ingestjob_content_digest', table_name='ingestjob')
+    with op.batch_alter_table('ingestjob') as batch_op:
+        batch_op.drop_column('idempotency_key')
+        batch_op.drop_column('content_digest')
@@ -0,0 +1,41 @@
+"""Add ingestjob table
+
+Revision ID: add_ingestjob_table
+Revises: add_template_id_to_testruntemplate
+Create Date: 2025-03-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ingestjob_table'
+down_revision = 'add_template_id_to_testruntemplate'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The table may already exist if create_db_and_tables ran first
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'ingestjob' in inspector.get_table_names():
+        return
+    
+    op.create_table(
+        'ingestjob',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('rows_parsed', sa.Integer(), nullable=False),
+        sa.Column('rows_inserted', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('test_run_id', sa.Integer(), sa.ForeignKey('testrun.id'), nullable=True),
+        sa.Column('spool_path', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('ingestjob')
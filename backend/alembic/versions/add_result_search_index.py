@@ -0,0 +1,90 @@
+"""Add full-text search indexes over result logs and comments
+
+Revision ID: add_result_search_index
+Revises: add_testcase_search_index
+Create Date: 2025-03-29
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+# revision identifiers, used by Alembic.
+revision = 'add_result_search_index'
+down_revision = 'add_testcase_search_index'
+branch_labels = None
+depends_on = None
+
+# Same as the LOG_SEARCH_MAX_BYTES default at the time of this migration
+HALF = 512 * 1024
+
+
+def search_text(data):
+    if len(data) > 2 * HALF:
+        data = data[:HALF] + b"\n" + data[-HALF:]
+    return data.decode('utf-8', errors='replace')
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS testcaselog_fts USING fts5(logs, content='', "
+            "prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS testcaseresult_fts USING fts5(comment, content='testcaseresult', "
+            "content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS testcaseresult_fts_ai AFTER INSERT ON testcaseresult BEGIN "
+            "INSERT INTO testcaseresult_fts(rowid, comment) VALUES (new.id, new.comment); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS testcaseresult_fts_ad AFTER DELETE ON testcaseresult BEGIN "
+            "INSERT INTO testcaseresult_fts(testcaseresult_fts, rowid, comment) VALUES ('delete', old.id, old.comment); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS testcaseresult_fts_au AFTER UPDATE OF comment ON testcaseresult BEGIN "
+            "INSERT INTO testcaseresult_fts(testcaseresult_fts, rowid, comment) VALUES ('delete', old.id, old.comment); "
+            "INSERT INTO testcaseresult_fts(rowid, comment) VALUES (new.id, new.comment); END"
+        )
+        op.execute("INSERT INTO testcaseresult_fts(testcaseresult_fts) VALUES ('rebuild')")
+        index_log = sa.text("INSERT INTO testcaselog_fts(rowid, logs) VALUES (:id, :logs)")
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE testcaseresult ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+            "(setweight(to_tsvector('english', coalesce(comment, '')), 'A')) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_testcaseresult_search_vector ON testcaseresult USING GIN (search_vector)")
+        op.execute("ALTER TABLE testcaselog ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_testcaselog_search_vector ON testcaselog USING GIN (search_vector)")
+        index_log = sa.text("UPDATE testcaselog SET search_vector = to_tsvector('english', :logs) WHERE id = :id")
+    else:
+        return
+    
+    # Index the stored logs, decompressing one log at a time
+    decompressor = zstandard.ZstdDecompressor()
+    log_ids = [row[0] for row in conn.execute(sa.text("SELECT id FROM testcaselog ORDER BY id"))]
+    for log_id in log_ids:
+        chunks = conn.execute(
+            sa.text("SELECT data FROM testcaselogchunk WHERE log_id = :log_id ORDER BY seq"),
+            {"log_id": log_id},
+        )
+        data = b"".join(decompressor.decompress(chunk[0]) for chunk in chunks)
+        conn.execute(index_log, {"id": log_id, "logs": search_text(data)})
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('testcaseresult_fts_ai', 'testcaseresult_fts_ad', 'testcaseresult_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS testcaseresult_fts")
+        op.execute("DROP TABLE IF EXISTS testcaselog_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_testcaselog_search_vector")
+        op.execute("ALTER TABLE testcaselog DROP COLUMN IF EXISTS search_vector")
+        op.execute("DROP INDEX IF EXISTS ix_testcaseresult_search_vector")
+        op.execute("ALTER TABLE testcaseresult DROP COLUMN IF EXISTS search_vector")
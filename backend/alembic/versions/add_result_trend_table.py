@@ -0,0 +1,37 @@
+"""Add result_trend table
+
+Revision ID: add_result_trend_table
+Revises: add_testcase_history_table
+Create Date: 2025-04-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_result_trend_table'
+down_revision = 'add_testcase_history_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    
+    # Filled in for existing runs by python -m app.tools.rebuild_trends
+    if 'result_trend' not in inspector.get_table_names():
+        op.create_table(
+            'result_trend',
+            sa.Column('period', sa.String(), nullable=False),
+            sa.Column('bucket', sa.Date(), nullable=False),
+            sa.Column('test_suite_id', sa.String(), nullable=False),
+            sa.Column('area', sa.String(), nullable=False),
+            sa.Column('result', sa.String(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('period', 'bucket', 'test_suite_id', 'area', 'result'),
+        )
+
+
+def downgrade():
+    op.drop_table('result_trend')
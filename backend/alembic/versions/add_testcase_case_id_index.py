@@ -0,0 +1,29 @@
+"""Add index on testcase case_id
+
+Revision ID: add_testcase_case_id_index
+Revises: add_ingestjob_dedup_columns
+Create Date: 2025-03-21
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testcase_case_id_index'
+down_revision = 'add_ingestjob_dedup_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Check if the index already exists
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    indexes = [index['name'] for index in inspector.get_indexes('testcase')]
+    
+    if 'ix_testcase_case_id_id' not in indexes:
+        op.create_index('ix_testcase_case_id_id', 'testcase', ['case_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_testcase_case_id_id', table_name='testcase')
@@ -0,0 +1,37 @@
+"""Add testcase_flakiness_pending table
+
+Revision ID: add_testcase_flakiness_pending_table
+Revises: add_result_trend_table
+Create Date: 2025-04-20
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testcase_flakiness_pending_table'
+down_revision = 'add_result_trend_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    
+    # Refreshes read the changed test cases from here instead of continuing after last_result_id
+    if 'testcase_flakiness_pending' not in inspector.get_table_names():
+        op.create_table(
+            'testcase_flakiness_pending',
+            sa.Column('test_case_id', sa.Integer(), primary_key=True),
+            sa.Column('test_run_id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+        )
+    indexes = {index['name'] for index in inspector.get_indexes('testcase_flakiness')}
+    if 'ix_testcase_flakiness_last_result_id' in indexes:
+        op.drop_index('ix_testcase_flakiness_last_result_id', table_name='testcase_flakiness')
+
+
+def downgrade():
+    op.create_index('ix_testcase_flakiness_last_result_id', 'testcase_flakiness', ['last_result_id'])
+    op.drop_table('testcase_flakiness_pending')
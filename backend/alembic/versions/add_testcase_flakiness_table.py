@@ -0,0 +1,44 @@
+"""Add testcase_flakiness table
+
+Revision ID: add_testcase_flakiness_table
+Revises: add_testrun_stats_table
+Create Date: 2025-04-02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testcase_flakiness_table'
+down_revision = 'add_testrun_stats_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    
+    # Filled in by the first refresh, which folds in every existing result
+    if 'testcase_flakiness' not in inspector.get_table_names():
+        op.create_table(
+            'testcase_flakiness',
+            sa.Column('test_case_id', sa.Integer(), sa.ForeignKey('testcase.id'), primary_key=True),
+            sa.Column('outcomes', sa.String(), nullable=False),
+            sa.Column('runs', sa.Integer(), nullable=False),
+            sa.Column('failures', sa.Integer(), nullable=False),
+            sa.Column('flips', sa.Integer(), nullable=False),
+            sa.Column('failure_rate', sa.Float(), nullable=False),
+            sa.Column('flip_rate', sa.Float(), nullable=False),
+            sa.Column('last_test_run_id', sa.Integer(), nullable=True),
+            sa.Column('last_result_id', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_testcase_flakiness_flip_rate', 'testcase_flakiness', ['flip_rate'])
+        op.create_index('ix_testcase_flakiness_last_result_id', 'testcase_flakiness', ['last_result_id'])
+
+
+def downgrade():
+    op.drop_index('ix_testcase_flakiness_last_result_id', table_name='testcase_flakiness')
+    op.drop_index('ix_testcase_flakiness_flip_rate', table_name='testcase_flakiness')
+    op.drop_table('testcase_flakiness')
@@ -0,0 +1,115 @@
+"""Add testcase_history table and covering history index
+
+Revision ID: add_testcase_history_table
+Revises: add_testcase_flakiness_table
+Create Date: 2025-04-07
+
+"""
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testcase_history_table'
+down_revision = 'add_testcase_flakiness_table'
+branch_labels = None
+depends_on = None
+
+# Same as the HISTORY_OUTCOMES default at the time of this migration
+OUTCOMES = 50
+# Test cases backfilled per query
+BATCH_SIZE = 500
+
+
+def _code(result):
+    """Outcome letter of a result value: P passed, F failed, O other."""
+    value = (result or '').strip().lower()
+    if value in ('pass', 'passed'):
+        return 'P'
+    if value in ('fail', 'failed'):
+        return 'F'
+    return 'O'
+
+
+def _backfill_history(conn):
+    """
+    Outcomes of the latest runs of every test case with results, batch by
+    batch of test cases: each run counts with the outcome of its last result.
+    """
+    history_table = sa.table(
+        'testcase_history',
+        sa.column('test_case_id'), sa.column('outcomes'), sa.column('last_test_run_id'), sa.column('last_result_at'),
+    )
+    last_case_id = None
+    while True:
+        case_ids = [row[0] for row in conn.execute(
+            sa.text(
+                "SELECT DISTINCT test_case_id FROM testcaseresult "
+                "WHERE :last_case_id IS NULL OR test_case_id > :last_case_id "
+                "ORDER BY test_case_id LIMIT :limit"
+            ),
+            {"last_case_id": last_case_id, "limit": BATCH_SIZE},
+        )]
+        if not case_ids:
+            break
+        rows = conn.execute(
+            sa.text(
+                "SELECT test_case_id, test_run_id, result, created_at FROM testcaseresult "
+                "WHERE test_case_id >= :first AND test_case_id <= :last "
+                "ORDER BY test_case_id, test_run_id, id"
+            ),
+            {"first": case_ids[0], "last": case_ids[-1]},
+        ).fetchall()
+        last_case_id = case_ids[-1]
+        
+        records = []
+        for test_case_id, results in groupby(rows, key=lambda row: row[0]):
+            runs = {}
+            for _, test_run_id, result, created_at in results:
+                last_at = runs.get(test_run_id, (None, None))[1]
+                if last_at is None or (created_at is not None and created_at > last_at):
+                    last_at = created_at
+                runs[test_run_id] = (_code(result), last_at)
+            latest = list(runs.items())[-OUTCOMES:]
+            result_times = [last_at for _, (_, last_at) in latest if last_at is not None]
+            records.append({
+                "test_case_id": test_case_id,
+                "outcomes": "".join(code for _, (code, _) in latest),
+                "last_test_run_id": latest[-1][0],
+                "last_result_at": max(result_times) if result_times else None,
+            })
+        conn.execute(history_table.insert(), records)
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    
+    # The history index starts with the columns of the one it replaces, and
+    # also covers the result and its time for the test case timeline
+    indexes = {index['name'] for index in inspector.get_indexes('testcaseresult')}
+    if 'ix_testcaseresult_history' not in indexes:
+        op.create_index(
+            'ix_testcaseresult_history', 'testcaseresult',
+            ['test_case_id', 'test_run_id', 'id', 'result', 'created_at'],
+        )
+    if 'ix_testcaseresult_test_case_id_test_run_id' in indexes:
+        op.drop_index('ix_testcaseresult_test_case_id_test_run_id', table_name='testcaseresult')
+    
+    if 'testcase_history' not in inspector.get_table_names():
+        op.create_table(
+            'testcase_history',
+            sa.Column('test_case_id', sa.Integer(), sa.ForeignKey('testcase.id'), primary_key=True),
+            sa.Column('outcomes', sa.String(), nullable=False),
+            sa.Column('last_test_run_id', sa.Integer(), nullable=True),
+            sa.Column('last_result_at', sa.DateTime(), nullable=True),
+        )
+        # Sparklines of existing results are there right after migrating
+        _backfill_history(conn)
+
+
+def downgrade():
+    op.drop_table('testcase_history')
+    op.create_index('ix_testcaseresult_test_case_id_test_run_id', 'testcaseresult', ['test_case_id', 'test_run_id'])
+    op.drop_index('ix_testcaseresult_history', table_name='testcaseresult')
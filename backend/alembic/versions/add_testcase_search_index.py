@@ -0,0 +1,63 @@
+"""Add full-text search index over testcase
+
+Revision ID: add_testcase_search_index
+Revises: add_artifact_tables
+Create Date: 2025-03-28
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testcase_search_index'
+down_revision = 'add_artifact_tables'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "title, area, description, steps, precondition"
+NEW = "new.title, new.area, new.description, new.steps, new.precondition"
+OLD = "old.title, old.area, old.description, old.steps, old.precondition"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS testcase_fts USING fts5({COLUMNS}, content='testcase', "
+            "content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS testcase_fts_ai AFTER INSERT ON testcase BEGIN "
+            f"INSERT INTO testcase_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS testcase_fts_ad AFTER DELETE ON testcase BEGIN "
+            f"INSERT INTO testcase_fts(testcase_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS testcase_fts_au AFTER UPDATE OF {COLUMNS} ON testcase BEGIN "
+            f"INSERT INTO testcase_fts(testcase_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); "
+            f"INSERT INTO testcase_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END"
+        )
+        # Index the existing test cases
+        op.execute("INSERT INTO testcase_fts(testcase_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        vector = " || ".join(
+            f"setweight(to_tsvector('english', coalesce({name}, '')), '{weight}')"
+            for name, weight in [('title', 'A'), ('area', 'A'), ('description', 'B'), ('steps', 'C'), ('precondition', 'C')]
+        )
+        op.execute(
+            f"ALTER TABLE testcase ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_testcase_search_vector ON testcase USING GIN (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('testcase_fts_ai', 'testcase_fts_ad', 'testcase_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS testcase_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_testcase_search_vector")
+        op.execute("ALTER TABLE testcase DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,29 @@
+"""Add index on testcaseresult test_run_id
+
+Revision ID: add_testcaseresult_test_run_index
+Revises: add_testcase_case_id_index
+Create Date: 2025-03-24
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testcaseresult_test_run_index'
+down_revision = 'add_testcase_case_id_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Check if the index already exists
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    indexes = [index['name'] for index in inspector.get_indexes('testcaseresult')]
+    
+    if 'ix_testcaseresult_test_run_id_id' not in indexes:
+        op.create_index('ix_testcaseresult_test_run_id_id', 'testcaseresult', ['test_run_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_testcaseresult_test_run_id_id', table_name='testcaseresult')
@@ -0,0 +1,56 @@
+"""Add testcaseresult created_at and testrun_stats table
+
+Revision ID: add_testrun_stats_table
+Revises: add_catalogue_filter_indexes
+Create Date: 2025-03-31
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_testrun_stats_table'
+down_revision = 'add_catalogue_filter_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    
+    columns = [col['name'] for col in inspector.get_columns('testcaseresult')]
+    if 'created_at' not in columns:
+        with op.batch_alter_table('testcaseresult') as batch_op:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        # Existing results are dated by their run
+        op.execute(
+            "UPDATE testcaseresult SET created_at = "
+            "(SELECT testrun.created_at FROM testrun WHERE testrun.id = testcaseresult.test_run_id)"
+        )
+    
+    if 'testrun_stats' not in inspector.get_table_names():
+        op.create_table(
+            'testrun_stats',
+            sa.Column('test_run_id', sa.Integer(), sa.ForeignKey('testrun.id'), primary_key=True),
+            sa.Column('test_suite_id', sa.String(), primary_key=True),
+            sa.Column('area', sa.String(), primary_key=True),
+            sa.Column('result', sa.String(), primary_key=True),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('first_result_at', sa.DateTime(), nullable=True),
+            sa.Column('last_result_at', sa.DateTime(), nullable=True),
+        )
+        op.execute(
+            "INSERT INTO testrun_stats "
+            "(test_run_id, test_suite_id, area, result, count, first_result_at, last_result_at) "
+            "SELECT r.test_run_id, coalesce(c.test_suite_id, ''), coalesce(c.area, ''), r.result, "
+            "count(*), min(r.created_at), max(r.created_at) "
+            "FROM testcaseresult r LEFT OUTER JOIN testcase c ON c.id = r.test_case_id "
+            "GROUP BY r.test_run_id, c.test_suite_id, c.area, r.result"
+        )
+
+
+def downgrade():
+    op.drop_table('testrun_stats')
+    with op.batch_alter_table('testcaseresult') as batch_op:
+        batch_op.drop_column('created_at')
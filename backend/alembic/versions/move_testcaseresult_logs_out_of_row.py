@@ -0,0 +1,128 @@
+"""Move testcaseresult logs to compressed out-of-row storage
+
+Revision ID: move_testcaseresult_logs_out_of_row
+Revises: add_testcaseresult_test_run_index
+Create Date: 2025-03-26
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+# revision identifiers, used by Alembic.
+revision = 'move_testcaseresult_logs_out_of_row'
+down_revision = 'add_testcaseresult_test_run_index'
+branch_labels = None
+depends_on = None
+
+# Same as the LOG_CHUNK_SIZE default at the time of this migration
+CHUNK_SIZE = 256 * 1024
+BATCH_SIZE = 500
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    
+    if 'testcaselog' not in tables:
+        op.create_table(
+            'testcaselog',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('digest', sa.String(), nullable=False, unique=True),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('chunk_size', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+    if 'testcaselogchunk' not in tables:
+        op.create_table(
+            'testcaselogchunk',
+            sa.Column('log_id', sa.Integer(), sa.ForeignKey('testcaselog.id'), primary_key=True),
+            sa.Column('seq', sa.Integer(), primary_key=True),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+        )
+    
+    columns = [col['name'] for col in inspector.get_columns('testcaseresult')]
+    with op.batch_alter_table('testcaseresult') as batch_op:
+        if 'log_id' not in columns:
+            batch_op.add_column(sa.Column('log_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_testcaseresult_log_id', 'testcaselog', ['log_id'], ['id'])
+            batch_op.create_index('ix_testcaseresult_log_id', ['log_id'])
+        if 'logs_size' not in columns:
+            batch_op.add_column(sa.Column('logs_size', sa.Integer(), nullable=False, server_default='0'))
+        if 'logs_digest' not in columns:
+            batch_op.add_column(sa.Column('logs_digest', sa.String(), nullable=True))
+    
+    if 'logs' not in columns:
+        return
+    
+    # Compress existing logs batch by batch, identical logs are stored once
+    log_table = sa.table('testcaselog', sa.column('id'), sa.column('digest'), sa.column('size'), sa.column('chunk_size'))
+    chunk_table = sa.table('testcaselogchunk', sa.column('log_id'), sa.column('seq'), sa.column('data'))
+    compressor = zstandard.ZstdCompressor(level=3)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, logs FROM testcaseresult "
+                "WHERE id > :last_id AND logs IS NOT NULL AND logs != '' "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        
+        updates = []
+        for result_id, logs in rows:
+            data = logs.encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()
+            find_log = sa.select(log_table.c.id).where(log_table.c.digest == digest)
+            log_id = conn.execute(find_log).scalar()
+            if log_id is None:
+                conn.execute(log_table.insert().values(digest=digest, size=len(data), chunk_size=CHUNK_SIZE))
+                log_id = conn.execute(find_log).scalar()
+                conn.execute(chunk_table.insert(), [
+                    {"log_id": log_id, "seq": seq, "data": compressor.compress(data[start:start + CHUNK_SIZE])}
+                    for seq, start in enumerate(range(0, len(data), CHUNK_SIZE))
+                ])
+            updates.append({"result_id": result_id, "log_id": log_id, "size": len(data), "digest": digest})
+        conn.execute(
+            sa.text("UPDATE testcaseresult SET log_id = :log_id, logs_size = :size, logs_digest = :digest WHERE id = :result_id"),
+            updates,
+        )
+    
+    with op.batch_alter_table('testcaseresult') as batch_op:
+        batch_op.drop_column('logs')
+
+
+def downgrade():
+    conn = op.get_bind()
+    with op.batch_alter_table('testcaseresult') as batch_op:
+        batch_op.add_column(sa.Column('logs', sa.String(), nullable=True))
+    
+    # Decompress the logs back into the rows, one stored log at a time
+    decompressor = zstandard.ZstdDecompressor()
+    log_ids = [row[0] for row in conn.execute(sa.text("SELECT id FROM testcaselog"))]
+    for log_id in log_ids:
+        chunks = conn.execute(
+            sa.text("SELECT data FROM testcaselogchunk WHERE log_id = :log_id ORDER BY seq"),
+            {"log_id": log_id},
+        )
+        data = b"".join(decompressor.decompress(chunk[0]) for chunk in chunks)
+        conn.execute(
+            sa.text("UPDATE testcaseresult SET logs = :logs WHERE log_id = :log_id"),
+            {"log_id": log_id, "logs": data.decode('utf-8', errors='replace')},
+        )
+    
+    with op.batch_alter_table('testcaseresult') as batch_op:
+        batch_op.drop_index('ix_testcaseresult_log_id')
+        batch_op.drop_constraint('fk_testcaseresult_log_id', type_='foreignkey')
+        batch_op.drop_column('logs_digest')
+        batch_op.drop_column('logs_size')
+        batch_op.drop_column('log_id')
+    op.drop_table('testcaselogchunk')
+    op.drop_table('testcaselog')
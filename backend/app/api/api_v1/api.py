@@ -6,6 +6,9 @@ from app.api.api_v1.endpoints import (
     test_runs,
     test_case_results,
     test_run_templates,
+    ingest_jobs,
+    reports,
+    exports,
 )
 
 api_router = APIRouter()
@@ -14,3 +17,6 @@ api_router.include_router(test_cases.router, prefix="/test-cases", tags=["test-c
 api_router.include_router(test_runs.router, prefix="/test-runs", tags=["test-runs"])
 api_router.include_router(test_case_results.router, prefix="/test-case-results", tags=["test-case-results"])
 api_router.include_router(test_run_templates.router, prefix="/test-run-templates", tags=["test-run-templates"])
+api_router.include_router(ingest_jobs.router, prefix="/ingest-jobs", tags=["ingest-jobs"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from app.db.init_db import get_session
+from app.reports.export import EXPORT_FORMATS, EXPORT_TABLES, export_filename, stream_export
+
+router = APIRouter()
+
+
+@router.get("/{table}")
+def export_table(
+    table: str,
+    format: str = Query("parquet", description="parquet or arrow (Arrow IPC file)"),
+    since: Optional[datetime] = Query(None, description="Only runs created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only runs created before this time"),
+    test_suite_id: Optional[str] = Query(None),
+    logs: bool = Query(False, description="Include the full logs of test case results"),
+    session: Session = Depends(get_session)
+):
+    """
+    Export test_runs, test_cases or test_case_results as a Parquet or
+    Arrow IPC file for analytics tools. The file is streamed while the rows
+    are read from a single database cursor, one row group or record batch
+    at a time, so memory stays bounded however many rows are exported.
+    Runs and results are filtered by the creation time of the run, cases
+    and results by suite.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table, expected one of {', '.join(EXPORT_TABLES)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    media_type, filename = export_filename(table, format)
+    parts = stream_export(
+        session.get_bind(), table, format, logs, since=since, until=until, test_suite_id=test_suite_id,
+    )
+    return StreamingResponse(
+        parts, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from app.db.init_db import get_session
+from app.ingest.jobs import ingest_queue
+from app.models.ingest_job import IngestJob, IngestJobRead
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=IngestJobRead)
+def read_ingest_job(
+    job_id: int,
+    session: Session = Depends(get_session)
+):
+    """Get the status and progress of an upload."""
+    job = session.get(IngestJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    
+    job_read = IngestJobRead.from_orm(job)
+    # Counters of a job still running in this process are only kept in memory
+    progress = ingest_queue.progress(job_id)
+    if progress:
+        for key, value in progress.items():
+            setattr(job_read, key, value)
+    return job_read
@@ -0,0 +1,42 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.db.init_db import get_session
+from app.models.result_trend import ResultTrendPoint
+from app.reports.trends import PERIODS, TREND_GROUPS, read_trends
+
+router = APIRouter()
+
+
+def _parse_group_by(value: Optional[str]) -> List[str]:
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in TREND_GROUPS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown group_by field(s): {', '.join(unknown)}; expected {', '.join(TREND_GROUPS)}",
+        )
+    return names
+
+
+@router.get("/trends", response_model=List[ResultTrendPoint])
+def read_result_trends(
+    period: str = Query("day", description="Bucket size, day or week"),
+    since: Optional[date] = Query(None, description="First day of the range"),
+    until: Optional[date] = Query(None, description="Day after the range"),
+    test_suite_id: Optional[str] = Query(None),
+    area: Optional[str] = Query(None),
+    group_by: Optional[str] = Query(None, description="Comma separated breakdown, test_suite_id and/or area"),
+    session: Session = Depends(get_session)
+):
+    """
+    Pass rate per day or week, counted by the creation time of the runs,
+    overall or by suite and area. Read from the result_trend rollup,
+    which is updated along with the run statistics, so only the rows of
+    the requested range are touched.
+    """
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(PERIODS)}")
+    return read_trends(session, period, since, until, test_suite_id, area, _parse_group_by(group_by))
@@ -1,22 +1,68 @@
+import re
+from collections import deque
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, File, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import false, or_
+from sqlalchemy.orm import undefer, undefer_group
 from sqlmodel import Session, select
 
+from app.api.downloads import file_download
+from app.api.highlight import term_pattern, snippet
+from app.api.fields import parse_fields, columns, projection_response
+from app.api.pagination import keyset, set_next_cursor
+from app.api.sorting import parse_sort, sort_or_keyset
+from app.api.ranges import parse_range
+from app.core.config import settings
 from app.db.init_db import get_session
-from app.models.test_case_result import TestCaseResult, TestCaseResultCreate, TestCaseResultRead, TestCaseResultUpdate
+from app.db.search import LOG_INDEX, RESULT_COMMENT_INDEX, matching_ids, search_terms
+from app.models.artifact import Artifact, TestCaseResultArtifact, TestCaseResultArtifactRead
+from app.models.test_case import TestCase
+from app.models.test_case_result import (
+    TestCaseResult, TestCaseResultCreate, TestCaseResultRead, TestCaseResultUpdate, TestCaseResultMatch,
+)
+from app.models.test_run import TestRun
+from app.reports.flakiness import mark_flakiness
+from app.reports.history import record_history, recompute_history
+from app.reports.stats import count_results, counted
+from app.storage.artifacts import artifact_path, store_artifact, unlink_artifacts, delete_orphaned_artifacts, remove_artifact_files
+from app.storage.logs import set_logs, read_logs, read_logs_by_id, delete_orphaned_logs, iter_log_range, iter_log_lines, tail_offset, find_log_line
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[TestCaseResultRead])
 def read_test_case_results(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
+    cursor: Optional[str] = None,
     test_run_id: Optional[int] = Query(None),
     test_case_id: Optional[int] = Query(None),
+    result: Optional[str] = Query(None, description="Comma separated result values, e.g. Fail,Blocked"),
+    test_suite_id: Optional[str] = Query(None),
+    area: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Only runs created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only runs created before this time"),
+    sort: Optional[str] = Query(None, description="Comma separated fields to sort by, - for descending, e.g. test_case_id,-test_run_id"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,test_case_id,result"),
+    logs: bool = Query(False, description="Include the full logs of the results"),
     session: Session = Depends(get_session)
 ):
-    query = select(TestCaseResult)
+    """
+    List test case results. Results carry the size of their logs; the logs
+    themselves are only read and decompressed with ``logs=true``.
+    """
+    names = parse_fields(fields, TestCaseResult)
+    if names and logs:
+        raise HTTPException(status_code=400, detail="logs cannot be combined with fields")
+    sort_clauses = parse_sort(sort, TestCaseResult)
+    if names:
+        # Only the requested columns are read
+        query = select(*columns(TestCaseResult, names))
+    else:
+        query = select(TestCaseResult).options(undefer_group("text"))
     
     if test_run_id is not None:
         query = query.where(TestCaseResult.test_run_id == test_run_id)
@@ -24,22 +70,132 @@ def read_test_case_results(
     if test_case_id is not None:
         query = query.where(TestCaseResult.test_case_id == test_case_id)
     
+    query = _filter_results(query, result, test_suite_id, area, since, until)
+    query = sort_or_keyset(query, sort_clauses, TestCaseResult.id, cursor)
     results = session.exec(query.offset(skip).limit(limit)).all()
+    if names:
+        projected = projection_response(results)
+        if sort_clauses is None:
+            set_next_cursor(projected, results, limit, "id")
+        return projected
+    if sort_clauses is None:
+        set_next_cursor(response, results, limit, "id")
+    if logs:
+        texts = read_logs_by_id(session, [result.log_id for result in results])
+        results_read = []
+        for result in results:
+            result_read = TestCaseResultRead.from_orm(result)
+            result_read.logs = texts.get(result.log_id, "")
+            results_read.append(result_read)
+        return results_read
     return results
 
 
+def _filter_results(
+    query,
+    result: Optional[str] = None,
+    test_suite_id: Optional[str] = None,
+    area: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Filters on the result value, the test case and the run date shared by result queries."""
+    if result:
+        values = [value.strip() for value in result.split(",") if value.strip()]
+        query = query.where(TestCaseResult.result.in_(values))
+    if test_suite_id is not None or area is not None:
+        query = query.join(TestCase, TestCase.id == TestCaseResult.test_case_id)
+        if test_suite_id is not None:
+            query = query.where(TestCase.test_suite_id == test_suite_id)
+        if area is not None:
+            query = query.where(TestCase.area == area)
+    if since is not None or until is not None:
+        query = query.join(TestRun, TestRun.id == TestCaseResult.test_run_id)
+        if since is not None:
+            query = query.where(TestRun.created_at >= since)
+        if until is not None:
+            query = query.where(TestRun.created_at < until)
+    return query
+
+
 @router.post("/", response_model=TestCaseResultRead, status_code=status.HTTP_201_CREATED)
 def create_test_case_result(
     result: TestCaseResultCreate, 
     session: Session = Depends(get_session)
 ):
     db_result = TestCaseResult.from_orm(result)
+    set_logs(session, db_result, result.logs)
     session.add(db_result)
+    count_results(session, [counted(db_result)])
+    record_history(session, [counted(db_result)])
+    mark_flakiness(session, [counted(db_result)])
     session.commit()
     session.refresh(db_result)
     return db_result
 
 
+@router.get("/search", response_model=List[TestCaseResultMatch])
+def search_test_case_results(
+    response: Response,
+    q: str = Query(..., description="Words to find in the logs or comment, e.g. submit-button not found"),
+    test_run_id: Optional[int] = Query(None),
+    test_case_id: Optional[int] = Query(None),
+    test_suite_id: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Only runs created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only runs created before this time"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, le=100),
+    session: Session = Depends(get_session)
+):
+    """
+    Find test case results whose logs or comment contain every word (also
+    as a prefix), with the matching part highlighted.
+
+    Matches are looked up in full-text indexes, the logs index holding each
+    distinct log once, so no query scans the results or decompresses logs.
+    Only the logs of the returned page are read, up to their first matching
+    line, to build the snippets. Results come in id order; follow
+    X-Next-Cursor for more.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    dialect = session.get_bind().dialect.name
+    log_ids = matching_ids(dialect, "testcaselog", LOG_INDEX, terms)
+    comment_ids = matching_ids(dialect, "testcaseresult", RESULT_COMMENT_INDEX, terms)
+    conditions = []
+    if log_ids is not None:
+        conditions.append(TestCaseResult.log_id.in_(log_ids))
+    if comment_ids is not None:
+        conditions.append(TestCaseResult.id.in_(comment_ids))
+    else:
+        conditions.extend(TestCaseResult.comment.ilike(f"%{term}%") for term in terms)
+    
+    query = select(TestCaseResult).options(undefer(TestCaseResult.comment)).where(or_(false(), *conditions))
+    if test_run_id is not None:
+        query = query.where(TestCaseResult.test_run_id == test_run_id)
+    if test_case_id is not None:
+        query = query.where(TestCaseResult.test_case_id == test_case_id)
+    query = _filter_results(query, test_suite_id=test_suite_id, since=since, until=until)
+    
+    results = session.exec(keyset(query, TestCaseResult.id, cursor).limit(limit)).all()
+    set_next_cursor(response, results, limit, "id")
+    
+    pattern = term_pattern(terms)
+    matches = []
+    for result in results:
+        logs_line = find_log_line(session, result.log_id, pattern) if result.log_id is not None else None
+        matches.append(TestCaseResultMatch(
+            id=result.id,
+            test_run_id=result.test_run_id,
+            test_case_id=result.test_case_id,
+            result=result.result,
+            comment_snippet=snippet(result.comment, pattern) if result.comment else None,
+            logs_snippet=snippet(logs_line, pattern) if logs_line else None,
+        ))
+    return matches
+
+
 @router.get("/{result_id}", response_model=TestCaseResultRead)
 def read_test_case_result(
     result_id: int, 
@@ -48,7 +204,95 @@ def read_test_case_result(
     result = session.get(TestCaseResult, result_id)
     if not result:
         raise HTTPException(status_code=404, detail="Test case result not found")
-    return result
+    
+    # Logs are stored compressed out of row and only decompressed here
+    result_read = TestCaseResultRead.from_orm(result)
+    result_read.logs = read_logs(session, result)
+    return result_read
+
+
+def _log_range(bind, log_id: int, start: int, end: Optional[int] = None):
+    # The request session may be closed before the response has been streamed
+    with Session(bind) as session:
+        yield from iter_log_range(session, log_id, start, end)
+
+
+def _log_tail(bind, log_id: int, lines: int):
+    with Session(bind) as session:
+        yield from iter_log_range(session, log_id, tail_offset(session, log_id, lines))
+
+
+def _log_grep(bind, log_id: int, pattern: "re.Pattern", tail: Optional[int]):
+    with Session(bind) as session:
+        matches = (line + b"\n" for line in iter_log_lines(session, log_id) if pattern.search(line))
+        if tail is not None:
+            # Only the last matches are kept while the log is scanned
+            matches = deque(matches, maxlen=tail)
+        chunk = []
+        for line in matches:
+            chunk.append(line)
+            if len(chunk) >= settings.RESPONSE_PAGE_SIZE:
+                yield b"".join(chunk)
+                chunk = []
+        if chunk:
+            yield b"".join(chunk)
+
+
+@router.get("/{result_id}/logs")
+def read_test_case_result_logs(
+    result_id: int,
+    request: Request,
+    tail: Optional[int] = Query(None, ge=0, description="Return only the last N lines"),
+    grep: Optional[str] = Query(None, description="Return only lines matching this regular expression"),
+    session: Session = Depends(get_session)
+):
+    """
+    Get the logs of a test case result as plain text.
+
+    Only the compressed chunks that are needed are read: ``tail=N`` reads
+    the log backwards from the end until it has N lines, and a ``Range:
+    bytes=...`` header reads just the requested slice (206 Partial
+    Content). ``grep=`` filters lines with a regular expression while the
+    log is streamed; combined with ``tail`` it returns the last N matches.
+    """
+    result = session.get(TestCaseResult, result_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Test case result not found")
+    
+    headers = {"Accept-Ranges": "bytes"}
+    if result.logs_digest:
+        headers["ETag"] = f'"{result.logs_digest}"'
+    media_type = "text/plain; charset=utf-8"
+    bind = session.get_bind()
+    
+    if result.log_id is None:
+        return Response(content=b"", media_type=media_type, headers=headers)
+    
+    if grep is not None:
+        try:
+            pattern = re.compile(grep.encode("utf-8"))
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid grep pattern: {e}")
+        return StreamingResponse(_log_grep(bind, result.log_id, pattern, tail), media_type=media_type, headers=headers)
+    
+    if tail is not None:
+        return StreamingResponse(_log_tail(bind, result.log_id, tail), media_type=media_type, headers=headers)
+    
+    size = result.logs_size
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_log_range(bind, result.log_id, 0), media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        _log_range(bind, result.log_id, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
 
 
 @router.patch("/{result_id}", response_model=TestCaseResultRead)
@@ -62,10 +306,25 @@ def update_test_case_result(
         raise HTTPException(status_code=404, detail="Test case result not found")
     
     result_data = result.dict(exclude_unset=True)
+    detached_log_id = None
+    if "logs" in result_data:
+        detached_log_id = db_result.log_id
+        set_logs(session, db_result, result_data.pop("logs"))
+    before = counted(db_result)
     for key, value in result_data.items():
         setattr(db_result, key, value)
+    changed = counted(db_result) != before
+    if changed:
+        count_results(session, [before], -1)
+        count_results(session, [counted(db_result)])
     
     session.add(db_result)
+    if changed:
+        session.flush()
+        recompute_history(session, [db_result.test_case_id])
+        mark_flakiness(session, [before, counted(db_result)])
+    if detached_log_id is not None:
+        delete_orphaned_logs(session, [detached_log_id])
     session.commit()
     session.refresh(db_result)
     return db_result
@@ -80,6 +339,114 @@ def delete_test_case_result(
     if not result:
         raise HTTPException(status_code=404, detail="Test case result not found")
     
+    unlinked = unlink_artifacts(session, [result_id])
+    count_results(session, [counted(result)], -1)
     session.delete(result)
+    session.flush()
+    recompute_history(session, [result.test_case_id])
+    mark_flakiness(session, [counted(result)])
+    delete_orphaned_logs(session, [result.log_id])
+    orphans = delete_orphaned_artifacts(session, unlinked)
+    session.commit()
+    remove_artifact_files(orphans)
+    return None
+
+
+def _artifact_read(link: TestCaseResultArtifact, artifact: Artifact) -> TestCaseResultArtifactRead:
+    return TestCaseResultArtifactRead(
+        test_case_result_id=link.test_case_result_id,
+        filename=link.filename,
+        digest=artifact.digest,
+        size=artifact.size,
+        content_type=artifact.content_type,
+    )
+
+
+def _get_result_artifact(session: Session, result_id: int, filename: str):
+    row = session.exec(
+        select(TestCaseResultArtifact, Artifact)
+        .join(Artifact, Artifact.id == TestCaseResultArtifact.artifact_id)
+        .where(TestCaseResultArtifact.test_case_result_id == result_id, TestCaseResultArtifact.filename == filename)
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return row
+
+
+@router.post("/{result_id}/artifacts", response_model=TestCaseResultArtifactRead, status_code=status.HTTP_201_CREATED)
+def upload_test_case_result_artifact(
+    result_id: int,
+    file: UploadFile = File(...),
+    filename: Optional[str] = Query(None, description="Name to store the file under, defaults to the uploaded name"),
+    session: Session = Depends(get_session)
+):
+    """
+    Attach a file (screenshot, video, HAR, ...) to a test case result.
+
+    Files are stored once per content in the artifact store, so the same
+    file attached to many results takes the space of one. Uploading under
+    an existing name replaces that file.
+    """
+    if not session.get(TestCaseResult, result_id):
+        raise HTTPException(status_code=404, detail="Test case result not found")
+    name = filename or file.filename
+    if not name:
+        raise HTTPException(status_code=400, detail="Missing filename")
+    
+    artifact = store_artifact(session, file.file, file.content_type)
+    link = session.get(TestCaseResultArtifact, (result_id, name))
+    replaced = None
+    if link is None:
+        link = TestCaseResultArtifact(test_case_result_id=result_id, filename=name, artifact_id=artifact.id)
+    else:
+        replaced, link.artifact_id = link.artifact_id, artifact.id
+    session.add(link)
+    session.flush()
+    orphans = delete_orphaned_artifacts(session, [replaced])
+    session.commit()
+    remove_artifact_files(orphans)
+    return _artifact_read(link, artifact)
+
+
+@router.get("/{result_id}/artifacts", response_model=List[TestCaseResultArtifactRead])
+def read_test_case_result_artifacts(
+    result_id: int,
+    session: Session = Depends(get_session)
+):
+    if not session.get(TestCaseResult, result_id):
+        raise HTTPException(status_code=404, detail="Test case result not found")
+    rows = session.exec(
+        select(TestCaseResultArtifact, Artifact)
+        .join(Artifact, Artifact.id == TestCaseResultArtifact.artifact_id)
+        .where(TestCaseResultArtifact.test_case_result_id == result_id)
+        .order_by(TestCaseResultArtifact.filename)
+    ).all()
+    return [_artifact_read(link, artifact) for link, artifact in rows]
+
+
+@router.get("/{result_id}/artifacts/{filename}")
+def download_test_case_result_artifact(
+    result_id: int,
+    filename: str,
+    request: Request,
+    session: Session = Depends(get_session)
+):
+    """Download an attached file; supports Range and If-None-Match."""
+    link, artifact = _get_result_artifact(session, result_id, filename)
+    return file_download(request, artifact_path(artifact.digest), artifact.digest, link.filename, artifact.content_type)
+
+
+@router.delete("/{result_id}/artifacts/{filename}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_test_case_result_artifact(
+    result_id: int,
+    filename: str,
+    session: Session = Depends(get_session)
+):
+    link, _ = _get_result_artifact(session, result_id, filename)
+    session.delete(link)
+    session.flush()
+    orphans = delete_orphaned_artifacts(session, [link.artifact_id])
     session.commit()
+    # Files go only once the rows are gone, a rollback leaves the store intact
+    remove_artifact_files(orphans)
     return None
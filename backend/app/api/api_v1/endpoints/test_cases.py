@@ -1,39 +1,195 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import delete
+from sqlalchemy.orm import aliased, undefer_group
 from sqlmodel import Session, select
 
+from app.api.fields import parse_fields, columns, projection_response
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset, set_next_cursor
+from app.api.sorting import parse_sort, sort_or_keyset
 from app.db.init_db import get_session
+from app.db.search import TEST_CASE_INDEX, clear_log_index, full_text_search, search_terms
 from app.models.test_case import TestCase, TestCaseCreate, TestCaseRead, TestCaseUpdate
+from app.models.test_case_flakiness import TestCaseFlakiness, TestCaseFlakinessPending, TestCaseFlakinessRead
+from app.models.test_case_result import TestCaseResult
+from app.models.test_case_history import TestCaseHistory, TestCaseHistoryEntry
+from app.reports.flakiness import refresh_flakiness
+from app.reports.history import history_entries
+from app.reports.stats import uncount_test_case, recount_test_case
+from app.storage.artifacts import unlink_artifacts, delete_orphaned_artifacts, remove_artifact_files
+from app.storage.logs import delete_orphaned_logs
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[TestCaseRead])
 def read_test_cases(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,case_id,title"),
+    test_suite_id: Optional[str] = Query(None),
+    area: Optional[str] = Query(None),
+    automatability: Optional[str] = Query(None),
+    author: Optional[str] = Query(None),
+    is_challenged: Optional[bool] = Query(None),
+    sort: Optional[str] = Query(None, description="Comma separated fields to sort by, - for descending, e.g. area,-version"),
     session: Session = Depends(get_session)
 ):
-    # Get unique test cases by case_id
-    query = select(TestCase)
+    names = parse_fields(fields, TestCase)
+    sort_clauses = parse_sort(sort, TestCase)
     
-    # First get all test cases
-    all_test_cases = session.exec(query).all()
-    
-    # Create a dictionary to store unique test cases by case_id
-    unique_cases = {}
-    for case in all_test_cases:
-        if case.case_id not in unique_cases:
-            unique_cases[case.case_id] = case
-    
-    # Convert dictionary values to list
-    unique_test_cases = list(unique_cases.values())
-    
-    # Apply pagination
-    start = min(skip, len(unique_test_cases))
-    end = min(start + limit, len(unique_test_cases))
-    
-    return unique_test_cases[start:end]
+    # Get unique test cases by case_id: the oldest version of each, in order
+    # of first appearance. Rows are walked in id order and a row is kept when
+    # no older row shares its case_id (an index probe on case_id, id), so
+    # the database stops as soon as the page is full.
+    query = _select_test_cases(names).where(~_has_older_version())
+    for column, value in [
+        (TestCase.test_suite_id, test_suite_id),
+        (TestCase.area, area),
+        (TestCase.automatability, automatability),
+        (TestCase.author, author),
+        (TestCase.is_challenged, is_challenged),
+    ]:
+        if value is not None:
+            query = query.where(column == value)
+    query = sort_or_keyset(query, sort_clauses, TestCase.id, cursor)
+    test_cases = session.exec(query.offset(skip).limit(limit)).all()
+    if names:
+        projected = projection_response(test_cases)
+        if sort_clauses is None:
+            set_next_cursor(projected, test_cases, limit, "id")
+        return projected
+    if sort_clauses is None:
+        set_next_cursor(response, test_cases, limit, "id")
+    return test_cases
+
+
+def _has_older_version():
+    older = aliased(TestCase)
+    return (
+        select(older.id)
+        .where(older.case_id == TestCase.case_id)
+        .where(older.id < TestCase.id)
+        .exists()
+    )
+
+
+def _select_test_cases(names: Optional[List[str]]):
+    if names:
+        # Only the requested columns are read
+        return select(*columns(TestCase, names))
+    return select(TestCase).options(undefer_group("text"))
+
+
+@router.get("/search", response_model=List[TestCaseRead])
+def search_test_cases(
+    q: str = Query(..., description="Words to find in title, area, description, steps or precondition"),
+    skip: int = 0,
+    limit: int = Query(50, le=1000),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,case_id,title"),
+    session: Session = Depends(get_session)
+):
+    """
+    Search test cases, best match first.
+
+    Every word must appear in one of the indexed fields; words also match
+    as prefixes, so the search can run while the user types. Matches in
+    the title or area rank above matches in the description or steps.
+    Like the list, only the oldest version of each case_id is returned.
+    """
+    names = parse_fields(fields, TestCase)
+    terms = search_terms(q)
+    if not terms:
+        return []
+    query = full_text_search(
+        _select_test_cases(names).where(~_has_older_version()),
+        session.get_bind().dialect.name,
+        TestCase,
+        TEST_CASE_INDEX,
+        terms,
+    )
+    test_cases = session.exec(query.offset(skip).limit(limit)).all()
+    if names:
+        return projection_response(test_cases)
+    return test_cases
+
+
+def _select_flakiness():
+    return select(
+        *TestCaseFlakiness.__table__.columns, TestCase.case_id, TestCase.title, TestCase.test_suite_id,
+    ).join(TestCase, TestCase.id == TestCaseFlakiness.test_case_id)
+
+
+@router.get("/flakiness", response_model=List[TestCaseFlakinessRead])
+def read_test_case_flakiness(
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    min_runs: int = Query(5, description="Only cases with at least this many runs in the window"),
+    min_flips: int = Query(1, description="Only cases flipping between passed and failed at least this often"),
+    test_suite_id: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None, description="Comma separated fields to sort by, - for descending; flakiest first by default"),
+    session: Session = Depends(get_session)
+):
+    """
+    Test cases flipping between passed and failed over their latest runs,
+    with flip rate, failure rate and the outcomes of those runs. Read from
+    the precomputed testcase_flakiness table, which a background job keeps
+    up to date as runs arrive.
+    """
+    sort_clauses = parse_sort(sort, TestCaseFlakiness, TestCaseFlakiness.test_case_id) or [
+        TestCaseFlakiness.flip_rate.desc(), TestCaseFlakiness.failure_rate.desc(), TestCaseFlakiness.test_case_id,
+    ]
+    query = _select_flakiness().where(TestCaseFlakiness.runs >= min_runs, TestCaseFlakiness.flips >= min_flips)
+    if test_suite_id is not None:
+        query = query.where(TestCase.test_suite_id == test_suite_id)
+    rows = session.exec(query.order_by(*sort_clauses).offset(skip).limit(limit)).all()
+    return [dict(row._mapping) for row in rows]
+
+
+@router.post("/flakiness/refresh", response_model=dict)
+def refresh_test_case_flakiness(
+    session: Session = Depends(get_session)
+):
+    """Update the flakiness of the test cases whose results changed since the last refresh now."""
+    processed = refresh_flakiness(session)
+    session.commit()
+    return {"results_processed": processed}
+
+
+def _parse_ids(value: Optional[str]) -> Optional[List[int]]:
+    if value is None:
+        return None
+    try:
+        return [int(id) for id in value.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma separated test case ids")
+
+
+@router.get("/history", response_model=List[TestCaseHistory])
+def read_test_case_histories(
+    response: Response,
+    ids: Optional[str] = Query(None, description="Comma separated test case ids"),
+    test_suite_id: Optional[str] = Query(None),
+    limit: int = Query(1000, le=5000),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Outcomes of the latest runs of many test cases at once, e.g. for
+    sparklines next to a list of cases. One row per case, read from the
+    testcase_history table, which is kept up to date as results are written.
+    """
+    query = select(TestCaseHistory)
+    test_case_ids = _parse_ids(ids)
+    if test_case_ids is not None:
+        query = query.where(TestCaseHistory.test_case_id.in_(test_case_ids))
+    if test_suite_id is not None:
+        query = query.join(TestCase, TestCase.id == TestCaseHistory.test_case_id).where(TestCase.test_suite_id == test_suite_id)
+    rows = session.exec(keyset(query, TestCaseHistory.test_case_id, cursor).limit(limit)).all()
+    set_next_cursor(response, rows, limit, "test_case_id")
+    return rows
 
 
 @router.post("/", response_model=TestCaseRead, status_code=status.HTTP_201_CREATED)
@@ -59,6 +215,39 @@ def read_test_case(
     return test_case
 
 
+@router.get("/{test_case_id}/flakiness", response_model=TestCaseFlakinessRead)
+def read_flakiness_of_test_case(
+    test_case_id: int,
+    session: Session = Depends(get_session)
+):
+    row = session.exec(_select_flakiness().where(TestCaseFlakiness.test_case_id == test_case_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="No flakiness data for this test case")
+    return dict(row._mapping)
+
+
+@router.get("/{test_case_id}/history", response_model=List[TestCaseHistoryEntry])
+def read_history_of_test_case(
+    test_case_id: int,
+    response: Response,
+    limit: int = Query(100, le=1000),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Timeline of a test case, newest first: run, time, result and the start
+    of the comment of each of its results. Pages continue with the cursor
+    in the X-Next-Cursor header.
+    """
+    if not session.get(TestCase, test_case_id):
+        raise HTTPException(status_code=404, detail="Test case not found")
+    before = decode_cursor(cursor, length=2) if cursor is not None else None
+    entries = history_entries(session, test_case_id, before, limit)
+    if entries and len(entries) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([entries[-1].test_run_id, entries[-1].id])
+    return [dict(entry._mapping) for entry in entries]
+
+
 @router.patch("/{test_case_id}", response_model=TestCaseRead)
 def update_test_case(
     test_case_id: int,
@@ -70,10 +259,13 @@ def update_test_case(
         raise HTTPException(status_code=404, detail="Test case not found")
     
     test_case_data = test_case.dict(exclude_unset=True)
+    old_suite, old_area = db_test_case.test_suite_id, db_test_case.area
     for key, value in test_case_data.items():
         setattr(db_test_case, key, value)
     
     session.add(db_test_case)
+    session.flush()
+    recount_test_case(session, test_case_id, old_suite, old_area)
     session.commit()
     session.refresh(db_test_case)
     return db_test_case
@@ -91,7 +283,15 @@ def delete_test_case(
     try:
         # First delete any test case results associated with this test case
         from sqlalchemy import text
+        uncount_test_case(session, test_case_id)
+        unlinked = unlink_artifacts(session, select(TestCaseResult.id).where(TestCaseResult.test_case_id == test_case_id))
+        log_ids = session.exec(
+            select(TestCaseResult.log_id).where(TestCaseResult.test_case_id == test_case_id).distinct()
+        ).all()
         session.exec(text(f"DELETE FROM testcaseresult WHERE test_case_id = {test_case_id}"))
+        session.exec(delete(TestCaseFlakiness).where(TestCaseFlakiness.test_case_id == test_case_id))
+        session.exec(delete(TestCaseFlakinessPending).where(TestCaseFlakinessPending.test_case_id == test_case_id))
+        session.exec(delete(TestCaseHistory).where(TestCaseHistory.test_case_id == test_case_id))
         
         # Try to delete template associations, but catch and ignore specific errors
         try:
@@ -106,8 +306,10 @@ def delete_test_case(
         
         # Finally delete the test case itself
         session.delete(test_case)
+        session.flush()
+        delete_orphaned_logs(session, log_ids)
+        orphans = delete_orphaned_artifacts(session, unlinked)
         session.commit()
-        return None
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -115,6 +317,9 @@ def delete_test_case(
             detail=f"Error deleting test case: {str(e)}"
         )
 
+    remove_artifact_files(orphans)
+    return None
+
 
 @router.delete("/clear-all/", status_code=status.HTTP_204_NO_CONTENT)
 def clear_all_test_cases(
@@ -125,7 +330,16 @@ def clear_all_test_cases(
         from sqlalchemy import text
         
         # First delete all test case results
+        unlinked = unlink_artifacts(session, select(TestCaseResult.id))
         session.exec(text("DELETE FROM testcaseresult"))
+        session.exec(text("DELETE FROM testrun_stats"))
+        session.exec(text("DELETE FROM result_trend"))
+        session.exec(text("DELETE FROM testcase_flakiness"))
+        session.exec(text("DELETE FROM testcase_flakiness_pending"))
+        session.exec(text("DELETE FROM testcase_history"))
+        session.exec(text("DELETE FROM testcaselogchunk"))
+        session.exec(text("DELETE FROM testcaselog"))
+        clear_log_index(session)
         
         # Try to delete all template associations
         try:
@@ -140,7 +354,9 @@ def clear_all_test_cases(
         # Finally delete all test cases
         session.exec(text("DELETE FROM testcase"))
         
+        orphans = delete_orphaned_artifacts(session, unlinked)
         session.commit()
+        remove_artifact_files(orphans)
         return None
     except Exception as e:
         session.rollback()
@@ -1,7 +1,9 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy.orm import undefer_group
 from sqlmodel import Session, select
 
+from app.api.pagination import keyset, set_next_cursor
 from app.db.init_db import get_session
 from app.models.test_run_template import TestRunTemplate, TestRunTemplateCreate, TestRunTemplateRead, TestRunTemplateUpdate
 from app.models.test_case import TestCase
@@ -11,12 +13,16 @@ router = APIRouter()
 
 @router.get("/", response_model=List[TestRunTemplateRead])
 def read_test_run_templates(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     session: Session = Depends(get_session)
 ):
     """Get all test run templates."""
-    test_run_templates = session.exec(select(TestRunTemplate).offset(skip).limit(limit)).all()
+    statement = keyset(select(TestRunTemplate), TestRunTemplate.id, cursor)
+    test_run_templates = session.exec(statement.offset(skip).limit(limit)).all()
+    set_next_cursor(response, test_run_templates, limit, "id")
     return test_run_templates
 
 
@@ -93,5 +99,5 @@ def get_test_cases_for_template(
     
     # In a real implementation, this would fetch the test cases associated with the template
     # For now, we'll return a sample of test cases
-    test_cases = session.exec(select(TestCase).limit(10)).all()
+    test_cases = session.exec(select(TestCase).options(undefer_group("text")).limit(10)).all()
     return test_cases
@@ -1,29 +1,55 @@
-from typing import List
 import json
+from itertools import islice
+from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request, Query, Header, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
+from app.api.pagination import keyset, set_next_cursor, iter_pages, decode_cursor
+from app.core.config import settings
 from app.db.init_db import get_session
+from app.db.search import clear_log_index
+from app.ingest.archive import ingest_archive, is_archive, InvalidArchive
+from app.ingest.formats import is_supported
+from app.ingest.jobs import ingest_queue, spool_upload, find_duplicate, find_idempotent_job, remove_spool, FAILED
+from app.ingest.ndjson import aiter_ndjson_records
+from app.ingest.writer import UploadWriter
+from app.models.ingest_job import IngestJob, IngestJobRead
 from app.models.test_run import TestRun, TestRunCreate, TestRunRead, TestRunUpdate
-from app.models.test_case import TestCase
 from app.models.test_case_result import TestCaseResult
-from app.models.test_suite import TestSuite
+from app.models.test_run_diff import TestRunDiff
+from app.models.test_run_summary import ResultCounts, TestRunSummary
+from app.reports.diff import DIFF_STATUSES, baseline_runs, diff_runs
+from app.reports.flakiness import mark_flakiness
+from app.reports.history import recompute_history
+from app.reports.stats import counted, delete_run_stats
+from app.reports.summary import run_summaries
+from app.storage.artifacts import unlink_artifacts, delete_orphaned_artifacts, remove_artifact_files
+from app.storage.logs import delete_orphaned_logs, read_logs_by_id
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[TestRunRead])
 def read_test_runs(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     session: Session = Depends(get_session)
 ):
     try:
         # First try to select only the columns we know exist
-        statement = select(TestRun.id, TestRun.status, TestRun.operator_id)
+        statement = keyset(select(TestRun.id, TestRun.status, TestRun.operator_id), TestRun.id, cursor)
         results = session.exec(statement.offset(skip).limit(limit)).all()
         
+        # Live result counts from testrun_stats, a few rows per run
+        summaries = run_summaries(session, [result.id for result in results])
+        
         # Convert to dictionaries with default timestamps
         test_runs = []
         for result in results:
@@ -34,11 +60,15 @@ def read_test_runs(
                 "operator_id": result.operator_id,
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
-                "test_case_results": []
+                "test_case_results": [],
+                "stats": ResultCounts(**summaries[result.id].dict(include=set(ResultCounts.__fields__))),
             }
             test_runs.append(test_run_dict)
         
+        set_next_cursor(response, test_runs, limit, "id")
         return test_runs
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error but return an empty list instead of failing
         print(f"Error fetching test runs: {str(e)}")
@@ -57,11 +87,207 @@ def create_test_run(
     return db_test_run
 
 
+# Columns of a result in the test run response, in order
+RESULT_COLUMNS = (
+    TestCaseResult.id,
+    TestCaseResult.test_run_id,
+    TestCaseResult.test_case_id,
+    TestCaseResult.result,
+    TestCaseResult.comment,
+    TestCaseResult.logs_size,
+    TestCaseResult.artifacts,
+)
+
+
+def _run_results_statement(test_run_id: int):
+    return select(*RESULT_COLUMNS, TestCaseResult.log_id).where(TestCaseResult.test_run_id == test_run_id)
+
+
+def _result_dicts(session: Session, rows, logs: bool) -> List[dict]:
+    """Result rows as response dicts, with their full logs when asked for."""
+    results = [dict(row._mapping) for row in rows]
+    log_ids = [result.pop("log_id") for result in results]
+    if logs:
+        texts = read_logs_by_id(session, log_ids)
+        for result, log_id in zip(results, log_ids):
+            result["logs"] = texts.get(log_id, "")
+    return results
+
+
+def _iter_run_results(bind, test_run_id: int, logs: bool):
+    """Results of a run as dicts, fetched page by page on a session of their own."""
+    # The request session may be closed before the response has been streamed
+    with Session(bind) as session:
+        rows = iter_pages(session, _run_results_statement(test_run_id), TestCaseResult.id, settings.RESPONSE_PAGE_SIZE)
+        while True:
+            page = list(islice(rows, settings.RESPONSE_PAGE_SIZE))
+            if not page:
+                return
+            yield from _result_dicts(session, page, logs)
+
+
+def _chunks(parts, size: int):
+    """Join streamed parts into chunks of ``size`` parts, one write per page."""
+    chunk = []
+    for part in parts:
+        chunk.append(part)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _run_json_parts(test_run: TestRun, results):
+    head = json.dumps({
+        "id": test_run.id,
+        "status": test_run.status,
+        "operator_id": test_run.operator_id,
+        "created_at": (test_run.created_at or datetime.utcnow()).isoformat(),
+        "updated_at": (test_run.updated_at or datetime.utcnow()).isoformat(),
+    })
+    yield head[:-1] + ', "test_case_results": ['
+    separator = ""
+    for result in results:
+        yield separator + json.dumps(result)
+        separator = ","
+    yield "]}"
+
+
+def _run_ndjson_parts(results):
+    for result in results:
+        yield json.dumps(result) + "\n"
+
+
+@router.get("/summaries", response_model=List[TestRunSummary])
+def read_test_run_summaries(
+    ids: Optional[str] = Query(None, description="Comma separated test run ids, e.g. 12,13; the latest runs when omitted"),
+    limit: int = Query(20, le=500, description="Number of latest runs when no ids are given"),
+    session: Session = Depends(get_session)
+):
+    """
+    Pass/fail counts, pass rate and per-suite and per-area breakdowns of
+    several runs, computed in the database in one grouped query.
+    """
+    if ids:
+        try:
+            test_run_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be comma separated integers")
+        if len(test_run_ids) > 500:
+            raise HTTPException(status_code=400, detail="At most 500 ids per request")
+        existing = set(session.exec(select(TestRun.id).where(TestRun.id.in_(test_run_ids))))
+        test_run_ids = [test_run_id for test_run_id in test_run_ids if test_run_id in existing]
+    else:
+        test_run_ids = list(session.exec(select(TestRun.id).order_by(TestRun.id.desc()).limit(limit)))
+    return list(run_summaries(session, test_run_ids).values())
+
+
+@router.get("/{test_run_id}/summary", response_model=TestRunSummary)
+def read_test_run_summary(
+    test_run_id: int,
+    session: Session = Depends(get_session)
+):
+    """Pass/fail counts, pass rate and per-suite and per-area breakdowns of a run."""
+    if not session.get(TestRun, test_run_id):
+        raise HTTPException(status_code=404, detail="Test run not found")
+    return run_summaries(session, [test_run_id])[test_run_id]
+
+
+def _parse_statuses(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    statuses = [status.strip() for status in value.split(",") if status.strip()]
+    unknown = [status for status in statuses if status not in DIFF_STATUSES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown statuses: {', '.join(unknown)}")
+    return statuses
+
+
+def _diff(session: Session, response: Response, test_run_id: int, base_test_run_ids: List[int],
+          statuses: Optional[str], skip: int, limit: int, cursor: Optional[str]) -> TestRunDiff:
+    diff = diff_runs(
+        session, test_run_id, base_test_run_ids, _parse_statuses(statuses),
+        after=decode_cursor(cursor) if cursor else None, skip=skip, limit=limit,
+    )
+    set_next_cursor(response, diff.entries, limit, "test_case_id")
+    return diff
+
+
+@router.get("/{test_run_id}/diff", response_model=TestRunDiff)
+def read_test_run_baseline_diff(
+    test_run_id: int,
+    response: Response,
+    last: int = Query(5, ge=1, le=100, description="Number of preceding runs making up the baseline"),
+    statuses: Optional[str] = Query(None, description="Comma separated statuses to list, e.g. newly_failing; all but unchanged by default"),
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Compare a run with the latest result of each test case over the ``last``
+    runs before it, so a case counts as newly failing when it last passed.
+    """
+    if not session.get(TestRun, test_run_id):
+        raise HTTPException(status_code=404, detail="Test run not found")
+    return _diff(session, response, test_run_id, baseline_runs(session, test_run_id, last), statuses, skip, limit, cursor)
+
+
+@router.get("/{base_test_run_id}/diff/{test_run_id}", response_model=TestRunDiff)
+def read_test_run_diff(
+    base_test_run_id: int,
+    test_run_id: int,
+    response: Response,
+    statuses: Optional[str] = Query(None, description="Comma separated statuses to list, e.g. newly_failing; all but unchanged by default"),
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Changes from run ``base_test_run_id`` to run ``test_run_id``, case by
+    case: newly failing, newly passing, still failing, added and removed,
+    with counts per status. Computed in the database, so only the page of
+    cases is sent.
+    """
+    existing = set(session.exec(select(TestRun.id).where(TestRun.id.in_([base_test_run_id, test_run_id]))))
+    if base_test_run_id not in existing or test_run_id not in existing:
+        raise HTTPException(status_code=404, detail="Test run not found")
+    return _diff(session, response, test_run_id, [base_test_run_id], statuses, skip, limit, cursor)
+
+
 @router.get("/{test_run_id}", response_model=dict)
 def read_test_run(
     test_run_id: int, 
+    request: Request,
+    stream: bool = False,
+    logs: bool = Query(False, description="Include the full logs of test case results"),
     session: Session = Depends(get_session)
 ):
+    """
+    Get a test run with all of its test case results.
+
+    With ``stream=true`` the same document is streamed while the results are
+    read page by page, so memory stays bounded and the first bytes arrive
+    right away however large the run is. Requesting
+    ``Accept: application/x-ndjson`` streams one result per line instead.
+
+    Results carry the size of their logs. The logs themselves are only read
+    and decompressed with ``logs=true``, or per result from
+    /api/test-case-results/{id}.
+    """
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        test_run = session.get(TestRun, test_run_id)
+        if not test_run:
+            raise HTTPException(status_code=404, detail="Test run not found")
+        results = _iter_run_results(session.get_bind(), test_run_id, logs)
+        if stream:
+            parts, media_type = _run_json_parts(test_run, results), "application/json"
+        else:
+            parts, media_type = _run_ndjson_parts(results), "application/x-ndjson"
+        return StreamingResponse(_chunks(parts, settings.RESPONSE_PAGE_SIZE), media_type=media_type)
+
     try:
         # First try to select only the columns we know exist
         statement = select(TestRun.id, TestRun.status, TestRun.operator_id).where(TestRun.id == test_run_id)
@@ -72,8 +298,9 @@ def read_test_run(
         
         # Get the test case results for this test run
         try:
-            results_statement = select(TestCaseResult).where(TestCaseResult.test_run_id == test_run_id)
-            test_case_results = session.exec(results_statement).all()
+            # Only the columns of the response are read
+            rows = session.exec(_run_results_statement(test_run_id).order_by(TestCaseResult.id)).all()
+            test_case_results = _result_dicts(session, rows, logs)
         except Exception:
             # If there's an error getting test case results, return an empty list
             test_case_results = []
@@ -85,18 +312,7 @@ def read_test_run(
             "operator_id": test_run.operator_id,
             "created_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat(),
-            "test_case_results": [
-                {
-                    "id": result.id,
-                    "test_run_id": result.test_run_id,
-                    "test_case_id": result.test_case_id,
-                    "result": result.result,
-                    "comment": result.comment,
-                    "logs": result.logs,
-                    "artifacts": result.artifacts
-                }
-                for result in test_case_results
-            ]
+            "test_case_results": test_case_results
         }
         
         return response_dict
@@ -141,12 +357,23 @@ def delete_test_run(
         results_statement = select(TestCaseResult).where(TestCaseResult.test_run_id == test_run_id)
         test_case_results = session.exec(results_statement).all()
         
+        unlinked = unlink_artifacts(session, [result.id for result in test_case_results])
+        delete_run_stats(session, [test_run_id])
+        
         # Delete each result
         for result in test_case_results:
             session.delete(result)
         
+        # Forget the run in the upload history so identical uploads are ingested again
+        session.exec(update(IngestJob).where(IngestJob.test_run_id == test_run_id).values(test_run_id=None))
+        
         # Now delete the test run
         session.delete(test_run)
+        session.flush()
+        recompute_history(session, {result.test_case_id for result in test_case_results})
+        mark_flakiness(session, [counted(result) for result in test_case_results])
+        delete_orphaned_logs(session, [result.log_id for result in test_case_results])
+        orphans = delete_orphaned_artifacts(session, unlinked)
         session.commit()
     except Exception as e:
         session.rollback()
@@ -155,6 +382,7 @@ def delete_test_run(
             detail=f"Error deleting test run: {str(e)}"
         )
     
+    remove_artifact_files(orphans)
     return None
 
 
@@ -167,12 +395,24 @@ def clear_all_test_runs(
         from sqlalchemy import text
         
         # First delete all test case results
+        unlinked = unlink_artifacts(session, select(TestCaseResult.id))
         session.exec(text("DELETE FROM testcaseresult"))
+        session.exec(text("DELETE FROM testrun_stats"))
+        session.exec(text("DELETE FROM result_trend"))
+        session.exec(text("DELETE FROM testcase_flakiness"))
+        session.exec(text("DELETE FROM testcase_flakiness_pending"))
+        session.exec(text("DELETE FROM testcase_history"))
+        session.exec(text("DELETE FROM testcaselogchunk"))
+        session.exec(text("DELETE FROM testcaselog"))
+        clear_log_index(session)
         
         # Then delete all test runs
+        session.exec(text("UPDATE ingestjob SET test_run_id = NULL"))
         session.exec(text("DELETE FROM testrun"))
         
+        orphans = delete_orphaned_artifacts(session, unlinked)
         session.commit()
+        remove_artifact_files(orphans)
         return None
     except Exception as e:
         session.rollback()
@@ -182,235 +422,184 @@ def clear_all_test_runs(
         )
 
 
-@router.post("/upload", status_code=status.HTTP_201_CREATED)
-async def upload_test_results(
+@router.post("/upload", response_model=IngestJobRead, status_code=status.HTTP_202_ACCEPTED)
+def upload_test_results(
+    response: Response,
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None),
     session: Session = Depends(get_session)
 ):
     """
-    Upload test results from a file (JSON or Excel).
+    Upload test results from a file (JSON, NDJSON or Excel).
     This will create a new test run and associated test case results.
+
+    Files may be gzip or zstd compressed (results.json.gz, results.ndjson.zst);
+    they are spooled compressed and decompressed while being parsed.
+
+    The file is spooled to disk and processed by a background worker; the
+    returned ingest job can be polled at /api/ingest-jobs/{id} for progress
+    and the resulting test_run_id. Each upload is a single transaction, so a
+    malformed file leaves no run behind.
+
+    Re-uploading identical content, or repeating an Idempotency-Key, returns
+    the existing job (and its test run) with status 200 instead of ingesting
+    the file again. A key whose job failed or whose test run was deleted can
+    be used again.
     """
     # Check file extension
     filename = file.filename.lower()
-    if not (filename.endswith('.json') or filename.endswith('.xlsx')):
+    if not is_supported(filename):
         raise HTTPException(
             status_code=400, 
-            detail="Only JSON and Excel files are supported"
+            detail="Only JSON, NDJSON and Excel files are supported"
         )
     
-    try:
-        # Read file content
-        content = await file.read()
-        
-        # Process based on file type
-        if filename.endswith('.json'):
-            # Parse JSON
-            try:
-                data = json.loads(content.decode())
-            except json.JSONDecodeError:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Invalid JSON format"
-                )
-            
-            # Create test run
-            test_run = TestRun(
-                status="Completed"
-                # Let SQLModel handle the timestamps
-            )
-            session.add(test_run)
-            session.commit()
-            session.refresh(test_run)
-            
-            # Process test suites if present
-            test_suites = data.get("test_suites", [])
-            for suite_data in test_suites:
-                # Check if test suite already exists
-                suite_id = suite_data.get("id")
-                if not suite_id:
-                    continue
-                
-                try:
-                    # Try to find the test suite by ID using direct SQL
-                    result = session.execute(f"SELECT * FROM testsuite WHERE id = '{suite_id}'").first()
-                    
-                    if not result:
-                        # Create new test suite with explicit db_id if provided
-                        db_id = suite_data.get("db_id")
-                        test_suite_data = {
-                            "id": suite_id,
-                            "name": suite_data.get("name", f"Suite {suite_id}"),
-                            "url": suite_data.get("url"),
-                            "format": suite_data.get("format", "json"),
-                            "version": suite_data.get("version", 1),
-                            "version_string": suite_data.get("version_string", "1.0"),
-                            "is_final": suite_data.get("is_final", False),
-                            "db_id": db_id or 1  # Always provide a db_id, default to 1 if not specified
-                        }
-                            
-                        test_suite = TestSuite(**test_suite_data)
-                        session.add(test_suite)
-                        session.commit()
-                        session.refresh(test_suite)
-                        print(f"Created test suite: {suite_id} with db_id: {test_suite.db_id}")
-                    else:
-                        # Convert row to dict and update if needed
-                        row_dict = {column: value for column, value in zip(result.keys(), result)}
-                        print(f"Found existing test suite: {row_dict}")
-                        
-                        # Check if we need to update any fields
-                        needs_update = False
-                        test_suite = TestSuite(**row_dict)
-                        
-                        # Update fields if they exist in the uploaded data
-                        for field in ["name", "url", "format", "version", "version_string", "is_final"]:
-                            if field in suite_data and getattr(test_suite, field) != suite_data[field]:
-                                setattr(test_suite, field, suite_data[field])
-                                needs_update = True
-                        
-                        if needs_update:
-                            session.add(test_suite)
-                            session.commit()
-                            session.refresh(test_suite)
-                            print(f"Updated test suite: {suite_id}")
-                        else:
-                            print(f"Test suite {suite_id} already exists and is up to date")
-                except Exception as e:
-                    print(f"Error processing test suite {suite_id}: {e}")
-                    session.rollback()
-            
-            # Process test cases if present
-            test_cases_data = data.get("test_cases", [])
-            for case_data in test_cases_data:
-                case_id = case_data.get("case_id")
-                if not case_id:
-                    continue
-                
-                # Check if test case exists
-                existing_case = session.exec(select(TestCase).where(TestCase.case_id == case_id)).first()
-                if not existing_case:
-                    try:
-                        # Create new test case
-                        test_suite_id = case_data.get("test_suite_id", "default")
-                        test_case = TestCase(
-                            case_id=case_id,
-                            title=case_data.get("title", f"Test Case {case_id}"),
-                            version=case_data.get("version", 1),
-                            version_string=case_data.get("version_string", "1.0"),
-                            test_suite_id=test_suite_id,
-                            applies_to=case_data.get("applies_to"),
-                            description=case_data.get("description"),
-                            steps=case_data.get("steps"),
-                            precondition=case_data.get("precondition"),
-                            area=case_data.get("area"),
-                            automatability=case_data.get("automatability"),
-                            author=case_data.get("author"),
-                            material=case_data.get("material"),
-                            is_challenged=case_data.get("is_challenged", False),
-                            challenge_issue_url=case_data.get("challenge_issue_url")
-                        )
-                        session.add(test_case)
-                        session.commit()
-                        session.refresh(test_case)
-                        print(f"Created test case: {case_id}")
-                    except Exception as e:
-                        print(f"Error creating test case: {e}")
-                        session.rollback()
-            
-            # Process test results
-            results = []
-            # Check both "results" and "test_case_results" fields for compatibility
-            test_results = data.get("test_case_results", data.get("results", []))
-            
-            if not test_results:
-                # If no results found, check if the data itself is a list of results
-                if isinstance(data, list):
-                    test_results = data
-                else:
-                    # Try to find any key that might contain a list of results
-                    for key, value in data.items():
-                        if isinstance(value, list) and len(value) > 0 and key != "test_suites" and key != "test_cases":
-                            test_results = value
-                            break
-            
-            for item in test_results:
-                # Handle different formats of test case ID
-                test_case_id = item.get("test_case_id")
-                if test_case_id is None:
-                    test_case_id = item.get("id")
-                
-                # Handle different formats of result
-                result = item.get("result")
-                if result is None:
-                    result = item.get("status", "Unknown")
-                
-                if not test_case_id:
-                    continue
-                
-                # Check if test case exists
-                test_case = None
-                try:
-                    test_case = session.get(TestCase, test_case_id)
-                except Exception:
-                    # If test_case_id is not an integer, try to find by case_id
-                    stmt = select(TestCase).where(TestCase.case_id == str(test_case_id))
-                    test_case = session.exec(stmt).first()
-                
-                if not test_case:
-                    # Create a test case if it doesn't exist
-                    try:
-                        test_case = TestCase(
-                            case_id=str(test_case_id),
-                            title=item.get("title", f"Test Case {test_case_id}"),
-                            version=1,
-                            version_string="1.0",
-                            test_suite_id="default"  # Required field
-                        )
-                        session.add(test_case)
-                        session.commit()
-                        session.refresh(test_case)
-                    except Exception as e:
-                        print(f"Error creating test case: {e}")
-                        continue
-                
-                # Create test case result
-                try:
-                    test_result = TestCaseResult(
-                        test_case_id=test_case.id,
-                        test_run_id=test_run.id,
-                        result=result,
-                        comment=item.get("comment", ""),
-                        logs=item.get("logs", ""),
-                        artifacts=item.get("artifacts", "")
-                    )
-                    results.append(test_result)
-                except Exception as e:
-                    print(f"Error creating test result: {e}")
-                    continue
-            
-            # Add all results to database
-            if results:
-                try:
-                    session.add_all(results)
-                    session.commit()
-                except Exception as e:
-                    print(f"Error adding results to database: {e}")
-                    # Continue anyway to return the test run ID
-            
-            return {"message": "Test results uploaded successfully", "test_run_id": test_run.id}
-            
-        elif filename.endswith('.xlsx'):
-            # For Excel files, we would use a library like pandas or openpyxl
-            # This is a simplified implementation
+    spool_path, content_digest = spool_upload(file.file, filename)
+    
+    existing_job = None
+    if idempotency_key:
+        existing_job = find_idempotent_job(session, idempotency_key)
+        if existing_job and existing_job.content_digest != content_digest:
+            remove_spool(spool_path)
             raise HTTPException(
-                status_code=501, 
-                detail="Excel file processing not yet implemented"
+                status_code=409,
+                detail="Idempotency-Key was already used for a different upload"
             )
+    if not existing_job:
+        existing_job = find_duplicate(session, content_digest)
+    if existing_job:
+        remove_spool(spool_path)
+        response.status_code = status.HTTP_200_OK
+        return existing_job
     
-    except Exception as e:
-        print(f"Error processing file: {str(e)}")
+    job = IngestJob(
+        filename=file.filename,
+        spool_path=spool_path,
+        content_digest=content_digest,
+        idempotency_key=idempotency_key,
+    )
+    session.add(job)
+    try:
+        session.commit()
+    except IntegrityError:
+        # A concurrent request with the same Idempotency-Key won the race
+        session.rollback()
+        remove_spool(spool_path)
+        response.status_code = status.HTTP_200_OK
+        return session.exec(select(IngestJob).where(IngestJob.idempotency_key == idempotency_key)).one()
+    session.refresh(job)
+    
+    if ingest_queue.workers == 0:
+        ingest_queue.run_job(job.id, session)
+        session.refresh(job)
+    elif not ingest_queue.submit(job.id):
+        job.status = FAILED
+        job.error = "Too many uploads in progress"
+        remove_spool(job.spool_path)
+        job.spool_path = None
+        # Let the client retry with the same key
+        job.idempotency_key = None
+        session.add(job)
+        session.commit()
         raise HTTPException(
-            status_code=500,
-            detail=f"Error processing file: {str(e)}"
+            status_code=503,
+            detail="Too many uploads in progress, try again later"
+        )
+    
+    # A queued job is returned as queued, the worker may already be updating it
+    return job
+
+
+@router.post("/upload-archive", response_model=List[IngestJobRead])
+def upload_test_results_archive(
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session)
+):
+    """
+    Upload a zip or tar archive of result files (JSON, NDJSON or Excel).
+    Every result file in the archive becomes its own test run.
+
+    Members are parsed in parallel by a pool of ARCHIVE_PARSE_PROCESSES
+    processes and written one at a time. The response lists one ingest job
+    per member with its test_run_id, or the error that made it fail; a bad
+    member does not affect the others.
+    """
+    if not is_archive(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail="Only .zip, .tar, .tar.gz and .tgz archives are supported"
         )
+    
+    archive_path, _ = spool_upload(file.file, file.filename)
+    try:
+        return ingest_archive(session, archive_path, settings.ARCHIVE_PARSE_PROCESSES)
+    except InvalidArchive as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        remove_spool(archive_path)
+
+
+@router.post("/stream", status_code=status.HTTP_201_CREATED)
+async def stream_test_results(
+    request: Request,
+    test_run_id: Optional[int] = Query(None),
+    batch_size: int = Query(settings.UPLOAD_BATCH_SIZE, ge=1),
+    session: Session = Depends(get_session)
+):
+    """
+    Ingest NDJSON records from the request body while it is being sent.
+
+    Each line is one JSON object with a "type" of "suite", "case" or
+    "result" (the default). The body may be sent with Content-Encoding gzip
+    or zstd. Records are written and committed every
+    batch_size lines, so results show up before the upload has finished.
+    Without test_run_id a new run is created and kept "In Progress" until the
+    body ends; with test_run_id the records are appended to that run.
+    """
+    def open_test_run():
+        if test_run_id is not None:
+            if not session.get(TestRun, test_run_id):
+                raise HTTPException(status_code=404, detail="Test run not found")
+            return test_run_id
+        test_run = TestRun(status="In Progress")
+        session.add(test_run)
+        session.commit()
+        session.refresh(test_run)
+        return test_run.id
+
+    def write_batch(batch):
+        for kind, item in batch:
+            writer.add(kind, item)
+        writer.flush()
+
+    def set_status(run_status):
+        test_run = session.get(TestRun, run_id)
+        test_run.status = run_status
+        session.add(test_run)
+        session.commit()
+
+    run_id = await run_in_threadpool(open_test_run)
+    writer = UploadWriter(session, run_id, batch_size=batch_size, commit_batches=True)
+    batch = []
+    try:
+        async for record in aiter_ndjson_records(request.stream()):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                await run_in_threadpool(write_batch, batch)
+                batch = []
+        await run_in_threadpool(write_batch, batch)
+    except ValueError as e:
+        await run_in_threadpool(session.rollback)
+        if test_run_id is None:
+            await run_in_threadpool(set_status, "Incomplete")
+        raise HTTPException(status_code=400, detail=f"{e} (records before it were stored in test run {run_id})")
+    
+    if test_run_id is None:
+        await run_in_threadpool(set_status, "Completed")
+    
+    return {
+        "message": "Test results uploaded successfully",
+        "test_run_id": run_id,
+        "rows_parsed": writer.rows_parsed,
+        "rows_inserted": writer.rows_inserted,
+    }
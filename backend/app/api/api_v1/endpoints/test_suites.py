@@ -1,7 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlmodel import Session, select
 
+from app.api.pagination import keyset, set_next_cursor
 from app.db.init_db import get_session
 from app.models.test_suite import TestSuite, TestSuiteCreate, TestSuiteRead, TestSuiteUpdate
 
@@ -10,18 +11,21 @@ router = APIRouter()
 
 @router.get("/", response_model=List[TestSuiteRead])
 def read_test_suites(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
+    cursor: Optional[str] = None,
     raw: bool = False,
     session: Session = Depends(get_session)
 ):
     try:
         # First try with a standard SQLModel query
-        statement = select(TestSuite)
+        statement = keyset(select(TestSuite), TestSuite.db_id, cursor)
         test_suites = session.exec(statement.offset(skip).limit(limit)).all()
         
-        if test_suites:
+        if test_suites or cursor is not None:
             print(f"Found {len(test_suites)} test suites with SQLModel query")
+            set_next_cursor(response, test_suites, limit, "db_id")
             return test_suites
         
         # If no results, try with a direct SQL query
@@ -67,6 +71,8 @@ def read_test_suites(
             test_suites = [default_suite]
         
         return test_suites
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching test suites: {str(e)}")
         import traceback
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+
+def file_download(request: Request, path: str, digest: str, filename: str, content_type: Optional[str]) -> Response:
+    """
+    Send a stored file straight from disk. The ETag is the content digest,
+    so clients revalidate with If-None-Match and get a 304 without a body;
+    Range requests are answered with 206 by FileResponse itself. Tags are
+    compared weakly, as compressed responses carry the weak form W/"...".
+    """
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if_none_match = request.headers.get("if-none-match")
+    tags = [tag.strip().removeprefix("W/") for tag in (if_none_match or "").split(",")]
+    if if_none_match and (if_none_match.strip() == "*" or etag in tags):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        path,
+        media_type=content_type or "application/octet-stream",
+        filename=filename,
+        content_disposition_type="inline",
+        headers=headers,
+    )
@@ -0,0 +1,36 @@
+from typing import List, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel import SQLModel
+
+
+def parse_fields(fields: Optional[str], table_model: Type[SQLModel]) -> Optional[List[str]]:
+    """
+    Field names of a ``fields=id,title,...`` projection, validated against
+    the columns of the table. The id is always included so results can be
+    paged. Returns None when every field was asked for.
+    """
+    if not fields:
+        return None
+    names = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    unknown = [name for name in names if name not in table_model.__table__.columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return names
+
+
+def columns(table_model: Type[SQLModel], names: List[str]):
+    return [getattr(table_model, name) for name in names]
+
+
+def projection_response(rows) -> JSONResponse:
+    """Partial records selected with columns(), which the read model would reject."""
+    return JSONResponse(jsonable_encoder([dict(row._mapping) for row in rows]))
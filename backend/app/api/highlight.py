@@ -0,0 +1,31 @@
+import html
+import re
+from typing import List, Optional
+
+
+def term_pattern(terms: List[str]) -> "re.Pattern":
+    """Case-insensitive pattern of words starting with any of the terms, as the search matches them."""
+    return re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+
+
+def snippet(text: str, pattern: "re.Pattern", width: int = 200) -> Optional[str]:
+    """
+    Part of ``text`` around the first match, at most ``width`` characters,
+    HTML escaped with every match wrapped in ``<mark>``. None without match.
+    """
+    match = pattern.search(text)
+    if not match:
+        return None
+    start = max(match.start() - width // 4, 0)
+    end = min(start + width, len(text))
+    part = text[start:end]
+    highlighted = []
+    position = 0
+    for found in pattern.finditer(part):
+        highlighted.append(html.escape(part[position:found.start()]))
+        highlighted.append(f"<mark>{html.escape(found.group())}</mark>")
+        position = found.end()
+    highlighted.append(html.escape(part[position:]))
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return prefix + "".join(highlighted).strip() + suffix
@@ -0,0 +1,77 @@
+import base64
+import json
+from typing import Any, Iterator, List, Optional
+
+from fastapi import HTTPException, Response
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: Any) -> str:
+    """Opaque cursor pointing after the row with the given key."""
+    return base64.urlsafe_b64encode(json.dumps({"after": key}).encode()).decode().rstrip("=")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, length: Optional[int] = None) -> Any:
+    """
+    Key a cursor from encode_cursor points after: an integer id, or a list
+    of ``length`` integers for keys of several columns. Anything else, such
+    as a tampered cursor, is a 400 rather than a database error.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if length is None:
+        valid = _is_int(key)
+    else:
+        valid = isinstance(key, list) and len(key) == length and all(_is_int(value) for value in key)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def keyset(statement, key_column, cursor: Optional[str]):
+    """
+    Order a list query by a unique key and continue after the cursor, if any.
+
+    Unlike offset, which makes the database count past every skipped row,
+    the cursor turns into a range condition on the key's index, so a deep
+    page costs the same as the first one.
+    """
+    if cursor is not None:
+        statement = statement.where(key_column > decode_cursor(cursor))
+    return statement.order_by(key_column)
+
+
+def iter_pages(session, statement, key_column, page_size: int) -> Iterator[Any]:
+    """
+    Yield every row of a query, fetching ``page_size`` rows per round trip in
+    key order. Each page continues after the last key of the previous one,
+    so only one page is held in memory and no page is slower than the first.
+    ``statement`` must select ``key_column`` under its own name.
+    """
+    last = None
+    while True:
+        page = statement
+        if last is not None:
+            page = page.where(key_column > last)
+        rows = session.execute(page.order_by(key_column).limit(page_size)).all()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = getattr(rows[-1], key_column.key)
+
+
+def set_next_cursor(response: Response, rows: List[Any], limit: int, key: str):
+    """Send the cursor of the next page when this page is full."""
+    if rows and len(rows) >= limit:
+        last = rows[-1]
+        value = last[key] if isinstance(last, dict) else getattr(last, key)
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(value)
@@ -0,0 +1,37 @@
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    ``(start, end)`` byte positions, end exclusive, of a single-range
+    ``Range: bytes=...`` header. Returns None when the whole content should
+    be sent: no header, another unit, or several ranges. Raises 416 when the
+    range lies outside the content.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    try:
+        if not sep:
+            raise ValueError
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+        else:
+            # bytes=-N is the last N bytes
+            start, end = max(size - int(last), 0), size
+    except ValueError:
+        return None
+    end = min(end, size)
+    if start >= end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
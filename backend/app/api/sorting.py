@@ -0,0 +1,45 @@
+from typing import List, Optional, Type
+
+from fastapi import HTTPException
+from sqlmodel import SQLModel
+
+from app.api.pagination import keyset
+
+
+def parse_sort(sort: Optional[str], table_model: Type[SQLModel], key_column=None) -> Optional[List]:
+    """
+    ORDER BY clauses of a ``sort=area,-title`` parameter: fields in order of
+    precedence, ``-`` for descending, validated against the columns of the
+    table. The id, or ``key_column`` of tables keyed otherwise, breaks ties
+    so pages are stable. None for the default id order.
+    """
+    if not sort:
+        return None
+    clauses = []
+    unknown = []
+    for name in sort.split(","):
+        name = name.strip()
+        descending = name.startswith("-")
+        name = name.lstrip("-+")
+        if not name:
+            continue
+        if name not in table_model.__table__.columns:
+            unknown.append(name)
+            continue
+        column = getattr(table_model, name)
+        clauses.append(column.desc() if descending else column.asc())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sort fields: {', '.join(unknown)}")
+    return clauses + [table_model.id if key_column is None else key_column] if clauses else None
+
+
+def sort_or_keyset(statement, clauses: Optional[List], key_column, cursor: Optional[str]):
+    """
+    Apply a sort from parse_sort, or the keyset order by ``key_column``.
+    Cursors follow the key order only; sorted lists are paged with skip.
+    """
+    if clauses is None:
+        return keyset(statement, key_column, cursor)
+    if cursor is not None:
+        raise HTTPException(status_code=400, detail="cursor cannot be combined with sort, use skip")
+    return statement.order_by(*clauses)
@@ -0,0 +1,294 @@
+import gzip
+import io
+import zlib
+from typing import BinaryIO, Optional
+
+import zstandard
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Supported content codings, in order of preference for responses
+ENCODINGS = ("zstd", "gzip")
+# File suffixes of compressed uploads and the coding they use
+FILE_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+# Compressed input fed to a zstd decompressor at a time, so the size limit
+# is checked before a small body inflates much past it
+ZSTD_INPUT_SLICE = 16 * 1024
+# Responses of these types are already compressed
+COMPRESSED_TYPES = (
+    "image/", "video/", "audio/", "application/zip", "application/gzip", "application/zstd", "application/vnd.apache.parquet",
+)
+
+
+class _GzipDecompressor:
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes, max_length: int = 0) -> bytes:
+        # Input beyond max_length bytes of output is left in unconsumed_tail
+        return self._decompressor.decompress(data, max_length)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+class _ZstdDecompressor:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes, max_length: int = 0) -> bytes:
+        # zstd cannot stop at an output size, so the input is fed in slices
+        # and decompression stops once the output is past max_length
+        parts = []
+        size = 0
+        for start in range(0, len(data), ZSTD_INPUT_SLICE):
+            part = self._decompressor.decompress(data[start:start + ZSTD_INPUT_SLICE])
+            parts.append(part)
+            size += len(part)
+            if max_length and size >= max_length:
+                break
+        return b"".join(parts)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync-flush so streamed responses reach the client chunk by chunk
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=settings.ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def decompressor(encoding: str):
+    """
+    Incremental decompressor for a content coding, with decompress() and
+    flush(). decompress() takes an optional max_length and may stop soon
+    after producing that much output.
+    """
+    if encoding == "gzip":
+        return _GzipDecompressor()
+    if encoding == "zstd":
+        return _ZstdDecompressor()
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def compressor(encoding: str):
+    """Incremental compressor for a content coding, with compress() and finish()."""
+    if encoding == "gzip":
+        return _GzipCompressor()
+    if encoding == "zstd":
+        return _ZstdCompressor()
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def file_encoding(filename: str) -> Optional[str]:
+    """Content coding implied by a file name such as results.json.gz, None if uncompressed."""
+    for suffix, encoding in FILE_SUFFIXES.items():
+        if filename.lower().endswith(suffix):
+            return encoding
+    return None
+
+
+def strip_compression_suffix(filename: str) -> str:
+    """results.json.zst -> results.json"""
+    for suffix in FILE_SUFFIXES:
+        if filename.lower().endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def open_decompressed(path: str, filename: str) -> BinaryIO:
+    """Open a spooled file for reading, decompressing on the fly if its name says so."""
+    encoding = file_encoding(filename)
+    if encoding == "gzip":
+        return gzip.open(path, "rb")
+    if encoding == "zstd":
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the supported coding with the highest quality in an Accept-Encoding
+    header, preferring them in ENCODINGS order when the qualities tie. None
+    when identity is preferred or no supported coding is acceptable.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    qualities = {encoding: accepted.get(encoding, accepted.get("*", 0.0)) for encoding in ENCODINGS}
+    # max() keeps the first of equal qualities, so ENCODINGS order breaks ties
+    best = max(ENCODINGS, key=qualities.__getitem__)
+    if qualities[best] <= 0 or qualities[best] < accepted.get("identity", 0.0):
+        return None
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Decode gzip/zstd request bodies and encode responses for Accept-Encoding.
+
+    Request bodies with ``Content-Encoding: gzip`` or ``zstd`` are decompressed
+    chunk by chunk as the application reads them, so uploads stay streamed.
+    A body inflating past REQUEST_MAX_DECOMPRESSED_SIZE is rejected with 413.
+    Responses of at least ``minimum_size`` bytes are compressed with zstd or
+    gzip, whichever the client prefers; streamed responses are compressed
+    chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").lower()
+        if content_encoding in ENCODINGS:
+            scope = dict(scope)
+            request_headers = MutableHeaders(scope=scope)
+            del request_headers["content-encoding"]
+            if "content-length" in request_headers:
+                del request_headers["content-length"]
+            receive = self._decoding_receive(receive, decompressor(content_encoding))
+        elif content_encoding != "identity":
+            response_headers = [(b"content-type", b"application/json")]
+            await send({"type": "http.response.start", "status": 415, "headers": response_headers})
+            await send({"type": "http.response.body", "body": b'{"detail":"Unsupported Content-Encoding"}'})
+            return
+
+        encoding = negotiate(headers.get("accept-encoding", ""))
+        if encoding:
+            send = _EncodingSender(send, encoding, self.minimum_size)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _decoding_receive(receive: Receive, decoder) -> Receive:
+        size = 0
+
+        async def decoding_receive() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            limit = settings.REQUEST_MAX_DECOMPRESSED_SIZE
+            try:
+                # One byte past what is left is enough to know the body is too large
+                body = decoder.decompress(message.get("body", b""), limit - size + 1)
+                if len(body) <= limit - size and not message.get("more_body", False):
+                    body += decoder.flush()
+            except (zlib.error, zstandard.ZstdError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid compressed request body: {e}")
+            size += len(body)
+            if size > limit:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Decompressed request body exceeds {limit} bytes",
+                )
+            return {**message, "body": body}
+
+        return decoding_receive
+
+
+class _EncodingSender:
+    """ASGI send wrapper that compresses the response body."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message.get("headers", []))
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or "content-range" in headers
+                or message["status"] in (204, 206, 304)
+                or content_type.startswith(COMPRESSED_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            # e.g. http.response.pathsend for files, which is sent as is
+            if self.start_message is not None:
+                start_message, self.start_message = self.start_message, None
+                self.passthrough = True
+                await self.send(start_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+
+            self.compressor = compressor(self.encoding)
+            body = self.compressor.compress(body)
+            if not more_body:
+                body += self.compressor.finish()
+            headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # A strong ETag names the unencoded bytes, not this representation
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                del headers["content-length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.send({**start_message, "headers": headers.raw})
+            await self.send({**message, "body": body})
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.finish()
+        await self.send({**message, "body": body})
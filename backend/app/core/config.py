@@ -21,6 +21,45 @@ class Settings(BaseSettings):
     # Use SQLite for development, PostgreSQL for production
     DATABASE_URL: str = os.getenv("DATABASE_URL", SQLITE_DATABASE_URL)
     
+    # Uploads
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024  # Bytes read from the upload stream at a time
+    UPLOAD_BATCH_SIZE: int = 1000  # Parsed records written to the database per batch
+    INGEST_SPOOL_DIR: str = "./spool"  # Uploads wait here until a worker has processed them
+    INGEST_WORKERS: int = 2  # Uploads processed concurrently (1 at most on SQLite), 0 processes them inside the request
+    INGEST_QUEUE_SIZE: int = 16  # Uploads that may wait for a worker before new ones are rejected
+    ARCHIVE_PARSE_PROCESSES: int = (os.cpu_count() or 1) - 1  # Processes parsing archive members besides the writing one, 0 parses them inside the request
+    
+    # Log storage
+    LOG_CHUNK_SIZE: int = 256 * 1024  # Logs are compressed in chunks of this many bytes, the unit of partial reads
+    LOG_ZSTD_LEVEL: int = 3
+    LOG_SEARCH_MAX_BYTES: int = 1024 * 1024  # Longer logs are searchable by their first and last half of this
+    
+    # Artifacts
+    ARTIFACT_STORE_DIR: str = "./artifacts"  # Content-addressed store of uploaded evidence files
+    
+    # Flaky test detection
+    FLAKINESS_WINDOW: int = 20  # Latest runs of a test case its flip and failure rates are computed over
+    FLAKINESS_REFRESH_INTERVAL: int = 300  # Seconds between background refreshes, besides the one after each upload
+    FLAKINESS_BATCH_SIZE: int = 5000  # New results folded in per query
+    
+    # Test case history
+    HISTORY_OUTCOMES: int = 50  # Latest outcomes kept per test case for sparklines
+    HISTORY_COMMENT_LENGTH: int = 80  # Characters of the comment in history entries
+    
+    # Columnar exports
+    EXPORT_BATCH_SIZE: int = 100000  # Rows per Parquet row group or Arrow record batch
+    EXPORT_LOGS_BATCH_SIZE: int = 1000  # Rows per batch when the logs of results are exported too
+    EXPORT_PARQUET_COMPRESSION: str = "zstd"  # Parquet codec; Arrow files stay uncompressed for memory mapping
+    
+    # Streamed responses
+    RESPONSE_PAGE_SIZE: int = 500  # Rows fetched per query while a large response is streamed
+    
+    # Compression of request and response bodies
+    RESPONSE_COMPRESSION_MINIMUM_SIZE: int = 1024  # Smaller responses are sent uncompressed
+    REQUEST_MAX_DECOMPRESSED_SIZE: int = 4 * 1024 ** 3  # Compressed request bodies inflating past this are rejected with 413
+    GZIP_LEVEL: int = 6
+    ZSTD_LEVEL: int = 3
+    
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "development_secret_key")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
@@ -0,0 +1,205 @@
+import re
+from typing import Callable, Dict, List, NamedTuple, Tuple, Type
+
+from sqlalchemy import DDL, and_, column, func, literal_column, or_, select, table, text
+from sqlmodel import Session, SQLModel
+
+from app.core.config import settings
+
+# Relevance of a match in each weight class, highest first
+WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0, "D": 1.0}
+
+
+class FullTextIndex(NamedTuple):
+    """
+    Indexed text columns of a table and their weights. On SQLite the index
+    is an FTS5 table named ``name`` with the table as external content,
+    on PostgreSQL a generated ``search_vector`` column with a GIN index.
+    Both are maintained by the database on every insert, update and delete.
+    """
+    name: str
+    columns: Tuple[Tuple[str, str], ...]  # (column, weight class) pairs
+
+
+TEST_CASE_INDEX = FullTextIndex(
+    name="testcase_fts",
+    columns=(("title", "A"), ("area", "A"), ("description", "B"), ("steps", "C"), ("precondition", "C")),
+)
+
+
+RESULT_COMMENT_INDEX = FullTextIndex(name="testcaseresult_fts", columns=(("comment", "A"),))
+
+# Stored logs are compressed, so the database cannot index them itself. They
+# are indexed once per distinct log (by testcaselog.id) when first stored:
+# in a contentless FTS5 table on SQLite, in testcaselog.search_vector on
+# PostgreSQL.
+LOG_INDEX = FullTextIndex(name="testcaselog_fts", columns=(("logs", "A"),))
+
+
+def _sqlite_ddl(table_name: str, index: FullTextIndex) -> List[str]:
+    names = [name for name, _ in index.columns]
+    new = ", ".join(f"new.{name}" for name in names)
+    old = ", ".join(f"old.{name}" for name in names)
+    listed = ", ".join(names)
+    return [
+        # Prefix indexes make "term*" queries of short prefixes cheap
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index.name} USING fts5({listed}, content='{table_name}', "
+        f"content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {index.name}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {index.name}(rowid, {listed}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index.name}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {index.name}({index.name}, rowid, {listed}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index.name}_au AFTER UPDATE OF {listed} ON {table_name} BEGIN "
+        f"INSERT INTO {index.name}({index.name}, rowid, {listed}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {index.name}(rowid, {listed}) VALUES (new.id, {new}); END",
+    ]
+
+
+def _postgresql_ddl(table_name: str, index: FullTextIndex) -> List[str]:
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce({name}, '')), '{weight}')" for name, weight in index.columns
+    )
+    return [
+        f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector ON {table_name} USING GIN (search_vector)",
+    ]
+
+
+def full_text_ddl(table_name: str, index: FullTextIndex) -> List[DDL]:
+    """Statements creating the index, to run after the table is created."""
+    return (
+        [DDL(statement).execute_if(dialect="sqlite") for statement in _sqlite_ddl(table_name, index)]
+        + [DDL(statement).execute_if(dialect="postgresql") for statement in _postgresql_ddl(table_name, index)]
+    )
+
+
+def log_index_ddl() -> List[DDL]:
+    """Statements creating the log index, to run after testcaselog is created."""
+    return [
+        DDL(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {LOG_INDEX.name} USING fts5(logs, content='', "
+            "prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        ).execute_if(dialect="sqlite"),
+        DDL("ALTER TABLE testcaselog ADD COLUMN IF NOT EXISTS search_vector tsvector").execute_if(dialect="postgresql"),
+        DDL(
+            "CREATE INDEX IF NOT EXISTS ix_testcaselog_search_vector ON testcaselog USING GIN (search_vector)"
+        ).execute_if(dialect="postgresql"),
+    ]
+
+
+def log_search_ranges(size: int) -> List[Tuple[int, int]]:
+    """
+    Byte ranges of a log that are indexed. Logs longer than
+    LOG_SEARCH_MAX_BYTES are indexed by their beginning and end, where setup
+    and failures are logged.
+    """
+    half = settings.LOG_SEARCH_MAX_BYTES // 2
+    if size > 2 * half:
+        return [(0, half), (size - half, size)]
+    return [(0, size)]
+
+
+def log_search_text(parts: List[bytes]) -> str:
+    return b"\n".join(parts).decode("utf-8", errors="replace")
+
+
+def index_logs(session: Session, logs: Dict[int, bytes]):
+    """Add newly stored logs, by log id, to the log index."""
+    if not logs:
+        return
+    rows = [
+        {"id": log_id, "logs": log_search_text([data[start:end] for start, end in log_search_ranges(len(data))])}
+        for log_id, data in logs.items()
+    ]
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        session.execute(text(f"INSERT INTO {LOG_INDEX.name}(rowid, logs) VALUES (:id, :logs)"), rows)
+    elif dialect == "postgresql":
+        session.execute(
+            text("UPDATE testcaselog SET search_vector = to_tsvector('english', :logs) WHERE id = :id"), rows
+        )
+
+
+def unindex_logs(session: Session, sizes: Dict[int, int], read_range: Callable[[int, int, int], bytes]):
+    """
+    Remove logs that are about to be deleted, given their sizes by log id,
+    from the log index. A contentless FTS5 table needs the indexed text to
+    forget a row, so the indexed ranges are read back one log at a time; on
+    PostgreSQL the vector goes with the row and nothing is read.
+    """
+    if session.get_bind().dialect.name != "sqlite":
+        return
+    statement = text(f"INSERT INTO {LOG_INDEX.name}({LOG_INDEX.name}, rowid, logs) VALUES ('delete', :id, :logs)")
+    for log_id, size in sizes.items():
+        parts = [read_range(log_id, start, end) for start, end in log_search_ranges(size)]
+        session.execute(statement, {"id": log_id, "logs": log_search_text(parts)})
+
+
+def clear_log_index(session: Session):
+    if session.get_bind().dialect.name == "sqlite":
+        session.execute(text(f"INSERT INTO {LOG_INDEX.name}({LOG_INDEX.name}) VALUES ('delete-all')"))
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Words of a search box query. Operators and quotes are dropped so user
+    input never reaches the FTS5 or tsquery syntax.
+    """
+    return re.findall(r"\w+", q or "")
+
+
+def full_text_search(statement, dialect: str, table_model: Type[SQLModel], index: FullTextIndex, terms: List[str]):
+    """
+    Restrict a query of ``table_model`` to rows containing every term,
+    each also matching as a prefix ("auth" finds "authentication"), and
+    order them best match first.
+    """
+    table_name = table_model.__table__.name
+    if dialect == "sqlite":
+        fts = table(index.name, column("rowid"))
+        weights = [WEIGHTS[weight] for _, weight in index.columns]
+        return (
+            statement.join(fts, fts.c.rowid == table_model.id)
+            .where(literal_column(index.name).op("MATCH")(_fts5_query(terms)))
+            .order_by(func.bm25(literal_column(index.name), *weights), table_model.id)
+        )
+    if dialect == "postgresql":
+        vector = literal_column(f"{table_name}.search_vector")
+        query = _tsquery(terms)
+        return statement.where(vector.op("@@")(query)).order_by(func.ts_rank(vector, query).desc(), table_model.id)
+    # No full-text index elsewhere, fall back to substring matching
+    return statement.where(_substring_match(table_model, index, terms)).order_by(table_model.id)
+
+
+def matching_ids(dialect: str, table_name: str, index: FullTextIndex, terms: List[str]):
+    """
+    Subquery of the ids of ``table_name`` rows whose index matches every
+    term, for use in ``id.in_(...)``. None where there is no index.
+    """
+    if dialect == "sqlite":
+        return (
+            select(column("rowid"))
+            .select_from(table(index.name))
+            .where(literal_column(index.name).op("MATCH")(_fts5_query(terms)))
+        )
+    if dialect == "postgresql":
+        return (
+            select(column("id"))
+            .select_from(table(table_name))
+            .where(literal_column(f"{table_name}.search_vector").op("@@")(_tsquery(terms)))
+        )
+    return None
+
+
+def _fts5_query(terms: List[str]) -> str:
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms: List[str]):
+    return func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+
+
+def _substring_match(table_model: Type[SQLModel], index: FullTextIndex, terms: List[str]):
+    columns = [table_model.__table__.c[name] for name, _ in index.columns]
+    return and_(*[or_(*[col.ilike(f"%{term}%") for col in columns]) for term in terms])
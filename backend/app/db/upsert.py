@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import insert, literal, update as sa_update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+
+
+def insert_ignore(session: Session, table, rows: List[Dict[str, Any]]):
+    """
+    Multi-row ``INSERT ... ON CONFLICT DO NOTHING`` on SQLite and PostgreSQL,
+    plain executemany INSERT elsewhere.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite_insert(table).on_conflict_do_nothing()
+    elif dialect == "postgresql":
+        statement = postgresql_insert(table).on_conflict_do_nothing()
+    else:
+        statement = insert(table)
+    session.execute(statement, rows)
+
+
+def upsert(session: Session, table, rows: List[Dict[str, Any]], keys: List[str], update: Callable[[Any], Dict[str, Any]]):
+    """
+    Insert rows, or where a row with the same ``keys`` exists, set the
+    columns returned by ``update(excluded)`` instead; ``excluded`` has the
+    values of the row that was not inserted as attributes. One multi-row
+    ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite and PostgreSQL, row by
+    row elsewhere.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        statement = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(table)
+        statement = statement.on_conflict_do_update(index_elements=keys, set_=update(statement.excluded))
+        session.execute(statement, rows)
+        return
+    for row in rows:
+        excluded = SimpleNamespace(**{name: literal(value) for name, value in row.items()})
+        match = [table.c[key] == row[key] for key in keys]
+        if not session.execute(sa_update(table).where(*match).values(**update(excluded))).rowcount:
+            session.execute(insert(table), [row])
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import pickle
+import tarfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.ingest.formats import is_supported, iter_file_records
+from app.ingest.jobs import ingest_queue, spool_upload, find_duplicate, remove_spool, error_message
+from app.models.ingest_job import IngestJob
+
+# Archives accepted by the archive upload endpoint
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+class InvalidArchive(ValueError):
+    pass
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_result_file(name: str) -> bool:
+    basename = os.path.basename(name)
+    if basename.startswith(".") or "__MACOSX/" in name:
+        return False
+    return is_supported(basename)
+
+
+def iter_archive_members(path: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Yield ``(name, fileobj)`` for each result file in a zip or tar archive,
+    in archive order. Directories and files of other types (READMEs, macOS
+    metadata, ...) are skipped. Members are read sequentially, so compressed
+    tarballs are not decompressed more than once.
+    """
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and _is_result_file(info.filename):
+                        with archive.open(info) as member:
+                            yield info.filename, member
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path, "r:*") as archive:
+                for info in archive:
+                    if info.isfile() and _is_result_file(info.name):
+                        member = archive.extractfile(info)
+                        yield info.name, member
+        else:
+            raise InvalidArchive("Not a zip or tar archive")
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise InvalidArchive(f"Invalid archive: {e}")
+
+
+def parse_member(path: str, filename: str, batch_size: int) -> str:
+    """
+    Parse a spooled archive member in a worker process. The records are
+    written next to the member as pickled batches of ``batch_size`` and the
+    path of that file is returned, so neither process holds a whole member.
+    """
+    parsed_path = f"{path}.parsed"
+    try:
+        with open(parsed_path, "wb") as parsed:
+            batch: List[Tuple[str, Dict[str, Any]]] = []
+            for record in iter_file_records(path, filename):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    pickle.dump(batch, parsed, protocol=pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, parsed, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        remove_spool(parsed_path)
+        # Only plain exceptions are sure to survive the trip back to the parent
+        raise ValueError(error_message(e)) from None
+    return parsed_path
+
+
+def _parsed_records(future: Future) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    # A parse error is raised from here, so run_job records it on the job
+    parsed_path = future.result()
+    try:
+        with open(parsed_path, "rb") as parsed:
+            while True:
+                try:
+                    batch = pickle.load(parsed)
+                except EOFError:
+                    break
+                yield from batch
+    finally:
+        remove_spool(parsed_path)
+
+
+class ArchiveParsePool:
+    """
+    Process pool shared by every archive upload. It is started on the first
+    archive and kept for the life of the server, so an upload does not pay
+    for spawning and importing the app in fresh processes. A pool broken by
+    a dying worker is replaced on the next submit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._processes = 0
+
+    def _get(self, processes: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._processes != processes:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                # Spawn rather than fork: the server process runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+                )
+                self._processes = processes
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def submit(self, processes: int, path: str, filename: str) -> Future:
+        executor = self._get(processes)
+        try:
+            return executor.submit(parse_member, path, filename, settings.UPLOAD_BATCH_SIZE)
+        except BrokenProcessPool:
+            self._reset(executor)
+            return self._get(processes).submit(parse_member, path, filename, settings.UPLOAD_BATCH_SIZE)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+parse_pool = ArchiveParsePool()
+
+
+def ingest_archive(session: Session, path: str, processes: int) -> List[IngestJob]:
+    """
+    Ingest every result file of an archive as its own test run and return one
+    ingest job per member.
+
+    Members are parsed in the shared pool of ``processes`` worker processes,
+    since parsing is CPU bound, while their records are read back in batches
+    and written one member at a time through UploadWriter in this thread. At
+    most two members per process are parsed ahead of the writer. With
+    ``processes=0`` members are parsed inline. Members identical to an existing upload return that job, like
+    the single file upload.
+    """
+    jobs: List[IngestJob] = []
+    pending: Deque[Tuple[int, Future]] = deque()
+
+    def write_next():
+        job_id, future = pending.popleft()
+        ingest_queue.run_job(job_id, session, records=_parsed_records(future))
+
+    try:
+        for name, member in iter_archive_members(path):
+            spool_path, content_digest = spool_upload(member, os.path.basename(name))
+            existing_job = find_duplicate(session, content_digest)
+            if existing_job:
+                remove_spool(spool_path)
+                jobs.append(existing_job)
+                continue
+
+            job = IngestJob(filename=name, spool_path=spool_path, content_digest=content_digest)
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            jobs.append(job)
+
+            if processes <= 0:
+                ingest_queue.run_job(job.id, session)
+                continue
+            pending.append((job.id, parse_pool.submit(processes, spool_path, name)))
+            if len(pending) >= 2 * processes:
+                write_next()
+    finally:
+        # Members spooled before an archive error are still ingested
+        while pending:
+            write_next()
+
+    for job in jobs:
+        session.refresh(job)
+    return jobs
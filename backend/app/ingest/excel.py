@@ -0,0 +1,128 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+from app.ingest.json_stream import SUITE, CASE, RESULT
+from app.ingest.writer import SUITE_FIELDS, CASE_FIELDS
+
+# Header aliases accepted in addition to the model field names
+RESULT_HEADERS = {
+    "test_case_id": "test_case_id", "case_id": "test_case_id", "test_case": "test_case_id", "case": "test_case_id",
+    "result": "result", "status": "result", "outcome": "result", "verdict": "result",
+    "comment": "comment", "comments": "comment", "note": "comment", "notes": "comment",
+    "logs": "logs", "log": "logs",
+    "artifacts": "artifacts", "artifact": "artifacts", "attachments": "artifacts",
+}
+CASE_HEADERS = {
+    "case_id": "case_id", "test_case_id": "case_id", "test_case": "case_id",
+    "title": "title", "name": "title", "test_case_title": "title",
+    "version": "version", "version_string": "version_string",
+    "test_suite_id": "test_suite_id", "test_suite": "test_suite_id", "suite": "test_suite_id", "suite_id": "test_suite_id",
+    "is_challenged": "is_challenged", "challenged": "is_challenged",
+    **{field: field for field in CASE_FIELDS},
+}
+SUITE_HEADERS = {
+    "id": "id", "suite_id": "id", "test_suite_id": "id", "test_suite": "id", "suite": "id",
+    "db_id": "db_id",
+    **{field: field for field in SUITE_FIELDS},
+}
+
+
+class InvalidWorkbook(ValueError):
+    pass
+
+
+def _normalize(header: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(header or "").strip().lower()).strip("_")
+
+
+def _sheet_kind(title: str) -> str:
+    name = _normalize(title)
+    if "result" in name:
+        return RESULT
+    if "suite" in name:
+        return SUITE
+    if "case" in name:
+        return CASE
+    return RESULT
+
+
+def _cell(value: Any) -> Any:
+    """Convert a cell value to what the JSON upload would carry."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _columns(header_row: Tuple[Any, ...], aliases: Dict[str, str]) -> List[Optional[str]]:
+    return [aliases.get(_normalize(header)) for header in header_row]
+
+
+def iter_workbook_records(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Read an Excel workbook row by row and yield ``(kind, item)`` records like
+    iter_upload_records.
+
+    The workbook is opened in read-only mode, so rows are streamed from the
+    sheet XML instead of building the whole workbook in memory; only the
+    shared string table is loaded up front.
+
+    Each sheet's first row holds the column headers. Sheets whose name
+    mentions suites or cases hold TestSuite/TestCase rows, every other sheet
+    holds results. A results row may also carry test case columns (title,
+    area, ...), in which case the test case is created from them if it does
+    not exist yet. Case references in Excel sheets are always case_id values.
+    """
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise InvalidWorkbook(f"Invalid Excel workbook: {e}")
+
+    try:
+        for worksheet in workbook.worksheets:
+            kind = _sheet_kind(worksheet.title)
+            rows = worksheet.iter_rows(values_only=True)
+            header_row = next(rows, None)
+            if not header_row:
+                continue
+
+            if kind == RESULT:
+                result_columns = _columns(header_row, RESULT_HEADERS)
+                case_columns = _columns(header_row, CASE_HEADERS)
+            else:
+                result_columns = None
+                case_columns = _columns(header_row, CASE_HEADERS if kind == CASE else SUITE_HEADERS)
+
+            for row in rows:
+                case = {}
+                for field, value in zip(case_columns, row):
+                    value = _cell(value)
+                    if field and value is not None:
+                        case[field] = value
+                if kind != RESULT:
+                    if case:
+                        yield kind, case
+                    continue
+
+                result = {}
+                for field, value in zip(result_columns, row):
+                    value = _cell(value)
+                    if field and value is not None:
+                        result[field] = value
+                if "test_case_id" not in result:
+                    continue
+                result["test_case_id"] = str(result["test_case_id"])
+                # Result columns that are only about the case describe a test case too
+                if len(case) > 1:
+                    case["case_id"] = result["test_case_id"]
+                    yield CASE, case
+                yield RESULT, result
+    finally:
+        workbook.close()
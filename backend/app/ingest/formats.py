@@ -0,0 +1,36 @@
+from typing import Any, Iterator, Tuple
+
+from app.core.compression import file_encoding, open_decompressed, strip_compression_suffix
+from app.ingest.excel import iter_workbook_records
+from app.ingest.json_stream import iter_upload_records
+from app.ingest.ndjson import iter_ndjson_records
+
+# File extensions accepted by the upload endpoint, optionally followed by .gz or .zst
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+TEXT_EXTENSIONS = (".json",) + NDJSON_EXTENSIONS
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + (".xlsx",)
+
+
+def is_supported(filename: str) -> bool:
+    filename = filename.lower()
+    if file_encoding(filename):
+        # Workbooks are zip files already
+        return strip_compression_suffix(filename).endswith(TEXT_EXTENSIONS)
+    return filename.endswith(SUPPORTED_EXTENSIONS)
+
+
+def iter_file_records(path: str, filename: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield ``(kind, item)`` records from a spooled upload, chosen by file
+    extension. Compressed files are decompressed while they are parsed.
+    """
+    filename = filename.lower()
+    if filename.endswith(".xlsx"):
+        yield from iter_workbook_records(path)
+        return
+
+    with open_decompressed(path, filename) as f:
+        if strip_compression_suffix(filename).endswith(NDJSON_EXTENSIONS):
+            yield from iter_ndjson_records(f)
+        else:
+            yield from iter_upload_records(f)
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.init_db import engine
+from app.ingest.formats import iter_file_records
+from app.ingest.writer import UploadWriter
+from app.models.ingest_job import IngestJob
+from app.models.test_run import TestRun
+from app.reports.flakiness import flakiness_refresher
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def spool_upload(fileobj: BinaryIO, filename: str) -> Tuple[str, str]:
+    """
+    Copy an uploaded file to the spool directory, hashing it on the way.
+    Returns the spool path and the SHA-256 hex digest of the content.
+    """
+    os.makedirs(settings.INGEST_SPOOL_DIR, exist_ok=True)
+    suffix = os.path.basename(filename)
+    path = os.path.join(settings.INGEST_SPOOL_DIR, f"{uuid.uuid4().hex}_{suffix}")
+    digest = hashlib.sha256()
+    with open(path, "wb") as spool:
+        while True:
+            chunk = fileobj.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            spool.write(chunk)
+    return path, digest.hexdigest()
+
+
+def _reusable(statement):
+    """Restrict a query on IngestJob to jobs whose upload need not be repeated."""
+    return (
+        statement
+        .outerjoin(TestRun, TestRun.id == IngestJob.test_run_id)
+        .where(
+            ((IngestJob.status == COMPLETED) & (TestRun.id != None))  # noqa: E711
+            | IngestJob.status.in_([QUEUED, RUNNING])
+        )
+    )
+
+
+def find_duplicate(session: Session, content_digest: str) -> Optional[IngestJob]:
+    """
+    Job that already ingested (or is ingesting) identical content, if its test
+    run still exists. Failed jobs are never reused.
+    """
+    statement = (
+        _reusable(select(IngestJob))
+        .where(IngestJob.content_digest == content_digest)
+        .order_by(IngestJob.id.desc())
+    )
+    return session.exec(statement).first()
+
+
+def find_idempotent_job(session: Session, idempotency_key: str) -> Optional[IngestJob]:
+    """
+    Job holding an Idempotency-Key, if it is reusable in the same way as
+    find_duplicate. A failed job, or one whose test run was deleted, gives
+    the key up so the upload can be retried under it.
+    """
+    job = session.exec(select(IngestJob).where(IngestJob.idempotency_key == idempotency_key)).first()
+    if job is None:
+        return None
+    if session.exec(_reusable(select(IngestJob.id)).where(IngestJob.id == job.id)).first() is not None:
+        return job
+    job.idempotency_key = None
+    session.add(job)
+    session.commit()
+    return None
+
+
+def error_message(e: Exception) -> str:
+    """Reason recorded on a job whose upload could not be ingested."""
+    return "Invalid JSON format" if isinstance(e, json.JSONDecodeError) else str(e)
+
+
+def remove_spool(path: Optional[str]):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class IngestJobQueue:
+    """
+    Bounded queue of upload jobs processed by a fixed pool of worker threads.
+
+    The pool is separate from the threadpool serving requests, so at most
+    ``workers`` uploads are parsed and inserted at a time however many are
+    submitted, and at most ``queue_size`` wait behind them. With
+    ``workers=0`` jobs are run inline by the caller instead.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        session_factory: Callable[[], Session],
+    ):
+        self.workers = workers
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._active: Dict[int, UploadWriter] = {}
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"ingest-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self):
+        """
+        Stop the workers after their current job. Jobs still waiting stay
+        queued in the database and are picked up by resume_pending on the
+        next start.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def join(self):
+        """Block until every submitted job has been processed."""
+        self._queue.join()
+
+    def submit(self, job_id: int) -> bool:
+        """Queue a job; returns False if the queue is full."""
+        self.start()
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            return False
+        return True
+
+    def progress(self, job_id: int) -> Optional[Dict[str, int]]:
+        """Live row counters of a running job, None if it is not running here."""
+        writer = self._active.get(job_id)
+        if writer is None:
+            return None
+        return {"rows_parsed": writer.rows_parsed, "rows_inserted": writer.rows_inserted}
+
+    def resume_pending(self):
+        """Re-queue jobs left queued or running by a previous process."""
+        with self.session_factory() as session:
+            jobs = session.exec(select(IngestJob).where(IngestJob.status.in_([QUEUED, RUNNING]))).all()
+            for job in jobs:
+                if job.spool_path and os.path.exists(job.spool_path) and self.workers and self.submit(job.id):
+                    job.status = QUEUED
+                else:
+                    job.status = FAILED
+                    job.error = "Upload was interrupted before it was processed"
+                    remove_spool(job.spool_path)
+                session.add(job)
+            session.commit()
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                if job_id is None:
+                    return
+                with self.session_factory() as session:
+                    self.run_job(job_id, session)
+            except Exception as e:
+                print(f"Error running ingest job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def run_job(self, job_id: int, session: Session, records: Optional[Iterable[Tuple[str, Any]]] = None):
+        """
+        Parse a spooled upload into a new test run, recording the outcome on
+        the job. ``records`` that were already parsed elsewhere are written
+        instead of reading the spooled file.
+        """
+        job = session.get(IngestJob, job_id)
+        if job is None:
+            return
+        job.status = RUNNING
+        session.add(job)
+        session.commit()
+        spool_path = job.spool_path
+
+        writer = None
+        try:
+            test_run = TestRun(status="Completed")
+            session.add(test_run)
+            session.flush()
+            writer = UploadWriter(session, test_run.id)
+            self._active[job_id] = writer
+
+            if records is None:
+                records = iter_file_records(spool_path, job.filename)
+            for kind, item in records:
+                writer.add(kind, item)
+            writer.flush()
+
+            job.status = COMPLETED
+            job.test_run_id = test_run.id
+        except Exception as e:
+            session.rollback()
+            job = session.get(IngestJob, job_id)
+            job.status = FAILED
+            job.error = error_message(e)
+            print(f"Ingest job {job_id} failed: {e}")
+        finally:
+            self._active.pop(job_id, None)
+
+        if writer is not None:
+            job.rows_parsed = writer.rows_parsed
+            job.rows_inserted = writer.rows_inserted if job.status == COMPLETED else 0
+        job.spool_path = None
+        session.add(job)
+        session.commit()
+        remove_spool(spool_path)
+        if job.status == COMPLETED:
+            # Fold the new run into the flakiness of its test cases
+            flakiness_refresher.request()
+
+
+def ingest_workers(database_url: str, workers: int) -> int:
+    """
+    Number of workers to run. SQLite has a single writer and each job
+    writes its upload in one transaction, so a second worker would only
+    wait for the first and time out; there it runs one at most.
+    """
+    if database_url.startswith("sqlite") and workers > 1:
+        print(f"Warning: running 1 ingest worker instead of {workers}, SQLite allows one writer at a time")
+        return 1
+    return workers
+
+
+ingest_queue = IngestJobQueue(
+    workers=ingest_workers(settings.DATABASE_URL, settings.INGEST_WORKERS),
+    queue_size=settings.INGEST_QUEUE_SIZE,
+    session_factory=lambda: Session(engine),
+)
@@ -0,0 +1,250 @@
+import codecs
+import json
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+# Record kinds produced by iter_upload_records
+SUITE = "suite"
+CASE = "case"
+RESULT = "result"
+
+_WHITESPACE = " \t\n\r"
+
+
+class _StreamReader:
+    """Pull-based JSON tokenizer over a binary file object.
+
+    Only the structural characters of the enclosing object/array are handled
+    here; each array element (or other value) is decoded on its own with
+    ``json.JSONDecoder.raw_decode``, so at most one element plus one chunk is
+    held in memory at a time.
+    """
+
+    def __init__(self, fileobj: BinaryIO, chunk_size: int):
+        self._file = fileobj
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _fill(self, min_chars: int = 1) -> bool:
+        """
+        Read at least ``min_chars`` more characters into the buffer (fewer at
+        end of file). Returns False if nothing could be read.
+        """
+        if self._eof:
+            return False
+        parts = [self._buffer[self._pos:]]
+        self._pos = 0
+        read = 0
+        while read < min_chars:
+            chunk = self._file.read(self._chunk_size)
+            if not chunk:
+                self._eof = True
+                parts.append(self._decoder.decode(b"", final=True))
+                break
+            text = self._decoder.decode(chunk)
+            parts.append(text)
+            read += len(text)
+        # Dropping the consumed prefix keeps the buffer from growing with the file
+        self._buffer = "".join(parts)
+        return read > 0
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A value that runs up to the end of the buffer (e.g. a number)
+            # may continue in the next chunk, so only accept it once more
+            # input is visible or the file is exhausted.
+            if end is not None and (end < len(self._buffer) or self._eof):
+                self._pos = end
+                return value
+            if self._eof:
+                raise self._error("Invalid JSON value")
+            # Grow geometrically so a huge element is re-scanned O(log n) times
+            self._fill(len(self._buffer) - self._pos + 1)
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("Expecting ',' or ']'")
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield object keys; the caller must consume each key's value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("Expecting property name")
+            key = self.value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("Expecting ',' or '}'")
+
+    def expect_end(self):
+        if self.peek() != "":
+            raise self._error("Extra data")
+
+
+class _HeldList:
+    """
+    Items of a list held back until the end of the object, as JSON lines
+    in a temporary file that stays in memory while it is small.
+    """
+
+    def __init__(self, max_size: int):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size, mode="w+", encoding="utf-8")
+        self.empty = True
+
+    def add(self, item: Any):
+        self._file.write(json.dumps(item))
+        self._file.write("\n")
+        self.empty = False
+
+    def __iter__(self) -> Iterator[Any]:
+        self._file.seek(0)
+        for line in self._file:
+            yield json.loads(line)
+
+    def close(self):
+        self._file.close()
+
+
+def _iter_object_records(reader: _StreamReader, chunk_size: int) -> Iterator[Tuple[str, Any]]:
+    have_results = False
+    # Whether the object has test_case_results, even an empty or null one
+    results_key_present = False
+    # Candidates when test_case_results has no items: the results list, and
+    # the first non-empty list other than the suites and cases in document
+    # order; both may be the same list
+    held: Dict[str, _HeldList] = {}
+    try:
+        for key in reader.iter_object():
+            if key == "test_case_results":
+                results_key_present = True
+            if reader.peek() != "[":
+                reader.value()
+                continue
+
+            if key == "test_suites":
+                for item in reader.iter_array():
+                    yield SUITE, item
+                continue
+            if key == "test_cases":
+                for item in reader.iter_array():
+                    yield CASE, item
+                continue
+            if key == "test_case_results" and not have_results:
+                for item in reader.iter_array():
+                    have_results = True
+                    yield RESULT, item
+                continue
+
+            slots = []
+            if not have_results:
+                if key == "results" and "results" not in held:
+                    slots.append("results")
+                if "first" not in held:
+                    slots.append("first")
+            if not slots:
+                # The results are elsewhere, the items are skipped
+                for _ in reader.iter_array():
+                    pass
+                continue
+            items = _HeldList(chunk_size)
+            for item in reader.iter_array():
+                items.add(item)
+            if items.empty:
+                items.close()
+                continue
+            for slot in slots:
+                held[slot] = items
+        reader.expect_end()
+
+        if not have_results:
+            # Like the original handler: data.get("test_case_results",
+            # data.get("results", [])), else the first other non-empty list
+            items = held.get("first") if results_key_present else held.get("results", held.get("first"))
+            if items is not None:
+                for item in items:
+                    yield RESULT, item
+    finally:
+        # Closing a list held in both slots twice is harmless
+        for items in held.values():
+            items.close()
+
+
+def iter_upload_records(
+    fileobj: BinaryIO,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally parse an uploaded results document.
+
+    Yields ``(kind, item)`` pairs where kind is SUITE, CASE or RESULT.
+    Accepts the same layouts as the original upload handler: an object with
+    ``test_suites``/``test_cases`` lists and results in ``test_case_results``,
+    or in ``results`` when that key is missing, else in the first non-empty
+    list of the object other than the suites and cases; or a bare list of
+    results.
+
+    Suites, cases and ``test_case_results`` are yielded in document order.
+    Whether another list holds the results is only known at the end of the
+    object, so its items are held back until then.
+
+    Raises json.JSONDecodeError on malformed input.
+    """
+    reader = _StreamReader(fileobj, chunk_size)
+    char = reader.peek()
+
+    if char == "[":
+        for item in reader.iter_array():
+            yield RESULT, item
+        reader.expect_end()
+    elif char == "{":
+        yield from _iter_object_records(reader, chunk_size)
+    else:
+        raise json.JSONDecodeError("Expecting value", "", 0)
@@ -0,0 +1,58 @@
+import json
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, Tuple
+
+from app.ingest.json_stream import SUITE, CASE, RESULT
+
+# Values of the "type" field and the record kind they map to
+RECORD_TYPES = {
+    "suite": SUITE, "test_suite": SUITE,
+    "case": CASE, "test_case": CASE,
+    "result": RESULT, "test_case_result": RESULT,
+}
+
+
+def parse_line(line: bytes, lineno: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    Parse one NDJSON line into a ``(kind, item)`` record. Records without a
+    ``type`` field are results. Raises ValueError on a malformed line.
+    """
+    try:
+        item = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError(f"Invalid JSON on line {lineno}")
+    if not isinstance(item, dict):
+        raise ValueError(f"Expected a JSON object on line {lineno}")
+
+    record_type = item.pop("type", "result")
+    kind = RECORD_TYPES.get(str(record_type).lower())
+    if kind is None:
+        raise ValueError(f"Unknown record type '{record_type}' on line {lineno}")
+    return kind, item
+
+
+def iter_ndjson_records(fileobj: BinaryIO) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(kind, item)`` records from an NDJSON file, one line at a time."""
+    for lineno, line in enumerate(fileobj, start=1):
+        if line.strip():
+            yield parse_line(line, lineno)
+
+
+async def aiter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(kind, item)`` records from a stream of NDJSON body chunks as lines complete."""
+    pending = bytearray()
+    lineno = 0
+    async for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end < 0:
+                break
+            lineno += 1
+            line = bytes(pending[start:end])
+            start = end + 1
+            if line.strip():
+                yield parse_line(line, lineno)
+        del pending[:start]
+    if pending.strip():
+        yield parse_line(bytes(pending), lineno + 1)
@@ -0,0 +1,274 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import bindparam, column, func, insert, table as table_clause, update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.upsert import insert_ignore
+from app.ingest.json_stream import SUITE, CASE, RESULT
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_suite import TestSuite
+from app.reports.flakiness import mark_flakiness
+from app.reports.history import record_history
+from app.reports.stats import count_results
+from app.storage.logs import encode_logs, log_columns, store_logs
+
+SUITE_FIELDS = ["name", "url", "format", "version", "version_string", "is_final"]
+CASE_FIELDS = [
+    "applies_to", "description", "steps", "precondition", "area",
+    "automatability", "author", "material", "challenge_issue_url",
+]
+
+# The testsuite table without db_id, for inserts that leave it to the database
+_SUITE_TABLE = table_clause("testsuite", *[column(c.name, c.type) for c in TestSuite.__table__.columns if c.name != "db_id"])
+
+
+def _case_ref(item: Dict[str, Any]) -> Any:
+    # Handle different formats of test case ID
+    test_case_id = item.get("test_case_id")
+    if test_case_id is None:
+        test_case_id = item.get("id")
+    if not isinstance(test_case_id, (int, str)):
+        return None
+    return test_case_id
+
+
+class UploadWriter:
+    """
+    Buffer parsed upload records and write them to the database in batches.
+
+    Each batch is resolved set-wise: referenced suites and cases are
+    prefetched with one query each, missing ones are created with a single
+    multi-row insert, and all results are written with one executemany. Within
+    a batch suites are written before cases and cases before results, so
+    results can reference cases from the same batch. By default the writer
+    only flushes and committing (or rolling back) the upload is left to the
+    caller; with ``commit_batches`` every written batch is committed.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        test_run_id: int,
+        batch_size: int = settings.UPLOAD_BATCH_SIZE,
+        commit_batches: bool = False,
+    ):
+        self.session = session
+        self.test_run_id = test_run_id
+        self.batch_size = batch_size
+        self.commit_batches = commit_batches
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self._pending: Dict[str, List[Dict[str, Any]]] = {SUITE: [], CASE: [], RESULT: []}
+        self._size = 0
+
+    def add(self, kind: str, item: Any):
+        """Queue one parsed record, writing the batch once it is full."""
+        if not isinstance(item, dict):
+            return
+        self._pending[kind].append(item)
+        self._size += 1
+        self.rows_parsed += 1
+        if self._size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all queued records."""
+        # Make sure ORM objects added by the caller (the test run) exist first
+        self.session.flush()
+        self._write_suites(self._pending[SUITE])
+        self._write_cases(self._pending[CASE])
+        self._write_results(self._pending[RESULT])
+        self._pending = {SUITE: [], CASE: [], RESULT: []}
+        self._size = 0
+        if self.commit_batches:
+            self.session.commit()
+
+    def _write_suites(self, suites: List[Dict[str, Any]]):
+        by_id = {}
+        for suite_data in suites:
+            if suite_data.get("id"):
+                by_id[suite_data["id"]] = suite_data
+        if not by_id:
+            return
+
+        table = TestSuite.__table__
+        existing = {
+            row.id: row
+            for row in self.session.execute(select(table).where(table.c.id.in_(list(by_id))))
+        }
+
+        # Update fields of existing suites that differ from the uploaded data
+        updates = []
+        for suite_id, row in existing.items():
+            suite_data = by_id[suite_id]
+            values = {field: suite_data.get(field, getattr(row, field)) for field in SUITE_FIELDS}
+            if any(values[field] != getattr(row, field) for field in SUITE_FIELDS):
+                updates.append({"b_db_id": row.db_id, **values})
+        if updates:
+            self.session.execute(update(table).where(table.c.db_id == bindparam("b_db_id")), updates)
+
+        # Keep requested db_ids where they are free, the database allocates the rest
+        missing = [suite_data for suite_id, suite_data in by_id.items() if suite_id not in existing]
+        if not missing:
+            return
+        requested = [int(s["db_id"]) for s in missing if str(s.get("db_id") or "").isdigit()]
+        taken = set()
+        if requested:
+            taken = set(self.session.exec(select(TestSuite.db_id).where(TestSuite.db_id.in_(requested))))
+
+        placed_rows, allocated_rows = [], []
+        for suite_data in missing:
+            suite_id = suite_data["id"]
+            row = {
+                "id": suite_id,
+                "name": suite_data.get("name", f"Suite {suite_id}"),
+                "url": suite_data.get("url"),
+                "format": suite_data.get("format", "json"),
+                "version": suite_data.get("version", 1),
+                "version_string": suite_data.get("version_string", "1.0"),
+                "is_final": suite_data.get("is_final", False),
+            }
+            db_id = suite_data.get("db_id")
+            db_id = int(db_id) if str(db_id or "").isdigit() else None
+            if db_id is None or db_id in taken:
+                allocated_rows.append(row)
+            else:
+                taken.add(db_id)
+                placed_rows.append({"db_id": db_id, **row})
+
+        if placed_rows:
+            insert_ignore(self.session, table, placed_rows)
+            # A concurrent upload may have taken a requested db_id since it was checked
+            placed = set(self.session.execute(
+                select(table.c.db_id, table.c.id).where(table.c.db_id.in_([row["db_id"] for row in placed_rows]))
+            ).tuples())
+            for row in placed_rows:
+                if (row["db_id"], row["id"]) in placed:
+                    self.rows_inserted += 1
+                else:
+                    del row["db_id"]
+                    allocated_rows.append(row)
+        if allocated_rows:
+            # Without db_id in the statement, as its column default would insert 1
+            self.session.execute(insert(_SUITE_TABLE), allocated_rows)
+            self.rows_inserted += len(allocated_rows)
+
+    def _lookup_cases(self, case_ids: Iterable[str]) -> Dict[str, int]:
+        """Map case_id to the oldest TestCase.id with that case_id."""
+        case_ids = list(case_ids)
+        if not case_ids:
+            return {}
+        statement = (
+            select(TestCase.case_id, func.min(TestCase.id))
+            .where(TestCase.case_id.in_(case_ids))
+            .group_by(TestCase.case_id)
+        )
+        return {case_id: id for case_id, id in self.session.exec(statement)}
+
+    def _insert_cases(self, new_cases: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """Create the given test cases and return their ids by case_id."""
+        if not new_cases:
+            return {}
+        rows = []
+        for case_id, case_data in new_cases.items():
+            row = {
+                "case_id": case_id,
+                "title": case_data.get("title", f"Test Case {case_id}"),
+                "version": case_data.get("version", 1),
+                "version_string": case_data.get("version_string", "1.0"),
+                "test_suite_id": case_data.get("test_suite_id", "default"),
+                "is_challenged": case_data.get("is_challenged", False),
+            }
+            for field in CASE_FIELDS:
+                row[field] = case_data.get(field)
+            rows.append(row)
+        # case_id is not unique, versions of a case share it, so there is no
+        # conflict to ignore: every row is inserted and the oldest row of a
+        # case_id is the one uploads resolve to
+        self.session.execute(insert(TestCase.__table__), rows)
+        self.rows_inserted += len(rows)
+        return self._lookup_cases(new_cases)
+
+    def _write_cases(self, cases: List[Dict[str, Any]]):
+        by_case_id = {}
+        for case_data in cases:
+            case_id = case_data.get("case_id")
+            if case_id and str(case_id) not in by_case_id:
+                by_case_id[str(case_id)] = case_data
+        if not by_case_id:
+            return
+
+        # Existing test cases are left untouched
+        existing = self._lookup_cases(by_case_id)
+        self._insert_cases({
+            case_id: case_data for case_id, case_data in by_case_id.items() if case_id not in existing
+        })
+
+    def _resolve_cases(self, items: List[Dict[str, Any]]) -> Dict[Any, int]:
+        """Map every result's test case reference to a TestCase.id."""
+        refs = {_case_ref(item) for item in items}
+        refs.discard(None)
+
+        # Integer references are database ids when such a row exists
+        resolved = {}
+        int_refs = [ref for ref in refs if isinstance(ref, int) and not isinstance(ref, bool)]
+        if int_refs:
+            found = set(self.session.exec(select(TestCase.id).where(TestCase.id.in_(int_refs))))
+            resolved = {ref: ref for ref in int_refs if ref in found}
+
+        # Everything else is looked up (and if needed created) by case_id
+        unresolved = [ref for ref in refs if ref not in resolved]
+        ids = self._lookup_cases({str(ref) for ref in unresolved})
+        placeholders = {}
+        for item in items:
+            ref = _case_ref(item)
+            if ref is None or ref in resolved:
+                continue
+            case_id = str(ref)
+            if case_id not in ids and case_id not in placeholders:
+                placeholders[case_id] = {"title": item.get("title", f"Test Case {ref}")}
+        ids.update(self._insert_cases(placeholders))
+
+        for ref in unresolved:
+            if str(ref) in ids:
+                resolved[ref] = ids[str(ref)]
+        return resolved
+
+    def _write_results(self, items: List[Dict[str, Any]]):
+        items = [item for item in items if _case_ref(item)]
+        if not items:
+            return
+
+        case_ids = self._resolve_cases(items)
+        items = [item for item in items if case_ids.get(_case_ref(item)) is not None]
+        logs = [encode_logs(item.get("logs")) for item in items]
+        log_ids = store_logs(self.session, logs)
+        rows = []
+        now = datetime.utcnow()
+        for item, data in zip(items, logs):
+            test_case_id = case_ids[_case_ref(item)]
+
+            # Handle different formats of result
+            result = item.get("result")
+            if result is None:
+                result = item.get("status", "Unknown")
+
+            rows.append({
+                "test_case_id": test_case_id,
+                "test_run_id": self.test_run_id,
+                "result": result,
+                "comment": item.get("comment", ""),
+                "artifacts": item.get("artifacts", ""),
+                "created_at": now,
+                **log_columns(data, log_ids),
+            })
+        if rows:
+            self.session.execute(insert(TestCaseResult.__table__), rows)
+            written = [(row["test_run_id"], row["test_case_id"], row["result"], now) for row in rows]
+            count_results(self.session, written)
+            record_history(self.session, written)
+            mark_flakiness(self.session, written)
+            self.rows_inserted += len(rows)
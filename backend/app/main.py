@@ -2,8 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.db.init_db import create_db_and_tables
+from app.ingest.archive import parse_pool
+from app.ingest.jobs import ingest_queue
+from app.reports.flakiness import flakiness_refresher
 
 app = FastAPI(
     title="QA Database API",
@@ -18,6 +23,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+)
+
+# Decode compressed uploads and compress responses
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MINIMUM_SIZE,
 )
 
 # Include API router
@@ -26,6 +38,14 @@ app.include_router(api_router, prefix="/api")
 @app.on_event("startup")
 async def on_startup():
     create_db_and_tables()
+    ingest_queue.resume_pending()
+    flakiness_refresher.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    ingest_queue.shutdown()
+    flakiness_refresher.shutdown()
+    parse_pool.shutdown()
 
 @app.get("/")
 async def root():
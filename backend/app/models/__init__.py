@@ -8,7 +8,14 @@ SQLModel.metadata
 from app.models.test_suite import TestSuite, TestSuiteCreate, TestSuiteRead, TestSuiteUpdate
 from app.models.test_case import TestCase, TestCaseCreate, TestCaseRead, TestCaseUpdate
 from app.models.test_run import TestRun, TestRunCreate, TestRunRead, TestRunUpdate
-from app.models.test_case_result import TestCaseResult, TestCaseResultCreate, TestCaseResultRead, TestCaseResultUpdate
+from app.models.test_case_result import TestCaseResult, TestCaseResultCreate, TestCaseResultRead, TestCaseResultUpdate, TestCaseResultMatch
+from app.models.test_run_stats import TestRunStats
+from app.models.test_run_summary import TestRunSummary, GroupSummary, ResultCounts
+from app.models.result_trend import ResultTrend, ResultTrendPoint
+from app.models.test_run_diff import TestRunDiff, TestRunDiffEntry, DiffCounts
+from app.models.test_case_flakiness import TestCaseFlakiness, TestCaseFlakinessPending, TestCaseFlakinessRead
+from app.models.test_case_history import TestCaseHistory, TestCaseHistoryEntry
+from app.models.test_case_log import TestCaseLog, TestCaseLogChunk
 from app.models.test_operator import TestOperator, TestOperatorCreate, TestOperatorRead, TestOperatorUpdate
 from app.models.company import Company, CompanyCreate, CompanyRead, CompanyUpdate
 from app.models.test_run_template import TestRunTemplate, TestRunTemplateCreate, TestRunTemplateRead, TestRunTemplateUpdate
@@ -16,3 +23,5 @@ from app.models.dut import DUT, DUTCreate, DUTRead, DUTUpdate
 from app.models.capability import Capability, CapabilityCreate, CapabilityRead, CapabilityUpdate
 from app.models.specification import Specification, SpecificationCreate, SpecificationRead, SpecificationUpdate
 from app.models.requirement import Requirement, RequirementCreate, RequirementRead, RequirementUpdate
+from app.models.ingest_job import IngestJob, IngestJobRead
+from app.models.artifact import Artifact, ArtifactRead, TestCaseResultArtifact, TestCaseResultArtifactRead
@@ -0,0 +1,35 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class ArtifactBase(SQLModel):
+    digest: str = Field(sa_column_kwargs={"unique": True})  # SHA-256 of the content, also its name in the artifact store
+    size: int  # Size in bytes
+    content_type: Optional[str] = None  # MIME type given when first uploaded
+
+
+class Artifact(ArtifactBase, table=True):
+    __tablename__ = "artifact"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True)
+
+
+class ArtifactRead(ArtifactBase):
+    id: int
+
+
+class TestCaseResultArtifact(SQLModel, table=True):
+    __tablename__ = "testcaseresult_artifact"
+    test_case_result_id: int = Field(foreign_key="testcaseresult.id", primary_key=True)  # Result the file is evidence for
+    filename: str = Field(primary_key=True)  # Name of the file within the result
+    artifact_id: int = Field(foreign_key="artifact.id", index=True)  # Stored content, shared by identical files
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True)
+
+
+class TestCaseResultArtifactRead(SQLModel):
+    test_case_result_id: int
+    filename: str
+    digest: str
+    size: int
+    content_type: Optional[str] = None
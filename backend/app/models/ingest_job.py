@@ -0,0 +1,28 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class IngestJobBase(SQLModel):
+    status: str = "queued"  # queued, running, completed or failed
+    filename: str  # Name of the uploaded file
+    rows_parsed: int = 0  # Records read from the upload so far
+    rows_inserted: int = 0  # Rows written to the database so far
+    error: Optional[str] = None  # Reason the job failed
+    test_run_id: Optional[int] = Field(default=None, foreign_key="testrun.id")  # Test run created by the job
+    content_digest: Optional[str] = Field(default=None, index=True)  # SHA-256 of the uploaded bytes
+
+
+class IngestJob(IngestJobBase, table=True):
+    __tablename__ = "ingestjob"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    spool_path: Optional[str] = None  # Spooled upload on local disk, removed once processed
+    idempotency_key: Optional[str] = Field(default=None, sa_column_kwargs={"unique": True})  # Idempotency-Key header of the upload
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True)
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True, sa_column_kwargs={"onupdate": datetime.utcnow})
+
+
+class IngestJobRead(IngestJobBase):
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
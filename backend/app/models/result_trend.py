@@ -0,0 +1,27 @@
+from typing import Optional
+from datetime import date
+from sqlmodel import Field, SQLModel
+
+from app.models.test_run_summary import ResultCounts
+
+
+class ResultTrend(SQLModel, table=True):
+    """
+    Result counts per day or week by suite, area and result value, kept by
+    app.reports.trends along with the run statistics. Results count in the
+    bucket of their run's creation time. Trend queries read a range of
+    these rows instead of the results.
+    """
+    __tablename__ = "result_trend"
+    period: str = Field(primary_key=True)  # day or week
+    bucket: date = Field(primary_key=True)  # First day of the bucket, Mondays for weeks (UTC)
+    test_suite_id: str = Field(default="", primary_key=True)  # Suite of the test cases, "" when unknown
+    area: str = Field(default="", primary_key=True)  # Area of the test cases, "" when not set
+    result: str = Field(primary_key=True)  # Result value as stored
+    count: int = 0  # Number of results
+
+
+class ResultTrendPoint(ResultCounts):
+    bucket: date
+    test_suite_id: Optional[str] = None  # Only set when grouped by test_suite_id
+    area: Optional[str] = None  # Only set when grouped by area
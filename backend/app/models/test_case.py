@@ -1,12 +1,20 @@
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index, event
+from sqlalchemy.orm import declared_attr, deferred
 from sqlmodel import Field, SQLModel, Relationship
 
+from app.db.search import TEST_CASE_INDEX, full_text_ddl
+
 if TYPE_CHECKING:
     from app.models.test_suite import TestSuite
     from app.models.test_case_result import TestCaseResult
     from app.models.test_run_template import TestRunTemplate
 
 
+# Large text columns, loaded only when accessed or with undefer_group("text")
+TEXT_COLUMNS = ("description", "steps", "precondition", "material")
+
+
 class TestCaseBase(SQLModel):
     title: str  # Title of the test case
     version: int  # Numeric version
@@ -26,6 +34,13 @@ class TestCaseBase(SQLModel):
 
 
 class TestCase(TestCaseBase, table=True):
+    __table_args__ = (
+        # Finds the oldest version of a case_id, used by listings and uploads
+        Index("ix_testcase_case_id_id", "case_id", "id"),
+        # Versions of a case, and the catalogue filtered by suite
+        Index("ix_testcase_case_id_version", "case_id", "version"),
+        Index("ix_testcase_test_suite_id", "test_suite_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)  # Database primary key
     test_suite: "TestSuite" = Relationship(back_populates="test_cases")
     test_case_results: List["TestCaseResult"] = Relationship(back_populates="test_case")
@@ -34,6 +49,15 @@ class TestCase(TestCaseBase, table=True):
         sa_relationship_kwargs={"secondary": "testruntemplate_testcase", "overlaps": "test_cases"}
     )
 
+    @declared_attr
+    def __mapper_args__(cls):
+        return {"properties": {name: deferred(cls.__table__.c[name], group="text") for name in TEXT_COLUMNS}}
+
+
+# Full-text index over title, area, description, steps and precondition
+for ddl in full_text_ddl("testcase", TEST_CASE_INDEX):
+    event.listen(TestCase.__table__, "after_create", ddl)
+
 
 class TestCaseCreate(TestCaseBase):
     pass
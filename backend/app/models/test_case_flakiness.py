@@ -0,0 +1,48 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class TestCaseFlakinessBase(SQLModel):
+    test_case_id: int = Field(foreign_key="testcase.id", primary_key=True)
+    outcomes: str = ""  # Outcomes in the latest runs of the case, oldest first: P passed, F failed, O other
+    runs: int = 0  # Runs in the window, the length of outcomes
+    failures: int = 0  # Failed runs in the window
+    flips: int = 0  # Changes between passed and failed from one run to the next, other outcomes are skipped
+    failure_rate: float = 0.0  # failures / runs
+    flip_rate: float = 0.0  # flips / possible flips between the passed and failed runs
+    last_test_run_id: Optional[int] = None  # Run of the newest outcome
+    last_result_id: int = 0  # Newest result in the window
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True)
+
+
+class TestCaseFlakiness(TestCaseFlakinessBase, table=True):
+    """
+    Flakiness of a test case over a sliding window of its latest runs,
+    refreshed incrementally by app.reports.flakiness as results arrive.
+    """
+    __tablename__ = "testcase_flakiness"
+    __table_args__ = (
+        # Flakiest cases first
+        Index("ix_testcase_flakiness_flip_rate", "flip_rate"),
+    )
+
+
+class TestCaseFlakinessPending(SQLModel, table=True):
+    """
+    Test cases whose results changed since the last flakiness refresh,
+    written in the same transaction as the results. A refresh removes the
+    rows it has read by version, so changes committed meanwhile are kept
+    for the next one whatever the order their ids were handed out in.
+    """
+    __tablename__ = "testcase_flakiness_pending"
+    test_case_id: int = Field(primary_key=True)
+    test_run_id: int  # Earliest run with a changed result, the outcomes of older runs stay as they are
+    version: int = 1  # Incremented by every change
+
+
+class TestCaseFlakinessRead(TestCaseFlakinessBase):
+    case_id: Optional[str] = None
+    title: Optional[str] = None
+    test_suite_id: Optional[str] = None
@@ -0,0 +1,24 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class TestCaseHistory(SQLModel, table=True):
+    """
+    Outcomes of the latest runs of a test case, kept by app.reports.history
+    in the same transaction as the results, so sparklines for many cases are
+    read from one row each.
+    """
+    __tablename__ = "testcase_history"
+    test_case_id: int = Field(foreign_key="testcase.id", primary_key=True)
+    outcomes: str = ""  # Latest outcomes, oldest first and at most HISTORY_OUTCOMES: P passed, F failed, O other
+    last_test_run_id: Optional[int] = None  # Run of the newest outcome
+    last_result_at: Optional[datetime] = None  # When the newest result was recorded
+
+
+class TestCaseHistoryEntry(SQLModel):
+    id: int  # Id of the result
+    test_run_id: int
+    created_at: Optional[datetime] = None
+    result: str
+    comment: Optional[str] = None  # Start of the comment, at most HISTORY_COMMENT_LENGTH characters
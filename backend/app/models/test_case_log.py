@@ -0,0 +1,27 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Column, LargeBinary, event
+from sqlmodel import Field, SQLModel
+
+from app.db.search import log_index_ddl
+
+
+class TestCaseLog(SQLModel, table=True):
+    __tablename__ = "testcaselog"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    digest: str = Field(sa_column_kwargs={"unique": True})  # SHA-256 of the uncompressed log, identical logs are stored once
+    size: int  # Uncompressed size in bytes
+    chunk_size: int  # Uncompressed bytes per chunk, the last chunk may be shorter
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True)
+
+
+# Full-text index over the uncompressed logs, filled in by store_logs
+for ddl in log_index_ddl():
+    event.listen(TestCaseLog.__table__, "after_create", ddl)
+
+
+class TestCaseLogChunk(SQLModel, table=True):
+    __tablename__ = "testcaselogchunk"
+    log_id: int = Field(foreign_key="testcaselog.id", primary_key=True)  # Log the chunk belongs to
+    seq: int = Field(primary_key=True)  # Position of the chunk, covering bytes seq * chunk_size onwards
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # zstd compressed chunk
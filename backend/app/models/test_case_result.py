@@ -1,14 +1,22 @@
 from typing import Optional, TYPE_CHECKING
+from datetime import datetime
+from sqlalchemy import Index, event
+from sqlalchemy.orm import declared_attr, deferred
 from sqlmodel import Field, SQLModel, Relationship
 
+from app.db.search import RESULT_COMMENT_INDEX, full_text_ddl
+
 if TYPE_CHECKING:
     from app.models.test_case import TestCase
     from app.models.test_run import TestRun
 
 
+# Large text columns, loaded only when accessed or with undefer_group("text")
+TEXT_COLUMNS = ("comment", "artifacts")
+
+
 class TestCaseResultBase(SQLModel):
     result: str  # Outcome of the test case (pass/fail)
-    logs: Optional[str] = None  # Test run logs
     comment: Optional[str] = None  # Comments on the result
     artifacts: Optional[str] = None  # Related files or evidence of the test run
     test_case_id: int = Field(foreign_key="testcase.id")  # Foreign key linking to the TestCase table
@@ -16,17 +24,50 @@ class TestCaseResultBase(SQLModel):
 
 
 class TestCaseResult(TestCaseResultBase, table=True):
+    __table_args__ = (
+        # Results of a run in id order, for paging through large runs
+        Index("ix_testcaseresult_test_run_id_id", "test_run_id", "id"),
+        # History of a test case across runs; covers the timeline, which reads
+        # the table only for the comments of a page
+        Index("ix_testcaseresult_history", "test_case_id", "test_run_id", "id", "result", "created_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
+    log_id: Optional[int] = Field(default=None, foreign_key="testcaselog.id", index=True)  # Compressed logs, stored out of row in testcaselog
+    logs_size: int = 0  # Uncompressed size of the logs in bytes
+    logs_digest: Optional[str] = None  # SHA-256 of the logs
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow, nullable=True)  # When the result was recorded
     test_case: "TestCase" = Relationship(back_populates="test_case_results")
     test_run: "TestRun" = Relationship(back_populates="test_case_results")
 
+    @declared_attr
+    def __mapper_args__(cls):
+        return {"properties": {name: deferred(cls.__table__.c[name], group="text") for name in TEXT_COLUMNS}}
+
+
+# Full-text index over the comments
+for ddl in full_text_ddl("testcaseresult", RESULT_COMMENT_INDEX):
+    event.listen(TestCaseResult.__table__, "after_create", ddl)
+
 
 class TestCaseResultCreate(TestCaseResultBase):
-    pass
+    logs: Optional[str] = None  # Test run logs
 
 
 class TestCaseResultRead(TestCaseResultBase):
     id: int
+    logs_size: int = 0
+    logs_digest: Optional[str] = None
+    created_at: Optional[datetime] = None
+    logs: Optional[str] = None  # Only filled in when a single result is read, or with logs=true
+
+
+class TestCaseResultMatch(SQLModel):
+    id: int
+    test_run_id: int
+    test_case_id: int
+    result: str
+    comment_snippet: Optional[str] = None  # Matching part of the comment, matches wrapped in <mark>
+    logs_snippet: Optional[str] = None  # First matching log line, matches wrapped in <mark>
 
 
 class TestCaseResultUpdate(SQLModel):
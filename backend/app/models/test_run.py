@@ -36,6 +36,7 @@ class TestRunRead(TestRunBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     test_case_results: List[Any] = []  # Use Any to avoid circular import issues
+    stats: Optional[Any] = None  # ResultCounts of the run, filled in by the run list
 
     @validator('created_at', 'updated_at', pre=True)
     def default_datetime(cls, value):
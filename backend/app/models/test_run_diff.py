@@ -0,0 +1,28 @@
+from typing import List, Optional
+from sqlmodel import Field, SQLModel
+
+
+class DiffCounts(SQLModel):
+    newly_failing: int = 0  # Failing now, not failing in the baseline
+    newly_passing: int = 0  # Passing now, not passing in the baseline
+    still_failing: int = 0  # Failing now and in the baseline
+    added: int = 0  # Only in the compared run
+    removed: int = 0  # Only in the baseline
+    unchanged: int = 0  # Every other case, e.g. passing in both
+
+
+class TestRunDiffEntry(SQLModel):
+    test_case_id: int
+    case_id: Optional[str] = None
+    title: Optional[str] = None
+    status: str  # newly_failing, newly_passing, still_failing, added, removed or unchanged
+    base_result: Optional[str] = None  # Result in the baseline, None when added
+    base_test_run_id: Optional[int] = None  # Baseline run the result comes from
+    result: Optional[str] = None  # Result in the compared run, None when removed
+
+
+class TestRunDiff(SQLModel):
+    test_run_id: int  # Run compared against the baseline
+    base_test_run_ids: List[int] = Field(default_factory=list)  # Runs making up the baseline, newest first
+    counts: DiffCounts = Field(default_factory=DiffCounts)
+    entries: List[TestRunDiffEntry] = Field(default_factory=list)  # One page of cases, in test case id order
@@ -0,0 +1,19 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class TestRunStats(SQLModel, table=True):
+    """
+    Result counts of a run by suite, area and result value, maintained by
+    app.reports.stats as results are written. Summaries read these few rows
+    per run instead of counting the results.
+    """
+    __tablename__ = "testrun_stats"
+    test_run_id: int = Field(foreign_key="testrun.id", primary_key=True)
+    test_suite_id: str = Field(default="", primary_key=True)  # Suite of the test cases, "" when unknown
+    area: str = Field(default="", primary_key=True)  # Area of the test cases, "" when not set
+    result: str = Field(primary_key=True)  # Result value as stored
+    count: int = 0  # Number of results
+    first_result_at: Optional[datetime] = None  # When the first of these results was recorded
+    last_result_at: Optional[datetime] = None  # When the last of these results was recorded
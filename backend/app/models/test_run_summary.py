@@ -0,0 +1,24 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class ResultCounts(SQLModel):
+    total: int = 0  # Number of results
+    passed: int = 0  # Results recorded as pass/passed
+    failed: int = 0  # Results recorded as fail/failed
+    other: int = 0  # Every other result value (blocked, skipped, ...)
+    pass_rate: Optional[float] = None  # passed / total, None without results
+
+
+class GroupSummary(ResultCounts):
+    key: Optional[str] = None  # Test suite id or area, None for results without one
+
+
+class TestRunSummary(ResultCounts):
+    test_run_id: int
+    first_result_at: Optional[datetime] = None  # When the first result of the run was recorded
+    last_result_at: Optional[datetime] = None  # When the last result of the run was recorded
+    by_result: Dict[str, int] = Field(default_factory=dict)  # Counts per result value as stored
+    by_suite: List[GroupSummary] = Field(default_factory=list)
+    by_area: List[GroupSummary] = Field(default_factory=list)
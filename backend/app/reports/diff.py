@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, literal, null, union_all
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.models.test_run_diff import TestRunDiff, TestRunDiffEntry
+from app.models.test_run_stats import TestRunStats
+from app.reports.summary import outcome
+
+DIFF_STATUSES = ["newly_failing", "newly_passing", "still_failing", "added", "removed", "unchanged"]
+
+# Statuses listed when none are asked for: everything but the unchanged cases
+CHANGE_STATUSES = [status for status in DIFF_STATUSES if status != "unchanged"]
+
+
+def outcome_values(session: Session, test_run_ids: List[int]) -> Tuple[List[str], List[str]]:
+    """
+    The result values stored in the given runs that count as passed and as
+    failed, read from the run statistics. Comparing results against these
+    exact values is much cheaper for the database than normalising every
+    result on the fly.
+    """
+    values = session.exec(select(TestRunStats.result).where(TestRunStats.test_run_id.in_(test_run_ids)).distinct())
+    passed, failed = [], []
+    for value in values:
+        {"passed": passed, "failed": failed}.get(outcome(value), []).append(value)
+    return passed, failed
+
+
+def _latest_result_id(test_case_id, test_run_ids: List[int]):
+    """
+    Id of the latest result of a test case over the given runs: of the
+    newest run, and of those the last written. A lookup in the
+    (test_case_id, test_run_id) index.
+    """
+    return (
+        select(TestCaseResult.id)
+        .where(TestCaseResult.test_case_id == test_case_id, TestCaseResult.test_run_id.in_(test_run_ids))
+        .order_by(TestCaseResult.test_run_id.desc(), TestCaseResult.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _diff_selects(test_run_id: int, base_test_run_ids: List[int], passed: List[str], failed: List[str]):
+    """
+    The two halves of a diff, selecting test_case_id, base_result,
+    base_test_run_id, result and status: the run's results joined on
+    test_case_id to the latest baseline result of the same case, and the
+    baseline cases the run has no result for. Both are found with index
+    lookups per case, so nothing needs sorting.
+    """
+    current = aliased(TestCaseResult, name="current")
+    base = aliased(TestCaseResult, name="base")
+    status = case(
+        (base.id == None, "added"),  # noqa: E711
+        (and_(current.result.in_(failed), base.result.in_(failed)), "still_failing"),
+        (current.result.in_(failed), "newly_failing"),
+        (and_(current.result.in_(passed), base.result.not_in(passed)), "newly_passing"),
+        else_="unchanged",
+    )
+    in_run = (
+        select(
+            current.test_case_id,
+            base.result.label("base_result"),
+            base.test_run_id.label("base_test_run_id"),
+            current.result,
+            status.label("status"),
+        )
+        .outerjoin(base, base.id == _latest_result_id(current.test_case_id, base_test_run_ids))
+        .where(
+            current.test_run_id == test_run_id,
+            current.id == _latest_result_id(current.test_case_id, [test_run_id]),
+        )
+    )
+    others = aliased(TestCaseResult, name="others")
+    removed = (
+        select(
+            base.test_case_id,
+            base.result.label("base_result"),
+            base.test_run_id.label("base_test_run_id"),
+            null().label("result"),
+            literal("removed").label("status"),
+        )
+        .where(
+            base.test_run_id.in_(base_test_run_ids),
+            ~select(others.id).where(others.test_case_id == base.test_case_id, others.test_run_id == test_run_id).exists(),
+            base.id == _latest_result_id(base.test_case_id, base_test_run_ids),
+        )
+    )
+    return in_run, removed, status
+
+
+def baseline_runs(session: Session, test_run_id: int, last: int) -> List[int]:
+    """Ids of the ``last`` runs before the given one, newest first."""
+    statement = select(TestRun.id).where(TestRun.id < test_run_id).order_by(TestRun.id.desc()).limit(last)
+    return list(session.exec(statement))
+
+
+def diff_runs(
+    session: Session,
+    test_run_id: int,
+    base_test_run_ids: List[int],
+    statuses: Optional[List[str]] = None,
+    after: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> TestRunDiff:
+    """
+    Compare a run with a baseline of one or more runs, case by case. The
+    database classifies every case and returns the counts per status in one
+    grouped query, and a page of the cases with the given statuses, after
+    test case id ``after``, in another; the results themselves never leave it.
+    """
+    diff = TestRunDiff(test_run_id=test_run_id, base_test_run_ids=base_test_run_ids)
+    # Without a baseline run every case of the run is added
+    base_test_run_ids = base_test_run_ids or [-1]
+    passed, failed = outcome_values(session, [test_run_id, *base_test_run_ids])
+    in_run, removed, status = _diff_selects(test_run_id, base_test_run_ids, passed, failed)
+
+    classified = union_all(in_run, removed).subquery("diff")
+    for name, count in session.exec(select(classified.c.status, func.count()).group_by(classified.c.status)):
+        setattr(diff.counts, name, count)
+
+    # The statuses asked for are filtered in each half, before the page is cut
+    statuses = statuses or CHANGE_STATUSES
+    in_run = in_run.where(status.in_(statuses))
+    removed = removed.where(literal("removed").in_(statuses))
+    if after is not None:
+        in_run = in_run.where(in_run.selected_columns.test_case_id > after)
+        removed = removed.where(removed.selected_columns.test_case_id > after)
+    page = union_all(in_run, removed).order_by("test_case_id").offset(skip).limit(limit)
+    rows = session.exec(page).all()
+
+    # Case ids and titles of the page only
+    names: Dict[int, Dict] = {}
+    if rows:
+        statement = select(TestCase.id, TestCase.case_id, TestCase.title).where(
+            TestCase.id.in_([row.test_case_id for row in rows])
+        )
+        names = {id: {"case_id": case_id, "title": title} for id, case_id, title in session.exec(statement)}
+    diff.entries = [TestRunDiffEntry(**row._mapping, **names.get(row.test_case_id, {})) for row in rows]
+    return diff
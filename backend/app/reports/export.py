@@ -0,0 +1,212 @@
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, LargeBinary, type_coerce
+from sqlalchemy.types import NullType
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.models.test_run_stats import TestRunStats
+from app.storage.logs import read_logs_by_id
+
+# Tables that can be exported, by the name used in URLs and on the command line
+EXPORT_TABLES = {"test_runs": TestRun, "test_cases": TestCase, "test_case_results": TestCaseResult}
+
+EXPORT_FORMATS = {
+    # Compressed, for storage and for tools that read Parquet
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    # Arrow IPC file (Feather v2), uncompressed so readers can memory-map it without copying
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+
+def arrow_type(column) -> pa.DataType:
+    """Arrow type of a table column; anything not numeric, boolean or temporal is a string."""
+    for sql_type, type_ in [
+        (Boolean, pa.bool_()),
+        (Integer, pa.int64()),
+        (Float, pa.float64()),
+        (DateTime, pa.timestamp("us")),
+        (Date, pa.date32()),
+        (LargeBinary, pa.binary()),
+    ]:
+        if isinstance(column.type, sql_type):
+            return type_
+    return pa.string()
+
+
+def export_columns(table: str):
+    """Columns of an exported table, id first."""
+    columns = list(EXPORT_TABLES[table].__table__.columns)
+    return sorted(columns, key=lambda column: column.name != "id")
+
+
+def export_schema(table: str, logs: bool = False) -> pa.Schema:
+    fields = [pa.field(column.name, arrow_type(column), nullable=not column.primary_key) for column in export_columns(table)]
+    if logs and table == "test_case_results":
+        fields.append(pa.field("logs", pa.string()))
+    return pa.schema(fields)
+
+
+def export_statement(
+    table: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    test_suite_id: Optional[str] = None,
+):
+    """
+    The rows of a table to export, in id order. Runs and results are
+    filtered by the creation time of the run, cases and results by the
+    suite of the test case; runs are in a suite when they have results in it.
+    """
+    model = EXPORT_TABLES[table]
+    # Untyped columns skip SQLAlchemy's conversion of each value, Arrow converts whole columns instead
+    statement = select(*[type_coerce(column, NullType()).label(column.name) for column in export_columns(table)])
+    if table == "test_case_results":
+        if since is not None or until is not None:
+            statement = statement.join(TestRun, TestRun.id == TestCaseResult.test_run_id)
+        if test_suite_id is not None:
+            statement = statement.join(TestCase, TestCase.id == TestCaseResult.test_case_id)
+    if model in (TestRun, TestCaseResult):
+        if since is not None:
+            statement = statement.where(TestRun.created_at >= since)
+        if until is not None:
+            statement = statement.where(TestRun.created_at < until)
+    if test_suite_id is not None:
+        if model is TestRun:
+            in_suite = select(TestRunStats.test_run_id).where(TestRunStats.test_suite_id == test_suite_id)
+            statement = statement.where(TestRun.id.in_(in_suite))
+        else:
+            statement = statement.where(TestCase.test_suite_id == test_suite_id)
+    return statement.order_by(model.id)
+
+
+def _logs_of(session: Session, log_ids: List[Optional[int]]) -> List[Optional[str]]:
+    """Full logs for a batch of log ids, aligned with them."""
+    logs = read_logs_by_id(session, log_ids)
+    return [logs.get(log_id) if log_id is not None else None for log_id in log_ids]
+
+
+def _array(values: List[Any], type_: pa.DataType) -> pa.Array:
+    """
+    Arrow array of raw database values. Timestamps, dates and booleans come
+    as strings or integers from some drivers (SQLite) and as Python objects
+    from others, so their type is inferred and then cast.
+    """
+    if pa.types.is_temporal(type_) or pa.types.is_boolean(type_):
+        return pa.array(values).cast(type_)
+    return pa.array(values, type=type_)
+
+
+def iter_export_batches(session: Session, table: str, schema: pa.Schema, batch_size: int, **filters) -> Iterator[pa.RecordBatch]:
+    """
+    Record batches of ``batch_size`` rows, converted column by column from
+    the rows of one streaming query: the database cursor is read a batch at
+    a time, so memory holds a single batch however large the export is.
+    """
+    statement = export_statement(table, **filters)
+    result = session.connection().execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    names = [column.name for column in export_columns(table)]
+    with_logs = "logs" in schema.names
+    for rows in result.partitions():
+        columns = [list(values) for values in zip(*rows)]
+        if with_logs:
+            columns.append(_logs_of(session, columns[names.index("log_id")]))
+        yield pa.record_batch([_array(values, field.type) for values, field in zip(columns, schema)], schema=schema)
+
+
+class _Writer:
+    """Writes record batches as Parquet row groups or as Arrow IPC file batches."""
+
+    def __init__(self, sink: Any, schema: pa.Schema, format: str):
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(sink, schema, compression=settings.EXPORT_PARQUET_COMPRESSION)
+        else:
+            self._writer = pa.ipc.new_file(sink, schema)
+
+    def write(self, batch: pa.RecordBatch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+
+def write_export(
+    session: Session,
+    sink: Any,
+    table: str,
+    format: str = "parquet",
+    logs: bool = False,
+    batch_size: Optional[int] = None,
+    **filters,
+) -> int:
+    """Export a table to a path or writable file and return the number of rows written."""
+    schema = export_schema(table, logs)
+    batch_size = batch_size or (settings.EXPORT_LOGS_BATCH_SIZE if logs else settings.EXPORT_BATCH_SIZE)
+    writer = _Writer(sink, schema, format)
+    rows = 0
+    try:
+        for batch in iter_export_batches(session, table, schema, batch_size, **filters):
+            writer.write(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+class _Pending:
+    """Write-only file collecting what a writer wrote since it was last taken."""
+
+    def __init__(self):
+        self.closed = False
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def stream_export(bind, table: str, format: str = "parquet", logs: bool = False, **filters) -> Iterator[bytes]:
+    """
+    The export file in parts for a streamed response, one part per batch,
+    read on a session of its own as the request session may be closed
+    before the response has been sent.
+    """
+    with Session(bind) as session:
+        schema = export_schema(table, logs)
+        batch_size = settings.EXPORT_LOGS_BATCH_SIZE if logs else settings.EXPORT_BATCH_SIZE
+        sink = _Pending()
+        writer = _Writer(pa.PythonFile(sink, mode="w"), schema, format)
+        for batch in iter_export_batches(session, table, schema, batch_size, **filters):
+            writer.write(batch)
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+
+
+def export_filename(table: str, format: str) -> Tuple[str, str]:
+    """Media type and file name of an export."""
+    media_type, extension = EXPORT_FORMATS[format]
+    return media_type, f"{table}.{extension}"
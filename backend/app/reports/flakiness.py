@@ -0,0 +1,249 @@
+import threading
+from datetime import datetime
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, tuple_
+from sqlmodel import Session, select
+
+from app.api.pagination import iter_pages
+from app.core.config import settings
+from app.db.init_db import engine
+from app.db.upsert import upsert
+from app.models.test_case import TestCase
+from app.models.test_case_flakiness import TestCaseFlakiness, TestCaseFlakinessPending
+from app.models.test_case_result import TestCaseResult
+from app.reports.history import add_outcomes, latest_results
+from app.reports.stats import CountedResult
+
+FLAKINESS_COLUMNS = [
+    "test_case_id", "outcomes", "runs", "failures", "flips", "failure_rate", "flip_rate",
+    "last_test_run_id", "last_result_id", "updated_at",
+]
+
+
+def flakiness_row(test_case_id: int, outcomes: str, last_test_run_id: Optional[int], last_result_id: int) -> Dict:
+    """A testcase_flakiness row for the outcomes in the window, oldest first."""
+    failures = outcomes.count("F")
+    # Blocked or skipped runs neither break nor make a flip
+    decided = outcomes.replace("O", "")
+    flips = sum(1 for before, after in zip(decided, decided[1:]) if before != after)
+    return {
+        "test_case_id": test_case_id,
+        "outcomes": outcomes,
+        "runs": len(outcomes),
+        "failures": failures,
+        "flips": flips,
+        "failure_rate": round(failures / len(outcomes), 4) if outcomes else 0.0,
+        "flip_rate": round(flips / (len(decided) - 1), 4) if len(decided) > 1 else 0.0,
+        "last_test_run_id": last_test_run_id,
+        "last_result_id": last_result_id,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _store(session: Session, records: List[Dict]):
+    upsert(session, TestCaseFlakiness.__table__, records, ["test_case_id"], lambda excluded: {
+        name: getattr(excluded, name) for name in FLAKINESS_COLUMNS[1:]
+    })
+
+
+def mark_flakiness(session: Session, results: Iterable[CountedResult]):
+    """
+    Queue the test cases of written, changed or deleted results for the
+    next refresh, in the transaction that changes them. Each case keeps
+    the earliest run with a change.
+    """
+    earliest: Dict[int, int] = {}
+    for test_run_id, test_case_id, *_ in results:
+        earliest[test_case_id] = min(earliest.get(test_case_id, test_run_id), test_run_id)
+    if not earliest:
+        return
+    table = TestCaseFlakinessPending.__table__
+    rows = [{"test_case_id": test_case_id, "test_run_id": test_run_id, "version": 1} for test_case_id, test_run_id in earliest.items()]
+    upsert(session, table, rows, ["test_case_id"], lambda excluded: {
+        "test_run_id": case((excluded.test_run_id < table.c.test_run_id, excluded.test_run_id), else_=table.c.test_run_id),
+        "version": table.c.version + 1,
+    })
+
+
+def _refresh_cases(session: Session, pending: List, window: int) -> int:
+    """
+    Update the rows of pending (test_case_id, test_run_id, version) cases
+    and return how many results were read. Where only the newest stored run
+    or later ones changed, the results from that run on replace its
+    outcome; otherwise the latest runs of the case are read again, from the
+    (test_case_id, test_run_id) index either way.
+    """
+    test_case_ids = [test_case_id for test_case_id, _, _ in pending]
+    statement = select(
+        TestCaseFlakiness.test_case_id,
+        TestCaseFlakiness.outcomes,
+        TestCaseFlakiness.last_test_run_id,
+        TestCaseFlakiness.last_result_id,
+    ).where(TestCaseFlakiness.test_case_id.in_(test_case_ids))
+    stored = {test_case_id: (outcomes, last_test_run_id, last_result_id)
+              for test_case_id, outcomes, last_test_run_id, last_result_id in session.exec(statement)}
+
+    tails = {}
+    for test_case_id, test_run_id, _ in pending:
+        last_test_run_id = stored.get(test_case_id, ("", None, 0))[1]
+        if last_test_run_id is not None and test_run_id >= last_test_run_id:
+            tails[test_case_id] = last_test_run_id
+    columns = (TestCaseResult.test_case_id, TestCaseResult.test_run_id, TestCaseResult.id, TestCaseResult.result)
+    processed = 0
+    records = {}
+    if tails:
+        rows = session.exec(
+            select(*columns)
+            .where(TestCaseResult.test_case_id.in_(list(tails)), TestCaseResult.test_run_id >= min(tails.values()))
+            .order_by(*columns[:3])
+        ).all()
+        processed += len(rows)
+        for test_case_id, results in groupby(rows, key=lambda row: row[0]):
+            results = [row[1:] for row in results if row[1] >= tails[test_case_id]]
+            if not results or results[0][0] != tails[test_case_id]:
+                # The newest stored run has no results any more
+                continue
+            outcomes, _, last_result_id = stored[test_case_id]
+            outcomes, last_test_run_id, last_result_id = add_outcomes(outcomes[:-1], None, last_result_id, results)
+            records[test_case_id] = flakiness_row(test_case_id, outcomes[-window:], last_test_run_id, last_result_id)
+
+    again = [test_case_id for test_case_id in test_case_ids if test_case_id not in records]
+    if again:
+        rows = session.exec(latest_results(again, window)).all()
+        processed += len(rows)
+        for test_case_id, results in groupby(rows, key=lambda row: row[0]):
+            outcomes, last_test_run_id, last_result_id = add_outcomes("", None, 0, [row[1:4] for row in results])
+            records[test_case_id] = flakiness_row(test_case_id, outcomes, last_test_run_id, last_result_id)
+        # Cases without results have no flakiness
+        session.exec(delete(TestCaseFlakiness).where(TestCaseFlakiness.test_case_id.in_(again)))
+    _store(session, list(records.values()))
+    session.exec(delete(TestCaseFlakinessPending).where(
+        tuple_(TestCaseFlakinessPending.test_case_id, TestCaseFlakinessPending.version).in_(
+            [(test_case_id, version) for test_case_id, _, version in pending]
+        )
+    ))
+    return processed
+
+
+def _case_id_pages(session: Session, size: int):
+    """Test case ids in ascending order, ``size`` at a time."""
+    page = []
+    for test_case_id, in iter_pages(session, select(TestCase.id), TestCase.id, size):
+        page.append(test_case_id)
+        if len(page) == size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _build(session: Session, window: int, batch_size: int) -> int:
+    """
+    Compute every row from scratch. Results are read a range of test cases
+    at a time, in the order of the (test_case_id, test_run_id) index, so
+    each case is folded and written once rather than once per batch of runs.
+    """
+    columns = (TestCaseResult.test_case_id, TestCaseResult.test_run_id, TestCaseResult.id, TestCaseResult.result)
+    processed = 0
+    for page in _case_id_pages(session, max(1, batch_size // window)):
+        rows = session.exec(
+            select(*columns)
+            .where(TestCaseResult.test_case_id.between(page[0], page[-1]))
+            .order_by(*columns[:3])
+        ).all()
+        records = []
+        for test_case_id, results in groupby(rows, key=lambda row: row[0]):
+            outcomes, last_test_run_id, last_result_id = add_outcomes("", None, 0, [row[1:] for row in results])
+            records.append(flakiness_row(test_case_id, outcomes[-window:], last_test_run_id, last_result_id))
+        _store(session, records)
+        processed += len(rows)
+    return processed
+
+
+def refresh_flakiness(session: Session, window: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Update testcase_flakiness for the test cases queued by mark_flakiness
+    since the last refresh and return how many results were read. Only
+    the latest runs of those cases are read, never the full history; the
+    first refresh builds the table from every result.
+    """
+    window = window or settings.FLAKINESS_WINDOW
+    batch_size = batch_size or settings.FLAKINESS_BATCH_SIZE
+    if session.exec(select(TestCaseFlakiness.test_case_id).limit(1)).first() is None:
+        session.exec(delete(TestCaseFlakinessPending))
+        return _build(session, window, batch_size)
+    statement = select(
+        TestCaseFlakinessPending.test_case_id, TestCaseFlakinessPending.test_run_id, TestCaseFlakinessPending.version,
+    ).order_by(TestCaseFlakinessPending.test_case_id).limit(max(1, batch_size // window))
+    processed = 0
+    after = None
+    while True:
+        page = statement if after is None else statement.where(TestCaseFlakinessPending.test_case_id > after)
+        pending = session.exec(page).all()
+        if not pending:
+            return processed
+        processed += _refresh_cases(session, pending, window)
+        after = pending[-1][0]
+
+
+def rebuild_flakiness(session: Session, window: Optional[int] = None) -> int:
+    """Recompute testcase_flakiness from every result, e.g. after the window changed."""
+    session.exec(delete(TestCaseFlakiness))
+    return refresh_flakiness(session, window)
+
+
+class FlakinessRefresher:
+    """
+    Keeps testcase_flakiness up to date from a background thread. A refresh
+    runs when request() is called, after each upload, and at the latest
+    every ``interval`` seconds for results created one by one. Requests
+    arriving during a refresh are merged into one more refresh.
+    """
+
+    def __init__(self, interval: int, session_factory: Callable[[], Session]):
+        self.interval = interval
+        self.session_factory = session_factory
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._work, name="flakiness-refresher", daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._stopping = True
+            self._wake.set()
+            thread.join()
+
+    def request(self):
+        self._wake.set()
+
+    def _work(self):
+        while True:
+            self._wake.wait(self.interval or None)
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                with self.session_factory() as session:
+                    refresh_flakiness(session)
+                    session.commit()
+            except Exception as e:
+                print(f"Error refreshing test case flakiness: {e}")
+
+
+flakiness_refresher = FlakinessRefresher(
+    interval=settings.FLAKINESS_REFRESH_INTERVAL,
+    session_factory=lambda: Session(engine),
+)
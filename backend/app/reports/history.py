@@ -0,0 +1,170 @@
+from collections import defaultdict
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, tuple_
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.upsert import upsert
+from app.models.test_case_history import TestCaseHistory
+from app.models.test_case_result import TestCaseResult
+from app.reports.stats import CountedResult
+from app.reports.summary import outcome
+
+# One letter per run in TestCaseHistory.outcomes and TestCaseFlakiness.outcomes
+OUTCOME_CODES = {"passed": "P", "failed": "F", "other": "O"}
+
+HISTORY_COLUMNS = ["test_case_id", "outcomes", "last_test_run_id", "last_result_at"]
+
+# Test cases recomputed per query
+RECOMPUTE_BATCH_SIZE = 500
+
+
+def add_outcomes(outcomes: str, last_test_run_id: Optional[int], last_result_id: int, results: List[Tuple]):
+    """
+    Add results, as (test_run_id, id, result) in that order, to the
+    outcomes of a test case. Each run adds one outcome, the one of its last
+    result; results of a run older than the newest one already added are
+    skipped, so adding the same results twice has no effect.
+    """
+    for test_run_id, result_id, result in results:
+        last_result_id = max(last_result_id, result_id)
+        code = OUTCOME_CODES[outcome(result)]
+        if last_test_run_id is not None and test_run_id < last_test_run_id:
+            continue
+        if test_run_id == last_test_run_id:
+            outcomes = outcomes[:-1] + code
+        else:
+            outcomes += code
+            last_test_run_id = test_run_id
+    return outcomes, last_test_run_id, last_result_id
+
+
+def _latest(current, new):
+    if current is None or new is None:
+        return current or new
+    return max(current, new)
+
+
+def _store(session: Session, records: List[Dict]):
+    upsert(session, TestCaseHistory.__table__, records, ["test_case_id"], lambda excluded: {
+        name: getattr(excluded, name) for name in HISTORY_COLUMNS[1:]
+    })
+
+
+def record_history(session: Session, results: Iterable[CountedResult]):
+    """
+    Append new results, in the order they were written, to the outcomes of
+    their test cases. Only the stored rows of those cases are read, so a
+    batch of any size costs one lookup and one upsert.
+    """
+    by_case = defaultdict(list)
+    last_at = {}
+    # The position in the batch orders results of the same run like their ids would
+    for position, (test_run_id, test_case_id, result, created_at) in enumerate(results):
+        by_case[test_case_id].append((test_run_id, position, result))
+        last_at[test_case_id] = _latest(last_at.get(test_case_id), created_at)
+    if not by_case:
+        return
+    statement = select(
+        TestCaseHistory.test_case_id,
+        TestCaseHistory.outcomes,
+        TestCaseHistory.last_test_run_id,
+        TestCaseHistory.last_result_at,
+    ).where(TestCaseHistory.test_case_id.in_(list(by_case)))
+    stored = {test_case_id: rest for test_case_id, *rest in session.exec(statement)}
+
+    window = settings.HISTORY_OUTCOMES
+    records = []
+    for test_case_id, results in by_case.items():
+        outcomes, last_test_run_id, last_result_at = stored.get(test_case_id, ("", None, None))
+        outcomes, last_test_run_id, _ = add_outcomes(outcomes, last_test_run_id, 0, sorted(results))
+        records.append({
+            "test_case_id": test_case_id,
+            "outcomes": outcomes[-window:],
+            "last_test_run_id": last_test_run_id,
+            "last_result_at": _latest(last_result_at, last_at[test_case_id]),
+        })
+    _store(session, records)
+
+
+def latest_results(test_case_ids: List[int], runs: int):
+    """
+    The results of the latest ``runs`` runs of each given test case as
+    (test_case_id, test_run_id, id, result, created_at), in the order of
+    the history index.
+    """
+    run_rank = func.dense_rank().over(
+        partition_by=TestCaseResult.test_case_id, order_by=TestCaseResult.test_run_id.desc()
+    )
+    ranked = select(
+        TestCaseResult.test_case_id,
+        TestCaseResult.test_run_id,
+        TestCaseResult.id,
+        TestCaseResult.result,
+        TestCaseResult.created_at,
+        run_rank.label("run_rank"),
+    ).where(TestCaseResult.test_case_id.in_(test_case_ids)).subquery()
+    return (
+        select(ranked.c.test_case_id, ranked.c.test_run_id, ranked.c.id, ranked.c.result, ranked.c.created_at)
+        .where(ranked.c.run_rank <= runs)
+        .order_by(ranked.c.test_case_id, ranked.c.test_run_id, ranked.c.id)
+    )
+
+
+def recompute_history(session: Session, test_case_ids: Iterable[int]):
+    """
+    Recompute the outcomes of the given test cases from their results, after
+    results were changed or deleted. Only the results of each case's latest
+    HISTORY_OUTCOMES runs are read, in the order of the history index.
+    """
+    test_case_ids = sorted(set(test_case_ids))
+    window = settings.HISTORY_OUTCOMES
+    for start in range(0, len(test_case_ids), RECOMPUTE_BATCH_SIZE):
+        batch = test_case_ids[start:start + RECOMPUTE_BATCH_SIZE]
+        rows = session.exec(latest_results(batch, window)).all()
+
+        records = []
+        for test_case_id, results in groupby(rows, key=lambda row: row[0]):
+            results = list(results)
+            outcomes, last_test_run_id, _ = add_outcomes("", None, 0, [row[1:4] for row in results])
+            last_result_at = None
+            for row in results:
+                last_result_at = _latest(last_result_at, row[4])
+            records.append({
+                "test_case_id": test_case_id,
+                "outcomes": outcomes[-window:],
+                "last_test_run_id": last_test_run_id,
+                "last_result_at": last_result_at,
+            })
+        session.exec(delete(TestCaseHistory).where(TestCaseHistory.test_case_id.in_(batch)))
+        _store(session, records)
+
+
+def rebuild_history(session: Session) -> int:
+    """Recompute testcase_history for every test case with results and return how many there are."""
+    session.exec(delete(TestCaseHistory))
+    test_case_ids = list(session.exec(select(TestCaseResult.test_case_id).distinct()))
+    recompute_history(session, test_case_ids)
+    return len(test_case_ids)
+
+
+def history_entries(session: Session, test_case_id: int, before: Optional[Tuple[int, int]], limit: int):
+    """
+    Results of a test case, newest first, as id, test_run_id, created_at,
+    result and the start of the comment. ``before`` continues after the
+    (test_run_id, id) of the last entry of the previous page. Read in the
+    order of the history index; only the comments of the page touch the table.
+    """
+    statement = select(
+        TestCaseResult.id,
+        TestCaseResult.test_run_id,
+        TestCaseResult.created_at,
+        TestCaseResult.result,
+        func.substr(TestCaseResult.comment, 1, settings.HISTORY_COMMENT_LENGTH).label("comment"),
+    ).where(TestCaseResult.test_case_id == test_case_id)
+    if before is not None:
+        statement = statement.where(tuple_(TestCaseResult.test_run_id, TestCaseResult.id) < tuple(before))
+    statement = statement.order_by(TestCaseResult.test_run_id.desc(), TestCaseResult.id.desc()).limit(limit)
+    return session.exec(statement).all()
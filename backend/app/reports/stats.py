@@ -0,0 +1,165 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert
+from sqlmodel import Session, select
+
+from app.db.upsert import upsert
+from app.models.result_trend import ResultTrend
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run_stats import TestRunStats
+from app.reports.trends import count_trends, rebuild_trends, uncount_runs
+
+# A result as counted: (test_run_id, test_case_id, result, created_at)
+CountedResult = Tuple[int, int, str, Optional[datetime]]
+
+STATS_COLUMNS = ["test_run_id", "test_suite_id", "area", "result", "count", "first_result_at", "last_result_at"]
+
+
+def counted(result: TestCaseResult) -> CountedResult:
+    return result.test_run_id, result.test_case_id, result.result, result.created_at
+
+
+def _earliest(current, new):
+    return case((new == None, current), (current == None, new), (new < current, new), else_=current)  # noqa: E711
+
+
+def _latest(current, new):
+    return case((new == None, current), (current == None, new), (new > current, new), else_=current)  # noqa: E711
+
+
+def _apply(session: Session, rows: List[Dict]):
+    """Add the counts of the given stats rows to the stored ones and to the trends."""
+    if not rows:
+        return
+    count_trends(session, rows)
+    table = TestRunStats.__table__
+    upsert(session, table, rows, ["test_run_id", "test_suite_id", "area", "result"], lambda excluded: {
+        "count": table.c.count + excluded.count,
+        "first_result_at": _earliest(table.c.first_result_at, excluded.first_result_at),
+        "last_result_at": _latest(table.c.last_result_at, excluded.last_result_at),
+    })
+    if any(row["count"] < 0 for row in rows):
+        test_run_ids = {row["test_run_id"] for row in rows}
+        session.exec(delete(TestRunStats).where(TestRunStats.test_run_id.in_(test_run_ids), TestRunStats.count <= 0))
+
+
+def count_results(session: Session, results: Iterable[CountedResult], delta: int = 1):
+    """
+    Add results to (``delta=1``) or remove them from (``delta=-1``) the run
+    statistics. Results are grouped first, so a batch of any size costs one
+    lookup of its test cases and one upsert per group.
+    """
+    groups: Dict[Tuple[int, int, str], List] = defaultdict(lambda: [0, None, None])
+    for test_run_id, test_case_id, result, created_at in results:
+        group = groups[(test_run_id, test_case_id, result)]
+        group[0] += delta
+        if created_at is not None and delta > 0:
+            group[1] = min(group[1] or created_at, created_at)
+            group[2] = max(group[2] or created_at, created_at)
+    if not groups:
+        return
+
+    case_ids = {test_case_id for _, test_case_id, _ in groups}
+    cases = {
+        id: (test_suite_id or "", area or "")
+        for id, test_suite_id, area in session.exec(
+            select(TestCase.id, TestCase.test_suite_id, TestCase.area).where(TestCase.id.in_(case_ids))
+        )
+    }
+    rows: Dict[Tuple, Dict] = {}
+    for (test_run_id, test_case_id, result), (count, first, last) in groups.items():
+        test_suite_id, area = cases.get(test_case_id, ("", ""))
+        key = (test_run_id, test_suite_id, area, result)
+        row = rows.setdefault(key, dict(zip(STATS_COLUMNS, key + (0, None, None))))
+        row["count"] += count
+        if first is not None:
+            row["first_result_at"] = min(row["first_result_at"] or first, first)
+            row["last_result_at"] = max(row["last_result_at"] or last, last)
+    _apply(session, list(rows.values()))
+
+
+def _grouped_results(test_case_id: Optional[int] = None):
+    """Stats rows computed from the results, optionally of one test case only."""
+    statement = (
+        select(
+            TestCaseResult.test_run_id,
+            func.coalesce(TestCase.test_suite_id, ""),
+            func.coalesce(TestCase.area, ""),
+            TestCaseResult.result,
+            func.count(),
+            func.min(TestCaseResult.created_at),
+            func.max(TestCaseResult.created_at),
+        )
+        .outerjoin(TestCase, TestCase.id == TestCaseResult.test_case_id)
+        .group_by(TestCaseResult.test_run_id, TestCase.test_suite_id, TestCase.area, TestCaseResult.result)
+    )
+    if test_case_id is not None:
+        statement = statement.where(TestCaseResult.test_case_id == test_case_id)
+    return statement
+
+
+def uncount_test_case(session: Session, test_case_id: int):
+    """Remove the results of a test case from the statistics, before they are deleted."""
+    rows = [dict(zip(STATS_COLUMNS, row)) for row in session.exec(_grouped_results(test_case_id))]
+    for row in rows:
+        row.update(count=-row["count"], first_result_at=None, last_result_at=None)
+    _apply(session, rows)
+
+
+def recount_test_case(session: Session, test_case_id: int, test_suite_id: Optional[str], area: Optional[str]):
+    """
+    Move the results of a test case to its new suite and area, given the
+    old ones, after the test case was changed.
+    """
+    statement = (
+        select(
+            TestCaseResult.test_run_id,
+            TestCaseResult.result,
+            func.count(),
+            func.min(TestCaseResult.created_at),
+            func.max(TestCaseResult.created_at),
+        )
+        .where(TestCaseResult.test_case_id == test_case_id)
+        .group_by(TestCaseResult.test_run_id, TestCaseResult.result)
+    )
+    test_case = session.get(TestCase, test_case_id)
+    old_key = (test_suite_id or "", area or "")
+    new_key = (test_case.test_suite_id or "", test_case.area or "")
+    if old_key == new_key:
+        return
+    rows = []
+    for test_run_id, result, count, first, last in session.exec(statement):
+        rows.append(dict(zip(STATS_COLUMNS, (test_run_id, *old_key, result, -count, None, None))))
+        rows.append(dict(zip(STATS_COLUMNS, (test_run_id, *new_key, result, count, first, last))))
+    _apply(session, rows)
+
+
+def delete_run_stats(session: Session, test_run_ids: Optional[List[int]] = None):
+    """Forget the statistics of the given runs, or of all runs, and take them out of the trends."""
+    statement = delete(TestRunStats)
+    if test_run_ids is not None:
+        uncount_runs(session, test_run_ids)
+        statement = statement.where(TestRunStats.test_run_id.in_(test_run_ids))
+    else:
+        session.exec(delete(ResultTrend))
+    session.exec(statement)
+
+
+def rebuild_stats(session: Session):
+    """Recompute all statistics from the results with one INSERT ... SELECT, then the trends from them."""
+    delete_run_stats(session)
+    session.exec(insert(TestRunStats).from_select(STATS_COLUMNS, _grouped_results()))
+    rebuild_trends(session)
+
+
+def check_stats(session: Session) -> List[int]:
+    """Ids of runs whose stored statistics differ from their results."""
+    def counts(rows):
+        return {tuple(row[:5]) for row in rows}
+
+    stored = counts(session.exec(select(*[getattr(TestRunStats, name) for name in STATS_COLUMNS])))
+    actual = counts(session.exec(_grouped_results()))
+    return sorted({row[0] for row in stored ^ actual})
@@ -0,0 +1,71 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlmodel import Session, select
+
+from app.models.test_run_stats import TestRunStats
+from app.models.test_run_summary import GroupSummary, ResultCounts, TestRunSummary
+
+# Result values counted as passed and failed, compared case-insensitively
+PASS_VALUES = ("pass", "passed")
+FAIL_VALUES = ("fail", "failed")
+
+
+def outcome(result: Optional[str]) -> str:
+    """Which count of a summary a stored result value goes to: passed, failed or other."""
+    value = (result or "").strip().lower()
+    if value in PASS_VALUES:
+        return "passed"
+    if value in FAIL_VALUES:
+        return "failed"
+    return "other"
+
+
+def add_counts(counts: ResultCounts, result: Optional[str], count: int):
+    counts.total += count
+    key = outcome(result)
+    setattr(counts, key, getattr(counts, key) + count)
+
+
+def finish(counts: ResultCounts):
+    counts.pass_rate = round(counts.passed / counts.total, 4) if counts.total else None
+
+
+def run_summaries(session: Session, test_run_ids: Iterable[int]) -> Dict[int, TestRunSummary]:
+    """
+    Summaries of the given runs, by run id. They are read from the
+    testrun_stats rows maintained as results are written, a handful per run
+    whatever the number of results, so no result is counted here.
+    """
+    test_run_ids = list(test_run_ids)
+    summaries = {test_run_id: TestRunSummary(test_run_id=test_run_id) for test_run_id in test_run_ids}
+    if not test_run_ids:
+        return summaries
+    statement = select(TestRunStats).where(TestRunStats.test_run_id.in_(test_run_ids))
+    suites: Dict[int, Dict[Optional[str], GroupSummary]] = {test_run_id: {} for test_run_id in test_run_ids}
+    areas: Dict[int, Dict[Optional[str], GroupSummary]] = {test_run_id: {} for test_run_id in test_run_ids}
+    for stats in session.exec(statement):
+        summary = summaries[stats.test_run_id]
+        result, count = stats.result, stats.count
+        add_counts(summary, result, count)
+        summary.by_result[result] = summary.by_result.get(result, 0) + count
+        if stats.first_result_at and (summary.first_result_at is None or stats.first_result_at < summary.first_result_at):
+            summary.first_result_at = stats.first_result_at
+        if stats.last_result_at and (summary.last_result_at is None or stats.last_result_at > summary.last_result_at):
+            summary.last_result_at = stats.last_result_at
+        # Stats store "" for results without suite or area
+        test_suite_id, area = stats.test_suite_id or None, stats.area or None
+        add_counts(suites[stats.test_run_id].setdefault(test_suite_id, GroupSummary(key=test_suite_id)), result, count)
+        add_counts(areas[stats.test_run_id].setdefault(area, GroupSummary(key=area)), result, count)
+
+    for test_run_id, summary in summaries.items():
+        finish(summary)
+        summary.by_suite = _sorted_groups(suites[test_run_id].values())
+        summary.by_area = _sorted_groups(areas[test_run_id].values())
+    return summaries
+
+
+def _sorted_groups(groups: Iterable[GroupSummary]) -> List[GroupSummary]:
+    groups = sorted(groups, key=lambda group: (group.key is None, group.key or ""))
+    for group in groups:
+        finish(group)
+    return groups
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from app.db.upsert import upsert
+from app.models.result_trend import ResultTrend, ResultTrendPoint
+from app.models.test_run import TestRun
+from app.models.test_run_stats import TestRunStats
+from app.reports.summary import add_counts, finish
+
+PERIODS = ["day", "week"]
+
+# Columns a trend can be broken down by
+TREND_GROUPS = ["test_suite_id", "area"]
+
+
+def bucket_start(period: str, at: datetime) -> date:
+    """First day of the day or week bucket a point in time falls in."""
+    day = at.date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _run_times(session: Session, test_run_ids: Iterable[int]) -> Dict[int, datetime]:
+    statement = select(TestRun.id, TestRun.created_at).where(TestRun.id.in_(list(set(test_run_ids))))
+    return {id: created_at for id, created_at in session.exec(statement) if created_at is not None}
+
+
+def _bucketed(rows: Iterable[Tuple], run_times: Dict[int, datetime]) -> List[Dict]:
+    """Trend rows summing (test_run_id, test_suite_id, area, result, count) rows over their buckets."""
+    counts: Dict[Tuple, int] = defaultdict(int)
+    for test_run_id, test_suite_id, area, result, count in rows:
+        created_at = run_times.get(test_run_id)
+        if created_at is None:
+            continue
+        for period in PERIODS:
+            counts[(period, bucket_start(period, created_at), test_suite_id, area, result)] += count
+    columns = ["period", "bucket", "test_suite_id", "area", "result", "count"]
+    return [dict(zip(columns, key + (count,))) for key, count in counts.items() if count]
+
+
+def count_trends(session: Session, stats_rows: List[Dict]):
+    """
+    Add changes of the run statistics, as testrun_stats rows with the
+    change in ``count``, to the day and week buckets of their runs. One
+    lookup of the runs and one upsert, whatever the number of rows.
+    """
+    if not stats_rows:
+        return
+    run_times = _run_times(session, [row["test_run_id"] for row in stats_rows])
+    rows = _bucketed(
+        [(row["test_run_id"], row["test_suite_id"], row["area"], row["result"], row["count"]) for row in stats_rows],
+        run_times,
+    )
+    if not rows:
+        return
+    table = ResultTrend.__table__
+    upsert(session, table, rows, ["period", "bucket", "test_suite_id", "area", "result"], lambda excluded: {
+        "count": table.c.count + excluded.count,
+    })
+    if any(row["count"] < 0 for row in rows):
+        buckets = {row["bucket"] for row in rows}
+        session.exec(delete(ResultTrend).where(
+            ResultTrend.period.in_(PERIODS), ResultTrend.bucket.in_(buckets), ResultTrend.count <= 0,
+        ))
+
+
+def uncount_runs(session: Session, test_run_ids: List[int]):
+    """Remove the runs' statistics from the trends, before the statistics are deleted."""
+    statement = select(
+        TestRunStats.test_run_id, TestRunStats.test_suite_id, TestRunStats.area, TestRunStats.result, TestRunStats.count,
+    ).where(TestRunStats.test_run_id.in_(test_run_ids))
+    count_trends(session, [
+        {"test_run_id": test_run_id, "test_suite_id": test_suite_id, "area": area, "result": result, "count": -count}
+        for test_run_id, test_suite_id, area, result, count in session.exec(statement)
+    ])
+
+
+def rebuild_trends(session: Session) -> int:
+    """
+    Recompute all buckets from the run statistics, which are a few rows
+    per run, and return how many there are.
+    """
+    session.exec(delete(ResultTrend))
+    statement = select(
+        TestRunStats.test_run_id, TestRunStats.test_suite_id, TestRunStats.area, TestRunStats.result, TestRunStats.count,
+    )
+    stats_rows = session.exec(statement).all()
+    run_times = dict(session.exec(select(TestRun.id, TestRun.created_at).where(TestRun.created_at != None)).all())  # noqa: E711
+    rows = _bucketed(stats_rows, run_times)
+    upsert(session, ResultTrend.__table__, rows, ["period", "bucket", "test_suite_id", "area", "result"], lambda excluded: {
+        "count": excluded.count,
+    })
+    return len(rows)
+
+
+def read_trends(
+    session: Session,
+    period: str,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    test_suite_id: Optional[str] = None,
+    area: Optional[str] = None,
+    group_by: Optional[List[str]] = None,
+) -> List[ResultTrendPoint]:
+    """
+    Pass rate trend over the buckets of a period from ``since`` up to
+    ``until`` (exclusive), optionally broken down by suite and area. Only
+    the trend rows of the range are read, and summed up by the database.
+    """
+    group_by = group_by or []
+    keys = [ResultTrend.bucket, *[getattr(ResultTrend, name) for name in group_by], ResultTrend.result]
+    statement = (
+        select(*keys, func.sum(ResultTrend.count))
+        .where(ResultTrend.period == period)
+        .group_by(*keys)
+    )
+    if since is not None:
+        statement = statement.where(ResultTrend.bucket >= since)
+    if until is not None:
+        statement = statement.where(ResultTrend.bucket < until)
+    if test_suite_id is not None:
+        statement = statement.where(ResultTrend.test_suite_id == test_suite_id)
+    if area is not None:
+        statement = statement.where(ResultTrend.area == area)
+
+    points: Dict[Tuple, ResultTrendPoint] = {}
+    for bucket, *groups, result, count in session.exec(statement):
+        key = (bucket, *groups)
+        point = points.get(key)
+        if point is None:
+            # Trends store "" for results without suite or area
+            point = points[key] = ResultTrendPoint(bucket=bucket, **{name: value or None for name, value in zip(group_by, groups)})
+        add_counts(point, result, count)
+    for point in points.values():
+        finish(point)
+    return [points[key] for key in sorted(points)]
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.upsert import insert_ignore
+from app.models.artifact import Artifact, TestCaseResultArtifact
+
+# Unlinked artifacts checked for other links per query
+ORPHAN_BATCH_SIZE = 500
+
+
+def artifact_path(digest: str) -> str:
+    """Location of an artifact in the store, fanned out by the first digest bytes."""
+    return os.path.join(settings.ARTIFACT_STORE_DIR, digest[:2], digest[2:4], digest)
+
+
+def write_artifact(fileobj: BinaryIO) -> Tuple[str, int]:
+    """
+    Copy a file into the artifact store, hashing it on the way, and return
+    its digest and size. Content that is already stored is not kept twice.
+    """
+    tmp_dir = os.path.join(settings.ARTIFACT_STORE_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = fileobj.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        path = artifact_path(digest.hexdigest())
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Atomic, so readers never see a partly written artifact
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest(), size
+
+
+def store_artifact(session: Session, fileobj: BinaryIO, content_type: Optional[str] = None) -> Artifact:
+    """Store a file and return its artifact row, creating the row if the content is new."""
+    digest, size = write_artifact(fileobj)
+    insert_ignore(session, Artifact.__table__, [{"digest": digest, "size": size, "content_type": content_type}])
+    return session.exec(select(Artifact).where(Artifact.digest == digest)).one()
+
+
+def unlink_artifacts(session: Session, result_ids) -> List[int]:
+    """
+    Drop the artifact links of the given results (ids or a subquery) and
+    return the ids of the artifacts they linked to.
+    """
+    linked = TestCaseResultArtifact.test_case_result_id.in_(result_ids)
+    artifact_ids = session.exec(select(TestCaseResultArtifact.artifact_id).where(linked).distinct()).all()
+    session.exec(delete(TestCaseResultArtifact).where(linked))
+    return list(artifact_ids)
+
+
+def delete_orphaned_artifacts(session: Session, artifact_ids: Iterable[Optional[int]]) -> List[str]:
+    """
+    Delete those of the given artifact rows no result links to any more and
+    return their digests. Pass the artifacts an operation unlinked, only
+    those are checked. Remove the files with remove_artifact_files once
+    committed.
+    """
+    artifact_ids = sorted({artifact_id for artifact_id in artifact_ids if artifact_id is not None})
+    digests = []
+    for i in range(0, len(artifact_ids), ORPHAN_BATCH_SIZE):
+        batch = artifact_ids[i:i + ORPHAN_BATCH_SIZE]
+        linked = select(TestCaseResultArtifact.artifact_id).where(TestCaseResultArtifact.artifact_id.in_(batch))
+        orphans = session.exec(select(Artifact).where(Artifact.id.in_(batch), Artifact.id.not_in(linked))).all()
+        for artifact in orphans:
+            session.delete(artifact)
+        digests.extend(artifact.digest for artifact in orphans)
+    return digests
+
+
+def remove_artifact_files(digests: List[str]):
+    for digest in digests:
+        try:
+            os.remove(artifact_path(digest))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,197 @@
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import zstandard
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.search import index_logs, unindex_logs
+from app.db.upsert import insert_ignore
+from app.models.test_case_log import TestCaseLog, TestCaseLogChunk
+from app.models.test_case_result import TestCaseResult
+
+# Detached logs checked for other references per query
+ORPHAN_BATCH_SIZE = 500
+
+
+def encode_logs(logs: Any) -> bytes:
+    """Logs of an upload or request as bytes; lists of lines are joined."""
+    if logs is None:
+        return b""
+    if isinstance(logs, bytes):
+        return logs
+    if isinstance(logs, list):
+        logs = "\n".join(str(line) for line in logs)
+    return str(logs).encode("utf-8")
+
+
+def log_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def compress_chunks(data: bytes, chunk_size: int) -> List[bytes]:
+    """
+    Split logs into chunks of ``chunk_size`` uncompressed bytes, each its
+    own zstd frame, so any byte range can be read without decompressing the
+    chunks before it.
+    """
+    compressor = zstandard.ZstdCompressor(level=settings.LOG_ZSTD_LEVEL)
+    return [compressor.compress(data[start:start + chunk_size]) for start in range(0, len(data), chunk_size)]
+
+
+def store_logs(session: Session, logs: Iterable[bytes]) -> Dict[str, int]:
+    """
+    Store logs set-wise and return their log ids by digest. Logs already
+    stored (by any result) are not stored again; empty logs are skipped.
+    """
+    by_digest = {}
+    for data in logs:
+        if data:
+            by_digest.setdefault(log_digest(data), data)
+    if not by_digest:
+        return {}
+
+    ids = _lookup_logs(session, by_digest)
+    new = {digest: data for digest, data in by_digest.items() if digest not in ids}
+    if new:
+        chunk_size = settings.LOG_CHUNK_SIZE
+        insert_ignore(session, TestCaseLog.__table__, [
+            {"digest": digest, "size": len(data), "chunk_size": chunk_size}
+            for digest, data in new.items()
+        ])
+        new_ids = _lookup_logs(session, new)
+        chunks = []
+        for digest, data in new.items():
+            for seq, chunk in enumerate(compress_chunks(data, chunk_size)):
+                chunks.append({"log_id": new_ids[digest], "seq": seq, "data": chunk})
+        # A concurrent upload of the same log may have written the chunks already
+        insert_ignore(session, TestCaseLogChunk.__table__, chunks)
+        index_logs(session, {new_ids[digest]: data for digest, data in new.items()})
+        ids.update(new_ids)
+    return ids
+
+
+def _lookup_logs(session: Session, digests: Iterable[str]) -> Dict[str, int]:
+    statement = select(TestCaseLog.digest, TestCaseLog.id).where(TestCaseLog.digest.in_(list(digests)))
+    return {digest: id for digest, id in session.exec(statement)}
+
+
+def log_columns(data: bytes, ids: Dict[str, int]) -> Dict[str, Any]:
+    """log_id, logs_size and logs_digest of a result row for stored logs."""
+    if not data:
+        return {"log_id": None, "logs_size": 0, "logs_digest": None}
+    digest = log_digest(data)
+    return {"log_id": ids[digest], "logs_size": len(data), "logs_digest": digest}
+
+
+def set_logs(session: Session, result: TestCaseResult, logs: Any):
+    """Store the logs of a single result and point the result at them."""
+    data = encode_logs(logs)
+    for key, value in log_columns(data, store_logs(session, [data])).items():
+        setattr(result, key, value)
+
+
+def _read_chunk(session: Session, log_id: int, seq: int) -> bytes:
+    data = session.exec(
+        select(TestCaseLogChunk.data).where(TestCaseLogChunk.log_id == log_id, TestCaseLogChunk.seq == seq)
+    ).one()
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def iter_log_range(session: Session, log_id: int, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield bytes ``start`` to ``end`` (exclusive) of a stored log, reading and
+    decompressing only the chunks that cover the range, one at a time.
+    """
+    log = session.get(TestCaseLog, log_id)
+    if log is None:
+        return
+    end = log.size if end is None else min(end, log.size)
+    if start >= end:
+        return
+    first, last = start // log.chunk_size, (end - 1) // log.chunk_size
+    for seq in range(first, last + 1):
+        chunk = _read_chunk(session, log_id, seq)
+        offset = seq * log.chunk_size
+        yield chunk[max(start - offset, 0):end - offset]
+
+
+def tail_offset(session: Session, log_id: int, lines: int) -> int:
+    """
+    Byte offset where the last ``lines`` lines of a stored log start. Chunks
+    are read backwards from the end and only until enough lines were seen.
+    """
+    log = session.get(TestCaseLog, log_id)
+    if log is None or lines <= 0:
+        return log.size if log else 0
+    last = (log.size - 1) // log.chunk_size
+    for seq in range(last, -1, -1):
+        chunk = _read_chunk(session, log_id, seq)
+        position = len(chunk)
+        if seq == last and chunk.endswith(b"\n"):
+            # A final newline ends the last line rather than starting a new one
+            position -= 1
+        while True:
+            position = chunk.rfind(b"\n", 0, position)
+            if position < 0:
+                break
+            lines -= 1
+            if lines == 0:
+                return seq * log.chunk_size + position + 1
+    return 0
+
+
+def iter_log_lines(session: Session, log_id: int) -> Iterator[bytes]:
+    """Yield the lines of a stored log without their newline, chunk by chunk."""
+    pending = b""
+    for chunk in iter_log_range(session, log_id):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def find_log_line(session: Session, log_id: int, pattern: "re.Pattern") -> Optional[str]:
+    """First line of a stored log matching the pattern, reading no further."""
+    for line in iter_log_lines(session, log_id):
+        line = line.decode("utf-8", errors="replace")
+        if pattern.search(line):
+            return line
+    return None
+
+
+def read_logs(session: Session, result: TestCaseResult) -> str:
+    """Full logs of a result, decompressed."""
+    if result.log_id is None:
+        return ""
+    return b"".join(iter_log_range(session, result.log_id)).decode("utf-8", errors="replace")
+
+
+def read_logs_by_id(session: Session, log_ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """Full logs of several stored logs by id; logs shared by several results are read once."""
+    return {
+        log_id: b"".join(iter_log_range(session, log_id)).decode("utf-8", errors="replace")
+        for log_id in set(log_ids) if log_id is not None
+    }
+
+
+def delete_orphaned_logs(session: Session, log_ids: Iterable[Optional[int]]):
+    """
+    Remove those of the given stored logs that no result refers to any more.
+    Pass the logs an operation detached from results, only those are checked.
+    """
+    log_ids = sorted({log_id for log_id in log_ids if log_id is not None})
+    for i in range(0, len(log_ids), ORPHAN_BATCH_SIZE):
+        batch = log_ids[i:i + ORPHAN_BATCH_SIZE]
+        referenced = select(TestCaseResult.log_id).where(TestCaseResult.log_id.in_(batch))
+        orphans = dict(session.exec(
+            select(TestCaseLog.id, TestCaseLog.size).where(TestCaseLog.id.in_(batch), TestCaseLog.id.not_in(referenced))
+        ).all())
+        if not orphans:
+            continue
+        unindex_logs(session, orphans, lambda log_id, start, end: b"".join(iter_log_range(session, log_id, start, end)))
+        session.exec(delete(TestCaseLogChunk).where(TestCaseLogChunk.log_id.in_(list(orphans))))
+        session.exec(delete(TestCaseLog).where(TestCaseLog.id.in_(list(orphans))))
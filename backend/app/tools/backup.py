@@ -3,9 +3,11 @@ import json
 import os
 import datetime
 from pathlib import Path
+from sqlalchemy.orm import undefer_group
 from sqlmodel import Session, select
 
 from app.db.init_db import engine
+from app.storage.logs import read_logs
 from app.models import (
     TestSuite, TestCase, TestRun, TestCaseResult,
     TestOperator, Company, TestRunTemplate,
@@ -25,9 +27,12 @@ def backup_database():
         # Get all data from all tables
         data = {
             "test_suites": [suite.dict() for suite in session.exec(select(TestSuite)).all()],
-            "test_cases": [case.dict() for case in session.exec(select(TestCase)).all()],
+            "test_cases": [case.dict() for case in session.exec(select(TestCase).options(undefer_group("text"))).all()],
             "test_runs": [run.dict() for run in session.exec(select(TestRun)).all()],
-            "test_case_results": [result.dict() for result in session.exec(select(TestCaseResult)).all()],
+            "test_case_results": [
+                {**result.dict(), "logs": read_logs(session, result)}
+                for result in session.exec(select(TestCaseResult).options(undefer_group("text"))).all()
+            ],
             "test_operators": [operator.dict() for operator in session.exec(select(TestOperator)).all()],
             "companies": [company.dict() for company in session.exec(select(Company)).all()],
             "test_run_templates": [template.dict() for template in session.exec(select(TestRunTemplate)).all()],
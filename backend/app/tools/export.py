@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Export test runs, test cases or test case results as Parquet or Arrow IPC.
+
+    python -m app.tools.export test_case_results -o results.parquet
+    python -m app.tools.export test_case_results --format arrow --since 2025-01-01 --suite UI -o results.arrow
+    python -m app.tools.export test_case_results --logs -o results-with-logs.parquet
+
+Rows are read from one database cursor and written a row group at a time,
+so memory stays bounded whatever the size of the export.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app.db.init_db import engine
+from app.reports.export import EXPORT_FORMATS, EXPORT_TABLES, write_export
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a table for analytics tools")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("-o", "--output", required=True, help="file to write")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only runs created at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="only runs created before this time")
+    parser.add_argument("--suite", help="only test cases of this suite")
+    parser.add_argument("--logs", action="store_true", help="include the full logs of test case results")
+    parser.add_argument("--batch-size", type=int, help="rows per row group or record batch")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        rows = write_export(
+            session, args.output, args.table, args.format, args.logs, args.batch_size,
+            since=args.since, until=args.until, test_suite_id=args.suite,
+        )
+    print(f"Exported {rows} rows of {args.table} to {args.output} in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Refresh or rebuild the testcase_flakiness table from the test case results.
+
+    python -m app.tools.rebuild_flakiness          # update the test cases whose results changed since the last refresh
+    python -m app.tools.rebuild_flakiness --full   # recompute from every result, e.g. after FLAKINESS_WINDOW changed
+"""
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.init_db import engine
+from app.reports.flakiness import rebuild_flakiness, refresh_flakiness
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh or rebuild the test case flakiness")
+    parser.add_argument("--full", action="store_true", help="recompute from every result instead of the changed test cases")
+    args = parser.parse_args(argv)
+
+    with Session(engine) as session:
+        if args.full:
+            processed = rebuild_flakiness(session)
+        else:
+            processed = refresh_flakiness(session)
+        session.commit()
+    print(f"Read {processed} results for the flakiness over the last {settings.FLAKINESS_WINDOW} runs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Rebuild the testcase_history table from the test case results.
+
+    python -m app.tools.rebuild_history
+
+Needed after HISTORY_OUTCOMES changed; the migration adding the table fills
+it in for existing results, and new results are added to the history as they
+are written.
+"""
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.init_db import engine
+from app.reports.history import rebuild_history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the outcome history of the test cases")
+    parser.parse_args(argv)
+
+    with Session(engine) as session:
+        test_cases = rebuild_history(session)
+        session.commit()
+    print(f"Rebuilt the last {settings.HISTORY_OUTCOMES} outcomes of {test_cases} test cases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
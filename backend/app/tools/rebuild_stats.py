@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Check or rebuild the testrun_stats table from the test case results.
+
+    python -m app.tools.rebuild_stats           # rebuild all run statistics
+    python -m app.tools.rebuild_stats --check   # only report runs whose statistics differ
+"""
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.db.init_db import engine
+from app.reports.stats import check_stats, rebuild_stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or rebuild the per-run statistics")
+    parser.add_argument("--check", action="store_true", help="only report runs whose statistics are out of date")
+    args = parser.parse_args(argv)
+
+    with Session(engine) as session:
+        stale = check_stats(session)
+        if stale:
+            print(f"Statistics out of date for {len(stale)} runs: {', '.join(str(test_run_id) for test_run_id in stale)}")
+        else:
+            print("Statistics are up to date")
+        if args.check:
+            return 1 if stale else 0
+        rebuild_stats(session)
+        session.commit()
+        print("Statistics rebuilt")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
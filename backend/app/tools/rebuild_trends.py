@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Backfill the result_trend table from the run statistics.
+
+    python -m app.tools.rebuild_trends
+
+Needed once after migrating a database with existing runs; afterwards the
+trends are kept up to date with the statistics. rebuild_stats rebuilds the
+trends as well.
+"""
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.db.init_db import engine
+from app.reports.trends import rebuild_trends
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill the daily and weekly result trends")
+    parser.parse_args(argv)
+
+    with Session(engine) as session:
+        buckets = rebuild_trends(session)
+        session.commit()
+    print(f"Rebuilt {buckets} trend rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
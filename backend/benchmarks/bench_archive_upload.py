@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Archive upload time with members parsed inline versus in a process pool.
+
+Packs synthetic result files into a zip archive and ingests it into a
+scratch SQLite database, once parsing every member in the writing thread
+and once with a pool of worker processes per core count given. Parsing
+dominates, so the pool should approach the write time on multi-core hosts.
+
+Usage: python benchmarks/bench_archive_upload.py [members] [rows per member]
+"""
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+from sqlmodel import Session
+
+from common import generate_results_file, scratch_engine
+
+from app.core.config import settings
+from app.ingest.archive import ingest_archive
+
+
+def main():
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    cpus = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.INGEST_SPOOL_DIR = os.path.join(tmp, "spool")
+        archive_path = os.path.join(tmp, "nightly.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for i in range(members):
+                path = os.path.join(tmp, f"dut{i}.json")
+                # Distinct content per member so none is skipped as a duplicate
+                generate_results_file(path, rows=rows + i, log_lines=5)
+                archive.write(path, f"dut{i}.json")
+                os.remove(path)
+
+        print(f"{members} members of ~{rows} results")
+        print(f"{'processes':>9} {'seconds':>8} {'rows/s':>10}")
+        for processes in sorted({0, 2, cpus}):
+            engine = scratch_engine(os.path.join(tmp, f"bench_{processes}.db"))
+            with Session(engine) as session:
+                started = time.perf_counter()
+                jobs = ingest_archive(session, archive_path, processes)
+                elapsed = time.perf_counter() - started
+            engine.dispose()
+            total = sum(job.rows_parsed for job in jobs)
+            print(f"{processes:>9} {elapsed:>8.2f} {total / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Response times of run diffs.
+
+Fills a scratch SQLite database with runs of ``cases`` results each, where
+a few percent of the cases change outcome from run to run, then times the
+diff of the two newest runs and of the newest run against a baseline of
+the runs before it, first and next pages.
+
+Usage: python benchmarks/bench_diff.py [cases] [runs]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from common import scratch_engine
+
+from app.db.init_db import get_session
+from app.db.upsert import insert_ignore
+from app.main import app
+from app.models import TestCase, TestCaseResult, TestRun, TestSuite
+from app.reports.stats import rebuild_stats
+
+
+def fill(engine, cases, runs):
+    rng = random.Random(cases)
+    with Session(engine) as session:
+        session.add(TestSuite(db_id=1, id="BENCH", name="Bench", format="json", version=1, version_string="1.0"))
+        session.add_all([TestRun(status="Completed") for _ in range(runs)])
+        session.commit()
+        insert_ignore(session, TestCase.__table__, [{
+            "case_id": f"TC{i:06d}",
+            "title": f"Case {i}",
+            "version": 1,
+            "version_string": "1.0",
+            "test_suite_id": "BENCH",
+        } for i in range(cases)])
+        failing = {case for case in range(1, cases + 1) if rng.random() < 0.05}
+        for run in range(1, runs + 1):
+            failing ^= {case for case in range(1, cases + 1) if rng.random() < 0.01}
+            insert_ignore(session, TestCaseResult.__table__, [{
+                "test_run_id": run,
+                "test_case_id": case,
+                "result": "Fail" if case in failing else "Pass",
+                "logs_size": 0,
+            } for case in range(1, cases + 1) if rng.random() > 0.002])
+        # Results were inserted directly, the diff reads result values from the statistics
+        rebuild_stats(session)
+        session.commit()
+        session.connection().exec_driver_sql("ANALYZE")
+        session.commit()
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = scratch_engine(os.path.join(tmp, "bench.db"))
+        fill(engine, cases, runs)
+        print(f"{cases} test cases, {runs} runs, {cases * runs} results\n")
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        client = TestClient(app)
+        requests = [
+            (f"/api/test-runs/{runs - 1}/diff/{runs}", {}),
+            (f"/api/test-runs/{runs - 1}/diff/{runs}", {"statuses": "newly_failing", "limit": 1000}),
+            (f"/api/test-runs/{runs}/diff", {"last": 5}),
+            (f"/api/test-runs/{runs}/diff", {"last": runs}),
+        ]
+        for url, params in requests:
+            response = client.get(url, params=params)
+            started = time.perf_counter()
+            response = client.get(url, params=params)
+            first = (time.perf_counter() - started) * 1000
+            counts = response.json()["counts"]
+            query = "&".join(f"{key}={value}" for key, value in params.items())
+            print(f"GET {url}?{query}")
+            print(f"    first page {first:.0f} ms, counts {counts}")
+            if "X-Next-Cursor" in response.headers:
+                started = time.perf_counter()
+                client.get(url, params={**params, "cursor": response.headers["X-Next-Cursor"]})
+                print(f"    next page {(time.perf_counter() - started) * 1000:.0f} ms")
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
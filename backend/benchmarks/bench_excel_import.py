@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Excel import versus JSON upload: throughput and peak memory.
+
+Writes the same results as a JSON document and as an .xlsx workbook, then
+ingests each into a scratch SQLite database, reporting rows/s (untraced run)
+and the peak Python heap (tracemalloc run). Peak memory of the Excel path
+should stay bounded as the row count grows.
+
+Usage: python benchmarks/bench_excel_import.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import generate_results_file, generate_results_workbook, ingest_file
+
+
+def run(path, db_path):
+    started = time.perf_counter()
+    ingest_file(path, db_path)
+    elapsed = time.perf_counter() - started
+    os.remove(db_path)
+
+    tracemalloc.start()
+    ingest_file(path, db_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(db_path)
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    print(f"{'rows':>8} {'format':>6} {'file MB':>8} {'rows/s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            json_path = os.path.join(tmp, f"results_{rows}.json")
+            xlsx_path = os.path.join(tmp, f"results_{rows}.xlsx")
+            db_path = os.path.join(tmp, "bench.db")
+            generate_results_file(json_path, rows=rows, log_lines=5)
+            generate_results_workbook(xlsx_path, rows=rows, log_lines=5)
+            for label, path in (("json", json_path), ("xlsx", xlsx_path)):
+                elapsed, peak = run(path, db_path)
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                print(f"{rows:>8} {label:>6} {size_mb:>8.1f} {rows / elapsed:>8.0f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
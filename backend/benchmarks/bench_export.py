@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory of columnar exports.
+
+Fills a scratch SQLite database with ``results`` results, then exports
+them as Parquet and as an Arrow IPC file and reports the time, rows per
+second, file size, peak Python heap (tracemalloc) and peak Arrow memory
+of each. Both peaks should depend on EXPORT_BATCH_SIZE, not on the number
+of results. The Arrow file is then memory-mapped and read without copying.
+
+Usage: python benchmarks/bench_export.py [results] [cases]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pyarrow as pa
+from sqlmodel import Session
+
+from common import scratch_engine
+
+from app.db.upsert import insert_ignore
+from app.models import TestCase, TestCaseResult, TestRun, TestSuite
+from app.reports.export import write_export
+
+
+def fill(engine, results, cases):
+    rng = random.Random(results)
+    runs = max(1, results // cases)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(TestSuite(db_id=1, id="BENCH", name="Bench", format="json", version=1, version_string="1.0"))
+        session.add_all([TestRun(status="Completed") for _ in range(runs)])
+        session.commit()
+        insert_ignore(session, TestCase.__table__, [{
+            "case_id": f"TC{i:06d}", "title": f"Case {i}", "version": 1, "version_string": "1.0", "test_suite_id": "BENCH",
+        } for i in range(cases)])
+        for run in range(1, runs + 1):
+            insert_ignore(session, TestCaseResult.__table__, [{
+                "test_run_id": run,
+                "test_case_id": case,
+                "result": "Fail" if rng.random() < 0.05 else "Pass",
+                "comment": f"Result {run}/{case}",
+                "logs_size": 0,
+                "created_at": now,
+            } for case in range(1, cases + 1)])
+        session.commit()
+    return runs * cases
+
+
+def main():
+    results = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    cases = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = scratch_engine(os.path.join(tmp, "bench.db"))
+        print(f"{fill(engine, results, cases)} results\n")
+        pool = pa.default_memory_pool()
+        for format in ["parquet", "arrow"]:
+            path = os.path.join(tmp, f"results.{format}")
+            started = time.perf_counter()
+            with Session(engine) as session:
+                rows = write_export(session, path, "test_case_results", format)
+            elapsed = time.perf_counter() - started
+            # Again with tracemalloc, which slows allocations down too much to time them together
+            tracemalloc.start()
+            with Session(engine) as session:
+                write_export(session, path, "test_case_results", format)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{format:<8} {rows} rows in {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s), "
+                  f"{os.path.getsize(path) / 1024 / 1024:.1f} MB, peak heap {peak / 1024 / 1024:.0f} MB, "
+                  f"peak Arrow memory {pool.max_memory() / 1024 / 1024:.0f} MB")
+
+        allocated = pool.bytes_allocated()
+        started = time.perf_counter()
+        with pa.memory_map(os.path.join(tmp, "results.arrow")) as source:
+            table = pa.ipc.open_file(source).read_all()
+            print(f"\nmemory-mapped {table.num_rows} rows in {(time.perf_counter() - started) * 1000:.0f} ms, "
+                  f"{(pool.bytes_allocated() - allocated) / 1024 / 1024:.0f} MB copied")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
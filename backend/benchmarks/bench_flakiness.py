@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Cost of building and refreshing the test case flakiness table.
+
+Fills a scratch SQLite database with runs of ``cases`` results each, a few
+percent of the cases flaky, then times the first refresh, which folds in
+every result, against the refresh after one more run arrived, which only
+reads the results of the cases of that run from their newest stored run on.
+
+Usage: python benchmarks/bench_flakiness.py [cases] [runs]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlmodel import Session
+
+from common import scratch_engine
+
+from app.db.upsert import insert_ignore
+from app.models import TestCase, TestCaseResult, TestRun, TestSuite
+from app.reports.flakiness import mark_flakiness, refresh_flakiness
+
+
+def add_run(session, rng, cases, flaky):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.flush()
+    rows = [{
+        "test_run_id": test_run.id,
+        "test_case_id": case,
+        "result": "Fail" if rng.random() < (0.3 if case in flaky else 0.01) else "Pass",
+        "logs_size": 0,
+    } for case in range(1, cases + 1)]
+    insert_ignore(session, TestCaseResult.__table__, rows)
+    mark_flakiness(session, [(row["test_run_id"], row["test_case_id"]) for row in rows])
+    session.commit()
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = random.Random(cases)
+    flaky = {case for case in range(1, cases + 1) if rng.random() < 0.03}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = scratch_engine(os.path.join(tmp, "bench.db"))
+        with Session(engine) as session:
+            session.add(TestSuite(db_id=1, id="BENCH", name="Bench", format="json", version=1, version_string="1.0"))
+            insert_ignore(session, TestCase.__table__, [{
+                "case_id": f"TC{i:06d}", "title": f"Case {i}", "version": 1, "version_string": "1.0", "test_suite_id": "BENCH",
+            } for i in range(cases)])
+            for _ in range(runs):
+                add_run(session, rng, cases, flaky)
+            print(f"{cases} test cases, {runs} runs, {cases * runs} results, {len(flaky)} flaky cases\n")
+
+            started = time.perf_counter()
+            processed = refresh_flakiness(session)
+            session.commit()
+            print(f"first refresh:  {processed} results in {time.perf_counter() - started:.2f} s")
+
+            add_run(session, rng, cases, flaky)
+            started = time.perf_counter()
+            processed = refresh_flakiness(session)
+            session.commit()
+            print(f"after one run:  {processed} results in {time.perf_counter() - started:.2f} s")
+
+            started = time.perf_counter()
+            processed = refresh_flakiness(session)
+            print(f"nothing new:    {processed} results in {(time.perf_counter() - started) * 1000:.1f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cost of the test case history: keeping it up to date and reading it.
+
+Fills a scratch SQLite database with runs of ``cases`` results each and
+builds testcase_history from them, then times adding the outcomes of one
+more run, as an upload does, the sparkline rows of thousands of cases and
+the timeline of a single case.
+
+Usage: python benchmarks/bench_history.py [cases] [runs]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from common import scratch_engine
+
+from app.db.init_db import get_session
+from app.db.upsert import insert_ignore
+from app.main import app
+from app.models import TestCase, TestCaseResult, TestRun, TestSuite
+from app.reports.history import rebuild_history, record_history
+
+
+def add_run(session, rng, cases):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.flush()
+    rows = [{
+        "test_run_id": test_run.id,
+        "test_case_id": case,
+        "result": "Fail" if rng.random() < 0.05 else "Pass",
+        "comment": "Response time above the limit on the second attempt, see the attached logs",
+        "created_at": datetime.utcnow(),
+        "logs_size": 0,
+    } for case in range(1, cases + 1)]
+    insert_ignore(session, TestCaseResult.__table__, rows)
+    session.commit()
+    return rows
+
+
+def timed(client, label, url, params=None):
+    client.get(url, params=params)
+    started = time.perf_counter()
+    response = client.get(url, params=params)
+    print(f"{label:<28}{len(response.json())} rows in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = random.Random(cases)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = scratch_engine(os.path.join(tmp, "bench.db"))
+        with Session(engine) as session:
+            session.add(TestSuite(db_id=1, id="BENCH", name="Bench", format="json", version=1, version_string="1.0"))
+            insert_ignore(session, TestCase.__table__, [{
+                "case_id": f"TC{i:06d}", "title": f"Case {i}", "version": 1, "version_string": "1.0", "test_suite_id": "BENCH",
+            } for i in range(cases)])
+            for _ in range(runs):
+                add_run(session, rng, cases)
+            print(f"{cases} test cases, {runs} runs, {cases * runs} results\n")
+
+            started = time.perf_counter()
+            rebuild_history(session)
+            session.commit()
+            print(f"rebuild:        {time.perf_counter() - started:.2f} s")
+
+            # Results were inserted directly, so their outcomes are added here as the writer would
+            rows = add_run(session, rng, cases)
+            started = time.perf_counter()
+            record_history(session, [(row["test_run_id"], row["test_case_id"], row["result"], row["created_at"]) for row in rows])
+            session.commit()
+            print(f"one more run:   {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        client = TestClient(app)
+        ids = ",".join(str(rng.randint(1, cases)) for _ in range(1000))
+        timed(client, "sparklines, first 5000:", "/api/test-cases/history", {"limit": 5000})
+        timed(client, "sparklines, 1000 ids:", "/api/test-cases/history", {"ids": ids})
+        timed(client, "timeline, first page:", f"/api/test-cases/{cases // 2}/history")
+        timed(client, "timeline, up to 1000:", f"/api/test-cases/{cases // 2}/history", {"limit": 1000})
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
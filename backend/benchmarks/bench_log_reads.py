@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Time to read parts of a large stored log.
+
+Stores one synthetic log of the given size in a scratch SQLite database and
+times reading all of it, the last 200 lines (tail) and a 64 KiB byte range
+from the middle. Tail and range reads only decompress the chunks they need,
+so they should take about the same time whatever the log size.
+
+Usage: python benchmarks/bench_log_reads.py [size_mb ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlmodel import Session
+
+from common import LOG_LINE, scratch_engine
+
+from app.storage.logs import iter_log_range, store_logs, tail_offset
+
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5, 50]
+    print(f"{'log MB':>7} {'stored MB':>10} {'full ms':>8} {'tail ms':>8} {'range ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in sizes:
+            data = "".join(
+                f"{i:09d} {LOG_LINE}" for i in range(size_mb * 1024 * 1024 // (len(LOG_LINE) + 10))
+            ).encode()
+            engine = scratch_engine(os.path.join(tmp, f"bench_{size_mb}.db"))
+            with Session(engine) as session:
+                log_id = store_logs(session, [data]).popitem()[1]
+                session.commit()
+                stored = os.path.getsize(os.path.join(tmp, f"bench_{size_mb}.db")) / (1024 * 1024)
+                middle = len(data) // 2
+                full = timed(lambda: b"".join(iter_log_range(session, log_id)))
+                tail = timed(lambda: b"".join(iter_log_range(session, log_id, tail_offset(session, log_id, 200))))
+                part = timed(lambda: b"".join(iter_log_range(session, log_id, middle, middle + 64 * 1024)))
+            engine.dispose()
+            print(f"{size_mb:>7} {stored:>10.1f} {full:>8.1f} {tail:>8.1f} {part:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Query plans and times of filtered catalogue queries.
+
+Fills a scratch SQLite database with test cases spread over suites and
+results spread over runs, then calls the list endpoints with typical
+filters. For each call it prints the time and the SQLite query plan of the
+statements issued, which should SEARCH the tables using the indexes
+(ix_testcaseresult_history, ix_testcase_test_suite_id, ...)
+rather than SCAN them.
+
+Usage: python benchmarks/bench_query_plans.py [cases] [runs]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from common import scratch_engine
+
+from app.db.init_db import get_session
+from app.db.upsert import insert_ignore
+from app.main import app
+from app.models import TestCase, TestCaseResult, TestRun, TestSuite
+
+SUITES = ["UI", "API", "PERF", "SEC", "NET"]
+AREAS = ["Authentication", "Settings", "Network", "Firmware", "Audio", "Display"]
+
+REQUESTS = [
+    ("/api/test-cases/", {"test_suite_id": "SEC", "limit": 100}),
+    ("/api/test-cases/", {"test_suite_id": "API", "area": "Network", "is_challenged": "true"}),
+    ("/api/test-cases/", {"test_suite_id": "UI", "sort": "area,-version", "limit": 50}),
+    ("/api/test-case-results/", {"test_run_id": 7, "result": "Fail", "fields": "test_case_id,result"}),
+    ("/api/test-case-results/", {"test_case_id": 42, "sort": "-test_run_id", "fields": "test_run_id,result"}),
+    ("/api/test-case-results/", {"test_suite_id": "PERF", "result": "Fail", "limit": 100}),
+]
+
+
+def fill(engine, cases, runs):
+    rng = random.Random(cases)
+    with Session(engine) as session:
+        for db_id, suite in enumerate(SUITES, 1):
+            session.add(TestSuite(db_id=db_id, id=suite, name=suite, format="json", version=1, version_string="1.0"))
+        session.add_all([TestRun(status="Completed") for _ in range(runs)])
+        session.commit()
+        insert_ignore(session, TestCase.__table__, [{
+            "case_id": f"TC{i:06d}",
+            "title": f"Case {i}",
+            "version": 1,
+            "version_string": "1.0",
+            "test_suite_id": rng.choice(SUITES),
+            "area": rng.choice(AREAS),
+            "is_challenged": rng.random() < 0.05,
+        } for i in range(cases)])
+        for run in range(1, runs + 1):
+            insert_ignore(session, TestCaseResult.__table__, [{
+                "test_run_id": run,
+                "test_case_id": case,
+                "result": "Fail" if rng.random() < 0.1 else "Pass",
+                "logs_size": 0,
+            } for case in range(1, cases + 1)])
+        session.commit()
+        session.connection().exec_driver_sql("ANALYZE")
+        session.commit()
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = scratch_engine(os.path.join(tmp, "bench.db"))
+        fill(engine, cases, runs)
+        print(f"{cases} test cases, {runs} runs, {cases * runs} results\n")
+
+        statements = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        client = TestClient(app)
+        for url, params in REQUESTS:
+            client.get(url, params=params)
+            statements.clear()
+            started = time.perf_counter()
+            response = client.get(url, params=params)
+            elapsed = (time.perf_counter() - started) * 1000
+            query = "&".join(f"{key}={value}" for key, value in params.items())
+            print(f"GET {url}?{query}  ->  {len(response.json())} rows in {elapsed:.1f} ms")
+            with engine.connect() as conn:
+                for statement, parameters in list(statements):
+                    for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+                        print(f"    {row[-1]}")
+            print()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Time of test case searches over a large catalogue.
+
+Fills a scratch SQLite database with the given numbers of synthetic test
+cases and times a few searches through the API: a common word, a rare
+word, a short prefix and two words together. With the full-text index the
+times should stay in the milliseconds whatever the catalogue size.
+
+Usage: python benchmarks/bench_search.py [cases ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from common import scratch_engine
+
+from app.db.init_db import get_session
+from app.db.upsert import insert_ignore
+from app.main import app
+from app.models import TestCase, TestSuite
+
+TOPICS = (
+    "login logout password upload firmware reset settings network wifi bluetooth pairing display "
+    "brightness volume audio video playback record camera battery charging update install remove "
+    "account profile language timezone notification alarm calendar contact message call keyboard"
+).split()
+QUERIES = ["password", "calendar alarm", "blu", "firmware update"]
+
+
+def vocabulary(size=5000):
+    """Topic words plus filler words; pick with zipf() so few words are common, like real text."""
+    syllables = "ka lo mi ne ru sa te vi zo pa".split()
+    filler = [
+        "".join(syllables[(i // 10 ** k) % 10] for k in range(4))
+        for i in range(size - len(TOPICS))
+    ]
+    return TOPICS + filler
+
+
+def zipf(rng, words):
+    return words[min(int(rng.paretovariate(1.0)) - 1, len(words) - 1)]
+
+
+def fill(engine, cases):
+    rng = random.Random(cases)
+    words = vocabulary()
+    rng.shuffle(words)
+    with Session(engine) as session:
+        session.add(TestSuite(id="BENCH", name="Bench", format="json", version=1, version_string="1.0"))
+        session.commit()
+        for start in range(0, cases, 10000):
+            insert_ignore(session, TestCase.__table__, [{
+                "case_id": f"TC{i:06d}",
+                "title": " ".join(rng.sample(words, 4)),
+                "area": rng.choice(TOPICS),
+                "description": " ".join(zipf(rng, words) for _ in range(30)),
+                "steps": " ".join(zipf(rng, words) for _ in range(60)),
+                "version": 1,
+                "version_string": "1.0",
+                "test_suite_id": "BENCH",
+                "is_challenged": False,
+            } for i in range(start, min(start + 10000, cases))])
+        session.commit()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    print(f"{'cases':>8} " + " ".join(f"{query!r:>18}" for query in QUERIES))
+    with tempfile.TemporaryDirectory() as tmp:
+        for cases in sizes:
+            engine = scratch_engine(os.path.join(tmp, f"bench_{cases}.db"))
+            fill(engine, cases)
+
+            def get_session_override():
+                with Session(engine) as session:
+                    yield session
+
+            app.dependency_overrides[get_session] = get_session_override
+            client = TestClient(app)
+            times = []
+            for query in QUERIES:
+                client.get("/api/test-cases/search", params={"q": query})
+                started = time.perf_counter()
+                for _ in range(10):
+                    client.get("/api/test-cases/search", params={"q": query})
+                times.append((time.perf_counter() - started) * 100)
+            app.dependency_overrides.clear()
+            engine.dispose()
+            print(f"{cases:>8} " + " ".join(f"{ms:>15.1f} ms" for ms in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Response times of pass rate trends.
+
+Fills a scratch SQLite database with ``runs`` runs of ``cases`` results
+each, spread over the last ``days`` days, then times the daily and weekly
+trends read from the result_trend rollup against counting the same daily
+figures from the results joined to their runs.
+
+Usage: python benchmarks/bench_trends.py [cases] [runs] [days]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from common import scratch_engine
+
+from app.db.init_db import get_session
+from app.db.upsert import insert_ignore
+from app.main import app
+from app.models import TestCase, TestCaseResult, TestRun, TestSuite
+from app.reports.stats import rebuild_stats
+
+
+def fill(engine, cases, runs, days):
+    rng = random.Random(cases)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        for suite in ["UI", "API", "PERF"]:
+            session.add(TestSuite(db_id=len(suite), id=suite, name=suite, format="json", version=1, version_string="1.0"))
+        session.add_all([
+            TestRun(status="Completed", created_at=now - timedelta(days=days * (runs - run) / runs)) for run in range(runs)
+        ])
+        session.commit()
+        insert_ignore(session, TestCase.__table__, [{
+            "case_id": f"TC{i:06d}",
+            "title": f"Case {i}",
+            "version": 1,
+            "version_string": "1.0",
+            "test_suite_id": ["UI", "API", "PERF"][i % 3],
+            "area": f"Area {i % 20}",
+        } for i in range(cases)])
+        for run in range(1, runs + 1):
+            insert_ignore(session, TestCaseResult.__table__, [{
+                "test_run_id": run,
+                "test_case_id": case,
+                "result": "Fail" if rng.random() < 0.05 else "Pass",
+                "logs_size": 0,
+            } for case in range(1, cases + 1)])
+        # Results were inserted directly; rebuilding the statistics rebuilds the trends too
+        started = time.perf_counter()
+        rebuild_stats(session)
+        session.commit()
+        print(f"rebuild statistics and trends: {time.perf_counter() - started:.2f} s\n")
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 90
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = scratch_engine(os.path.join(tmp, "bench.db"))
+        print(f"{cases} test cases, {runs} runs over {days} days, {cases * runs} results")
+        fill(engine, cases, runs, days)
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        client = TestClient(app)
+        for params in [{}, {"period": "week"}, {"group_by": "test_suite_id,area"}]:
+            client.get("/api/reports/trends", params=params)
+            started = time.perf_counter()
+            points = client.get("/api/reports/trends", params=params).json()
+            print(f"GET /api/reports/trends {params}: {len(points)} points in {(time.perf_counter() - started) * 1000:.0f} ms")
+        app.dependency_overrides.clear()
+
+        with Session(engine) as session:
+            started = time.perf_counter()
+            rows = session.exec(
+                select(func.date(TestRun.created_at), TestCaseResult.result, func.count())
+                .join(TestRun, TestRun.id == TestCaseResult.test_run_id)
+                .group_by(func.date(TestRun.created_at), TestCaseResult.result)
+            ).all()
+            print(f"counted from the results: {len(rows)} rows in {(time.perf_counter() - started) * 1000:.0f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the upload path versus result file size.
+
+Generates synthetic result files of increasing size and reports the peak
+Python heap (tracemalloc) for the old approach (read + decode + json.loads)
+and for the streaming parser writing into a scratch SQLite database. The
+streaming column should stay flat while the old one grows with the file.
+
+Usage: python benchmarks/bench_upload_memory.py [size_mb ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import generate_results_file, ingest_file
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+def load_whole(path):
+    with open(path, "rb") as f:
+        content = f.read()
+    data = json.loads(content.decode())
+    return len(data["test_case_results"])
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [8, 32, 128]
+    print(f"{'file MB':>8} {'results':>8} {'json.loads peak MB':>19} {'streaming peak MB':>18} {'streaming s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in sizes:
+            path = os.path.join(tmp, f"results_{size_mb}.json")
+            db_path = os.path.join(tmp, f"bench_{size_mb}.db")
+            rows = generate_results_file(path, size_mb)
+            legacy_peak, _ = measure(lambda: load_whole(path))
+            stream_peak, stream_time = measure(lambda: ingest_file(path, db_path))
+            print(f"{size_mb:>8} {rows:>8} {legacy_peak:>19.1f} {stream_peak:>18.1f} {stream_time:>12.2f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Ingest throughput of the upload path in rows per second.
+
+Uploads synthetic result files with a growing number of results into a
+scratch SQLite database and reports rows/s together with the number of SQL
+statements issued. With set-based resolution the statement count grows with
+the number of batches, not with the number of rows.
+
+Usage: python benchmarks/bench_upload_throughput.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from common import generate_results_file, ingest_file
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [2000, 20000, 100000]
+
+    statements = 0
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    print(f"{'results':>8} {'seconds':>8} {'rows/s':>10} {'statements':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"results_{rows}.json")
+            db_path = os.path.join(tmp, f"bench_{rows}.db")
+            generate_results_file(path, rows=rows, log_lines=5)
+            statements = 0
+            started = time.perf_counter()
+            ingest_file(path, db_path)
+            elapsed = time.perf_counter() - started
+            print(f"{rows:>8} {elapsed:>8.2f} {rows / elapsed:>10.0f} {statements:>11}")
+
+
+if __name__ == "__main__":
+    main()
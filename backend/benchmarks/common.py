@@ -0,0 +1,82 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openpyxl import Workbook
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.ingest.formats import iter_file_records
+from app.ingest.writer import UploadWriter
+from app.models import TestRun
+
+LOG_LINE = "2025-03-04T10:15:00 step completed, response time 123ms, no errors detected\n"
+
+
+def generate_results_file(path, size_mb=None, log_lines=40, rows=None, cases=1000):
+    """
+    Write a results document of roughly ``size_mb`` megabytes, or with
+    exactly ``rows`` results. Returns the number of results written.
+    """
+    target = size_mb * 1024 * 1024 if size_mb else float("inf")
+    logs = LOG_LINE * log_lines
+    written = 0
+    with open(path, "w") as f:
+        f.write('{"test_suites": [{"id": "BENCH", "name": "Bench", "format": "json", "version": 1, "version_string": "1.0"}],\n')
+        f.write('"test_cases": [' + ", ".join(
+            json.dumps({"case_id": f"TC{i:04d}", "title": f"Case {i}", "test_suite_id": "BENCH"}) for i in range(cases)
+        ) + '],\n"test_case_results": [\n')
+        i = 0
+        while written < target and (rows is None or i < rows):
+            row = json.dumps({
+                "test_case_id": f"TC{i % cases:04d}",
+                "result": "Pass" if i % 7 else "Fail",
+                "comment": f"Result {i}",
+                "logs": logs,
+            })
+            if i:
+                f.write(",\n")
+            f.write(row)
+            written += len(row)
+            i += 1
+        f.write("\n]}\n")
+    return i
+
+
+def generate_results_workbook(path, rows, log_lines=40, cases=1000):
+    """Write an Excel workbook with the same content as generate_results_file."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Test Cases")
+    sheet.append(["Case ID", "Title", "Test Suite"])
+    for i in range(cases):
+        sheet.append([f"TC{i:04d}", f"Case {i}", "BENCH"])
+    sheet = workbook.create_sheet("Results")
+    sheet.append(["Test Case", "Result", "Comment", "Logs"])
+    logs = LOG_LINE * log_lines
+    for i in range(rows):
+        sheet.append([f"TC{i % cases:04d}", "Pass" if i % 7 else "Fail", f"Result {i}", logs])
+    workbook.save(path)
+
+
+def scratch_engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def ingest_file(path, db_path):
+    """Upload one results file into a scratch SQLite database."""
+    engine = scratch_engine(db_path)
+    with Session(engine) as session:
+        test_run = TestRun(status="Completed")
+        session.add(test_run)
+        session.flush()
+        writer = UploadWriter(session, test_run.id)
+        for kind, item in iter_file_records(path, path):
+            writer.add(kind, item)
+        writer.flush()
+        session.commit()
+    engine.dispose()
@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.core.config import settings
+from app.main import app
+from app.db.init_db import get_session
+from app.ingest.jobs import ingest_queue
+
+
+# Create a test database
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+# Create a test client
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+# Process uploads inside the request so tests can check the outcome directly
+@pytest.fixture(name="inline_ingest")
+def inline_ingest_fixture(monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest_queue, "workers", 0)
+    monkeypatch.setattr(settings, "INGEST_SPOOL_DIR", str(tmp_path / "spool"))
+
+
+# Keep stored artifacts in a temporary directory
+@pytest.fixture(name="artifact_store")
+def artifact_store_fixture(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ARTIFACT_STORE_DIR", str(tmp_path / "artifacts"))
@@ -1,36 +1,10 @@
-import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel import Session
 
-from app.main import app
-from app.db.init_db import get_session
+from app.models.test_case import TestCase
 from app.models.test_suite import TestSuite
 
 
-# Create a test database
-@pytest.fixture(name="session")
-def session_fixture():
-    engine = create_engine(
-        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
-    )
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-
-
-# Create a test client
-@pytest.fixture(name="client")
-def client_fixture(session: Session):
-    def get_session_override():
-        return session
-
-    app.dependency_overrides[get_session] = get_session_override
-    client = TestClient(app)
-    yield client
-    app.dependency_overrides.clear()
-
-
 def test_create_test_suite(client: TestClient):
     response = client.post(
         "/api/test-suites/",
@@ -150,3 +124,24 @@ def test_delete_test_suite(client: TestClient, session: Session):
     # Verify it's deleted
     response = client.get("/api/test-suites/UI")
     assert response.status_code == 404
+
+
+def test_read_test_cases_unique_by_case_id(client: TestClient, session: Session):
+    session.add(TestSuite(id="UI", name="UI Test Suite", format="json", version=1, version_string="1.0"))
+    # Interleave versions so the oldest version of each case is not simply the first rows
+    for case_id, version in [("TC1", 1), ("TC2", 1), ("TC1", 2), ("TC3", 1), ("TC2", 2), ("TC1", 3), ("TC4", 1)]:
+        session.add(TestCase(
+            case_id=case_id,
+            title=f"{case_id} v{version}",
+            version=version,
+            version_string=f"{version}.0",
+            test_suite_id="UI",
+        ))
+        session.commit()
+
+    response = client.get("/api/test-cases/")
+    assert response.status_code == 200
+    assert [case["title"] for case in response.json()] == ["TC1 v1", "TC2 v1", "TC3 v1", "TC4 v1"]
+
+    response = client.get("/api/test-cases/?skip=1&limit=2")
+    assert [case["case_id"] for case in response.json()] == ["TC2", "TC3"]
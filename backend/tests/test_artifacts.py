@@ -0,0 +1,125 @@
+import io
+import os
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models.artifact import Artifact
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.storage.artifacts import artifact_path, store_artifact
+
+SCREENSHOT = bytes(range(256)) * 64
+
+
+def create_results(session: Session, count: int):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    results = [TestCaseResult(test_run_id=test_run.id, test_case_id=1, result="Fail") for _ in range(count)]
+    session.add_all(results)
+    session.commit()
+    return test_run, [result.id for result in results]
+
+
+def upload(client: TestClient, result_id: int, data: bytes, filename: str = "error_screenshot.png"):
+    return client.post(
+        f"/api/test-case-results/{result_id}/artifacts",
+        files={"file": (filename, data, "image/png")},
+    )
+
+
+def test_identical_artifacts_are_stored_once(client: TestClient, session: Session, artifact_store):
+    _, result_ids = create_results(session, 3)
+
+    for result_id in result_ids:
+        response = upload(client, result_id, SCREENSHOT)
+        assert response.status_code == 201
+        assert response.json()["size"] == len(SCREENSHOT)
+
+    artifact = session.exec(select(Artifact)).one()
+    assert artifact.content_type == "image/png"
+    with open(artifact_path(artifact.digest), "rb") as f:
+        assert f.read() == SCREENSHOT
+
+    listed = client.get(f"/api/test-case-results/{result_ids[0]}/artifacts").json()
+    assert [item["filename"] for item in listed] == ["error_screenshot.png"]
+    assert listed[0]["digest"] == artifact.digest
+
+
+def test_download_supports_range_and_etag(client: TestClient, session: Session, artifact_store):
+    _, (result_id,) = create_results(session, 1)
+    digest = upload(client, result_id, SCREENSHOT).json()["digest"]
+    url = f"/api/test-case-results/{result_id}/artifacts/error_screenshot.png"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == SCREENSHOT
+    assert response.headers["etag"] == f'"{digest}"'
+    assert response.headers["content-type"] == "image/png"
+
+    response = client.get(url, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == SCREENSHOT[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(SCREENSHOT)}"
+
+    response = client.get(url, headers={"If-None-Match": f'"{digest}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    assert client.get(f"/api/test-case-results/{result_id}/artifacts/missing.png").status_code == 404
+
+
+def test_unreferenced_artifacts_are_removed(client: TestClient, session: Session, artifact_store):
+    test_run, (first, second) = create_results(session, 2)
+    digest = upload(client, first, SCREENSHOT).json()["digest"]
+    upload(client, second, SCREENSHOT)
+    # Stored by a request that has not linked it yet
+    in_flight = store_artifact(session, io.BytesIO(b"not linked yet"))
+    session.commit()
+
+    # Still referenced by the second result
+    assert client.delete(f"/api/test-case-results/{first}/artifacts/error_screenshot.png").status_code == 204
+    assert os.path.exists(artifact_path(digest))
+
+    assert client.delete(f"/api/test-runs/{test_run.id}").status_code == 204
+    assert not os.path.exists(artifact_path(digest))
+    # Only the artifacts the delete unlinked were checked
+    assert session.exec(select(Artifact.digest)).all() == [in_flight.digest]
+
+
+def test_deleting_a_test_case_removes_its_artifacts(client: TestClient, session: Session, artifact_store):
+    session.add(TestCase(case_id="TC1", title="Login", version=1, version_string="1.0", test_suite_id="UI"))
+    session.commit()
+    _, (result_id,) = create_results(session, 1)
+    digest = upload(client, result_id, SCREENSHOT, "shot.png").json()["digest"]
+
+    assert client.delete("/api/test-cases/1").status_code == 204
+    assert not os.path.exists(artifact_path(digest))
+    assert session.exec(select(Artifact)).all() == []
+
+    # A new result reusing the id has no artifacts
+    _, (new_id,) = create_results(session, 1)
+    assert new_id == result_id
+    assert client.get(f"/api/test-case-results/{new_id}/artifacts").json() == []
+
+
+def test_compressed_download_has_weak_etag(client: TestClient, session: Session, artifact_store):
+    _, (result_id,) = create_results(session, 1)
+    text = b"step completed\n" * 1000
+    response = client.post(
+        f"/api/test-case-results/{result_id}/artifacts", files={"file": ("console.txt", text, "text/plain")},
+    )
+    digest = response.json()["digest"]
+    url = f"/api/test-case-results/{result_id}/artifacts/console.txt"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == text
+    assert response.headers["etag"] == f'W/"{digest}"'
+    assert client.get(url, headers={"If-None-Match": f'W/"{digest}"'}).status_code == 304
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == f'"{digest}"'
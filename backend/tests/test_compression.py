@@ -0,0 +1,91 @@
+import gzip
+import json
+
+import zstandard
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.compression import negotiate
+from app.core.config import settings
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+
+
+RESULTS = {"test_case_results": [{"test_case_id": f"TC{i:03d}", "result": "Pass", "logs": "ok\n" * 50} for i in range(40)]}
+
+
+def test_negotiate():
+    assert negotiate("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate("gzip;q=1.0, zstd;q=0") == "gzip"
+    assert negotiate("*") == "zstd"
+    assert negotiate("identity") is None
+    # The highest quality wins, ENCODINGS order only breaks ties
+    assert negotiate("zstd;q=0.5, gzip") == "gzip"
+    assert negotiate("gzip;q=0.8, zstd;q=0.8") == "zstd"
+    assert negotiate("*;q=0.5, gzip;q=0.9") == "gzip"
+    assert negotiate("gzip;q=0.5, identity") is None
+
+
+def test_upload_compressed_file(client: TestClient, session: Session, inline_ingest):
+
+    for filename, content in [
+        ("results.json.gz", gzip.compress(json.dumps(RESULTS).encode())),
+        ("results.json.zst", zstandard.ZstdCompressor().compress(json.dumps(RESULTS).encode())),
+    ]:
+        response = client.post("/api/test-runs/upload", files={"file": (filename, content, "application/octet-stream")})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "completed", job["error"]
+        results = session.exec(select(TestCaseResult).where(TestCaseResult.test_run_id == job["test_run_id"])).all()
+        assert len(results) == 40
+
+    response = client.post("/api/test-runs/upload", files={"file": ("results.xlsx.gz", b"", "application/gzip")})
+    assert response.status_code == 400
+
+
+def test_stream_with_content_encoding(client: TestClient, session: Session):
+    body = "\n".join(json.dumps(result) for result in RESULTS["test_case_results"]).encode()
+    response = client.post(
+        "/api/test-runs/stream",
+        content=zstandard.ZstdCompressor().compress(body),
+        headers={"Content-Encoding": "zstd"},
+    )
+    assert response.status_code == 201
+    assert response.json()["rows_parsed"] == 40
+
+    response = client.post("/api/test-runs/stream", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+    response = client.post("/api/test-runs/stream", content=body, headers={"Content-Encoding": "br"})
+    assert response.status_code == 415
+
+
+def test_stream_decompressed_size_is_limited(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_MAX_DECOMPRESSED_SIZE", 64 * 1024)
+    body = "\n".join(json.dumps(result) for result in RESULTS["test_case_results"]).encode()
+    bomb = body + b" " * (10 * 1024 * 1024)
+
+    for encoding, compress in [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)]:
+        response = client.post("/api/test-runs/stream", content=compress(bomb), headers={"Content-Encoding": encoding})
+        assert response.status_code == 413
+        response = client.post("/api/test-runs/stream", content=compress(body), headers={"Content-Encoding": encoding})
+        assert response.status_code == 201
+
+
+def test_response_compression(client: TestClient, session: Session):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    for i in range(40):
+        session.add(TestCaseResult(test_run_id=test_run.id, test_case_id=i + 1, result="Pass", comment="ok\n" * 50))
+    session.commit()
+
+    for encoding in ("zstd", "gzip"):
+        response = client.get("/api/test-case-results/", headers={"Accept-Encoding": encoding})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == encoding
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 40
+
+    response = client.get("/api/test-case-results/?limit=1", headers={"Accept-Encoding": "zstd"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.test_case import TestCase
+from app.models.test_run import TestRun
+
+
+def setup_runs(client: TestClient, session: Session, runs):
+    """One run per list of results, by test case: None leaves the case out."""
+    for case_id in ["TC1", "TC2", "TC3", "TC4", "TC5", "TC6"]:
+        session.add(TestCase(case_id=case_id, title=case_id, version=1, version_string="1.0", test_suite_id="UI"))
+    session.add_all([TestRun(status="Completed") for _ in runs])
+    session.commit()
+    for test_run_id, results in enumerate(runs, 1):
+        for test_case_id, result in enumerate(results, 1):
+            if result is not None:
+                client.post("/api/test-case-results/", json={
+                    "test_run_id": test_run_id, "test_case_id": test_case_id, "result": result,
+                })
+
+
+def statuses(diff):
+    return {entry["case_id"]: entry["status"] for entry in diff["entries"]}
+
+
+def test_diff_two_runs(client: TestClient, session: Session):
+    setup_runs(client, session, [
+        ["Pass", "Fail", "Fail", "Pass", "Blocked", None],
+        ["Fail", "Pass", "failed", "Pass", None, "Pass"],
+    ])
+
+    diff = client.get("/api/test-runs/1/diff/2").json()
+    assert (diff["test_run_id"], diff["base_test_run_ids"]) == (2, [1])
+    assert diff["counts"] == {
+        "newly_failing": 1, "newly_passing": 1, "still_failing": 1, "added": 1, "removed": 1, "unchanged": 1,
+    }
+    assert statuses(diff) == {
+        "TC1": "newly_failing", "TC2": "newly_passing", "TC3": "still_failing", "TC5": "removed", "TC6": "added",
+    }
+    assert diff["entries"][0] == {
+        "test_case_id": 1, "case_id": "TC1", "title": "TC1", "status": "newly_failing",
+        "base_result": "Pass", "base_test_run_id": 1, "result": "Fail",
+    }
+
+    diff = client.get("/api/test-runs/1/diff/2", params={"statuses": "unchanged,removed"}).json()
+    assert statuses(diff) == {"TC4": "unchanged", "TC5": "removed"}
+
+    assert client.get("/api/test-runs/1/diff/2", params={"statuses": "broken"}).status_code == 400
+    assert client.get("/api/test-runs/1/diff/99").status_code == 404
+
+
+def test_diff_pages(client: TestClient, session: Session):
+    setup_runs(client, session, [["Pass"] * 6, ["Fail"] * 6])
+
+    response = client.get("/api/test-runs/1/diff/2", params={"limit": 4})
+    assert [entry["test_case_id"] for entry in response.json()["entries"]] == [1, 2, 3, 4]
+    response = client.get("/api/test-runs/1/diff/2", params={"limit": 4, "cursor": response.headers["X-Next-Cursor"]})
+    assert [entry["test_case_id"] for entry in response.json()["entries"]] == [5, 6]
+    assert response.json()["counts"]["newly_failing"] == 6
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_diff_against_last_runs(client: TestClient, session: Session):
+    setup_runs(client, session, [
+        ["Fail", "Pass", "Pass", None, None, None],
+        ["Pass", None, "Fail", "Pass", None, None],
+        [None, None, None, "Fail", None, None],
+        ["Fail", "Fail", "Fail", "Fail", "Pass", None],
+    ])
+
+    # The baseline is the latest result of each case over runs 3, 2 and 1
+    diff = client.get("/api/test-runs/4/diff", params={"last": 3}).json()
+    assert diff["base_test_run_ids"] == [3, 2, 1]
+    assert statuses(diff) == {"TC1": "newly_failing", "TC2": "newly_failing", "TC3": "still_failing", "TC4": "still_failing", "TC5": "added"}
+    assert [entry["base_test_run_id"] for entry in diff["entries"]] == [2, 1, 2, 3, None]
+
+    diff = client.get("/api/test-runs/4/diff", params={"last": 1}).json()
+    assert diff["counts"]["still_failing"] == 1 and diff["counts"]["added"] == 4
+
+    diff = client.get("/api/test-runs/1/diff").json()
+    assert diff["base_test_run_ids"] == [] and diff["counts"]["added"] == 3
@@ -0,0 +1,76 @@
+import io
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.test_case import TestCase
+from app.models.test_run import TestRun
+from app.reports.export import write_export
+
+
+def setup_results(client: TestClient, session: Session):
+    session.add(TestCase(case_id="TC1", title="Login", version=1, version_string="1.0", test_suite_id="UI", is_challenged=True))
+    session.add(TestCase(case_id="TC2", title="Orders", version=1, version_string="1.0", test_suite_id="API"))
+    session.add(TestRun(status="Completed", created_at=datetime(2025, 3, 1)))
+    session.add(TestRun(status="Completed", created_at=datetime(2025, 3, 8)))
+    session.commit()
+    for test_run_id in (1, 2):
+        for test_case_id, result in [(1, "Pass"), (2, "Fail")]:
+            client.post("/api/test-case-results/", json={
+                "test_run_id": test_run_id, "test_case_id": test_case_id, "result": result,
+                "logs": f"log of run {test_run_id}" if test_case_id == 2 else None,
+            })
+
+
+def export(client: TestClient, table: str, **params) -> pa.Table:
+    response = client.get(f"/api/exports/{table}", params=params)
+    assert response.status_code == 200
+    if params.get("format") == "arrow":
+        return pa.ipc.open_file(pa.py_buffer(response.content)).read_all()
+    return pq.read_table(io.BytesIO(response.content))
+
+
+def test_export_tables(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 3)
+    setup_results(client, session)
+
+    results = export(client, "test_case_results")
+    assert results.column_names[0] == "id" and "logs" not in results.column_names
+    assert results.column("result").to_pylist() == ["Pass", "Fail", "Pass", "Fail"]
+    assert results.schema.field("created_at").type == pa.timestamp("us")
+    # One row group per batch
+    response = client.get("/api/exports/test_case_results")
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert pq.ParquetFile(io.BytesIO(response.content)).num_row_groups == 2
+
+    cases = export(client, "test_cases", format="arrow")
+    assert cases.column("case_id").to_pylist() == ["TC1", "TC2"]
+    assert cases.column("is_challenged").to_pylist() == [True, False]
+    runs = export(client, "test_runs", format="arrow")
+    assert runs.column("created_at").to_pylist() == [datetime(2025, 3, 1), datetime(2025, 3, 8)]
+
+
+def test_export_filters_and_logs(client: TestClient, session: Session):
+    setup_results(client, session)
+
+    results = export(client, "test_case_results", since="2025-03-05", test_suite_id="API", logs=True, format="arrow")
+    assert results.column("test_run_id").to_pylist() == [2]
+    assert results.column("logs").to_pylist() == ["log of run 2"]
+    assert export(client, "test_runs", until="2025-03-05").column("id").to_pylist() == [1]
+    assert export(client, "test_runs", test_suite_id="UI").column("id").to_pylist() == [1, 2]
+    assert export(client, "test_cases", test_suite_id="DOCS").num_rows == 0
+
+    assert client.get("/api/exports/operators").status_code == 404
+    assert client.get("/api/exports/test_runs", params={"format": "csv"}).status_code == 400
+
+
+def test_write_export(client: TestClient, session: Session, tmp_path):
+    setup_results(client, session)
+    path = tmp_path / "results.arrow"
+    assert write_export(session, str(path), "test_case_results", "arrow", batch_size=3) == 4
+    with pa.memory_map(str(path)) as source:
+        assert pa.ipc.open_file(source).read_all().column("test_case_id").to_pylist() == [1, 2, 1, 2]
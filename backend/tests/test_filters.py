@@ -0,0 +1,64 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.models.test_suite import TestSuite
+
+
+def setup_catalogue(session: Session):
+    session.add(TestSuite(db_id=1, id="UI", name="UI", format="json", version=1, version_string="1.0"))
+    session.add(TestSuite(db_id=2, id="API", name="API", format="json", version=1, version_string="1.0"))
+    for case_id, suite, area, author, challenged in [
+        ("TC1", "UI", "Login", "ann", False),
+        ("TC2", "API", "Login", "bob", True),
+        ("TC3", "UI", "Audio", "bob", False),
+        ("TC4", "UI", "Login", "bob", False),
+    ]:
+        session.add(TestCase(
+            case_id=case_id, title=case_id, version=1, version_string="1.0",
+            test_suite_id=suite, area=area, author=author, is_challenged=challenged,
+        ))
+    session.add_all([TestRun(status="Completed"), TestRun(status="Completed")])
+    session.commit()
+    for test_run_id, results in [(1, ["Pass", "Fail", "Pass", "Fail"]), (2, ["Pass", "Pass", "Blocked", "Fail"])]:
+        for test_case_id, result in enumerate(results, 1):
+            session.add(TestCaseResult(test_run_id=test_run_id, test_case_id=test_case_id, result=result))
+    session.commit()
+
+
+def case_ids(client: TestClient, **params):
+    response = client.get("/api/test-cases/", params=params)
+    assert response.status_code == 200
+    return [case["case_id"] for case in response.json()]
+
+
+def test_filter_and_sort_test_cases(client: TestClient, session: Session):
+    setup_catalogue(session)
+
+    assert case_ids(client, test_suite_id="UI") == ["TC1", "TC3", "TC4"]
+    assert case_ids(client, area="Login", author="bob") == ["TC2", "TC4"]
+    assert case_ids(client, is_challenged="true") == ["TC2"]
+    assert case_ids(client, sort="area,-author") == ["TC3", "TC2", "TC4", "TC1"]
+    assert case_ids(client, sort="-area,case_id", skip=1, limit=2) == ["TC2", "TC4"]
+
+    assert client.get("/api/test-cases/", params={"sort": "colour"}).status_code == 400
+    assert client.get("/api/test-cases/", params={"sort": "area", "cursor": "eyJhZnRlciI6IDF9"}).status_code == 400
+
+
+def test_filter_and_sort_results(client: TestClient, session: Session):
+    setup_catalogue(session)
+
+    def results(**params):
+        response = client.get("/api/test-case-results/", params={"fields": "test_run_id,test_case_id", **params})
+        assert response.status_code == 200
+        return [(result["test_run_id"], result["test_case_id"]) for result in response.json()]
+
+    assert results(result="Fail") == [(1, 2), (1, 4), (2, 4)]
+    assert results(result="Fail,Blocked", test_run_id=2) == [(2, 3), (2, 4)]
+    assert results(test_suite_id="API") == [(1, 2), (2, 2)]
+    assert results(area="Audio") == [(1, 3), (2, 3)]
+    assert results(test_case_id=4, sort="-test_run_id") == [(2, 4), (1, 4)]
+    assert results(since="2000-01-01T00:00:00", result="Blocked") == [(2, 3)]
+    assert results(until="2000-01-01T00:00:00") == []
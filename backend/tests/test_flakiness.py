@@ -0,0 +1,131 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.test_case import TestCase
+from app.models.test_case_flakiness import TestCaseFlakiness
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.reports.flakiness import flakiness_row, mark_flakiness, rebuild_flakiness
+from app.reports.stats import counted
+
+
+def add_runs(client: TestClient, session: Session, runs):
+    """One new run per list of results, by test case id: None leaves the case out."""
+    for results in runs:
+        test_run = TestRun(status="Completed")
+        session.add(test_run)
+        session.commit()
+        for test_case_id, result in enumerate(results, 1):
+            if result is not None:
+                client.post("/api/test-case-results/", json={
+                    "test_run_id": test_run.id, "test_case_id": test_case_id, "result": result,
+                })
+
+
+def refresh(client: TestClient) -> int:
+    return client.post("/api/test-cases/flakiness/refresh").json()["results_processed"]
+
+
+def outcomes(session: Session):
+    session.expire_all()
+    return {row.test_case_id: row.outcomes for row in session.exec(select(TestCaseFlakiness))}
+
+
+def setup_cases(session: Session):
+    for case_id in ["TC1", "TC2", "TC3"]:
+        session.add(TestCase(case_id=case_id, title=case_id, version=1, version_string="1.0", test_suite_id="UI"))
+    session.commit()
+
+
+def test_flakiness_row():
+    row = flakiness_row(1, "PFOFPPF", 7, 70)
+    assert (row["runs"], row["failures"], row["flips"]) == (7, 3, 3)
+    assert (row["failure_rate"], row["flip_rate"]) == (0.4286, 0.6)
+    assert flakiness_row(1, "", None, 0)["flip_rate"] == 0.0
+
+
+def test_refresh_is_incremental(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "FLAKINESS_WINDOW", 4)
+    setup_cases(session)
+    add_runs(client, session, [["Pass", "Pass", "Fail"], ["Fail", "Pass", "Fail"], ["Pass", None, "Blocked"]])
+
+    assert refresh(client) == 8
+    assert outcomes(session) == {1: "PFP", 2: "PP", 3: "FFO"}
+    assert refresh(client) == 0
+
+    # The changed cases are read from their newest stored run on; the window keeps the latest 4 runs
+    add_runs(client, session, [["Fail", "Pass", "Pass"], ["Pass", "Fail", None]])
+    assert refresh(client) == 10
+    assert outcomes(session) == {1: "FPFP", 2: "PPPF", 3: "FFOP"}
+
+    # A later result of the newest run replaces its outcome
+    client.post("/api/test-case-results/", json={"test_run_id": 5, "test_case_id": 2, "result": "Pass"})
+    assert refresh(client) == 2
+    assert outcomes(session)[2] == "PPPP"
+
+    incremental = outcomes(session)
+    rebuild_flakiness(session, window=4)
+    assert outcomes(session) == incremental
+
+
+def test_read_flakiness(client: TestClient, session: Session):
+    setup_cases(session)
+    add_runs(client, session, [
+        ["Pass", "Pass", "Fail"], ["Fail", "Pass", "Fail"], ["Pass", "Pass", "Fail"],
+        ["Fail", "Pass", "Pass"], ["Fail", "Pass", "Fail"],
+    ])
+    refresh(client)
+
+    flaky = client.get("/api/test-cases/flakiness").json()
+    assert [(row["case_id"], row["outcomes"], row["flips"]) for row in flaky] == [("TC1", "PFPFF", 3), ("TC3", "FFFPF", 2)]
+    assert flaky[0]["flip_rate"] == 0.75 and flaky[0]["failure_rate"] == 0.6
+
+    assert client.get("/api/test-cases/flakiness", params={"min_runs": 6}).json() == []
+    flaky = client.get("/api/test-cases/flakiness", params={"min_flips": 0, "sort": "-failure_rate"}).json()
+    assert [row["case_id"] for row in flaky] == ["TC3", "TC1", "TC2"]
+    assert client.get("/api/test-cases/flakiness", params={"sort": "nope"}).status_code == 400
+
+    assert client.get("/api/test-cases/2/flakiness").json()["outcomes"] == "PPPPP"
+    assert client.get("/api/test-cases/99/flakiness").status_code == 404
+
+
+def test_refresh_after_deleting_runs(client: TestClient, session: Session):
+    setup_cases(session)
+    add_runs(client, session, [["Pass", "Pass", "Pass"], ["Fail", "Fail", "Fail"]])
+    refresh(client)
+
+    # The newest results are gone, so their ids may be handed out again
+    client.delete("/api/test-runs/2")
+    add_runs(client, session, [["Pass", None, None]])
+    assert refresh(client) == 3
+    assert outcomes(session) == {1: "PP", 2: "P", 3: "P"}
+
+
+def test_refresh_after_late_commits_and_changes(client: TestClient, session: Session):
+    setup_cases(session)
+    add_runs(client, session, [["Pass", "Pass", "Pass"], ["Pass", "Pass", "Pass"]])
+    refresh(client)
+
+    # A slower transaction commits a lower id after a refresh has seen a higher one
+    session.add(TestRun(status="Completed"))
+    session.add(TestRun(status="Completed"))
+    session.commit()
+    for id, test_run_id in [(20, 4), (10, 3)]:
+        result = TestCaseResult(id=id, test_run_id=test_run_id, test_case_id=1, result="Fail")
+        session.add(result)
+        mark_flakiness(session, [counted(result)])
+        session.commit()
+        refresh(client)
+    assert outcomes(session)[1] == "PPFF"
+
+    # Changed and deleted results of older runs are taken into account too
+    client.patch("/api/test-case-results/1", json={"result": "Fail"})
+    client.delete("/api/test-cases/3")
+    client.delete("/api/test-runs/2")
+    refresh(client)
+    assert outcomes(session) == {1: "FFF", 2: "P"}
+
+    incremental = outcomes(session)
+    rebuild_flakiness(session)
+    assert outcomes(session) == incremental
@@ -0,0 +1,105 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.api.pagination import encode_cursor
+from app.core.config import settings
+from app.models.test_case import TestCase
+from app.models.test_case_history import TestCaseHistory
+from app.models.test_run import TestRun
+from app.reports.history import rebuild_history
+
+
+def add_runs(client: TestClient, session: Session, runs):
+    """One new run per list of results, by test case id: None leaves the case out."""
+    for results in runs:
+        test_run = TestRun(status="Completed")
+        session.add(test_run)
+        session.commit()
+        for test_case_id, result in enumerate(results, 1):
+            if result is not None:
+                client.post("/api/test-case-results/", json={
+                    "test_run_id": test_run.id, "test_case_id": test_case_id, "result": result,
+                    "comment": f"run {test_run.id}",
+                })
+
+
+def outcomes(session: Session):
+    session.expire_all()
+    return {row.test_case_id: row.outcomes for row in session.exec(select(TestCaseHistory))}
+
+
+def setup_cases(session: Session):
+    for case_id in ["TC1", "TC2", "TC3"]:
+        session.add(TestCase(case_id=case_id, title=case_id, version=1, version_string="1.0", test_suite_id="UI"))
+    session.commit()
+
+
+def test_history_follows_results(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_OUTCOMES", 3)
+    setup_cases(session)
+    add_runs(client, session, [["Pass", "Pass", "Fail"], ["Fail", "Pass", "Fail"], ["Pass", None, "Blocked"]])
+    assert outcomes(session) == {1: "PFP", 2: "PP", 3: "FFO"}
+
+    # The oldest outcome drops out; a later result of the newest run replaces its outcome
+    add_runs(client, session, [["Fail", "Pass", "Pass"]])
+    client.post("/api/test-case-results/", json={"test_run_id": 4, "test_case_id": 1, "result": "Pass"})
+    assert outcomes(session) == {1: "FPP", 2: "PPP", 3: "FOP"}
+
+    # Changed and deleted results are recomputed from the remaining ones
+    client.patch("/api/test-case-results/1", json={"result": "Fail"})
+    client.delete("/api/test-runs/4")
+    assert outcomes(session) == {1: "FFP", 2: "PP", 3: "FFO"}
+    client.delete("/api/test-cases/2")
+    assert 2 not in outcomes(session)
+
+    incremental = outcomes(session)
+    assert rebuild_history(session) == 2
+    assert outcomes(session) == incremental
+
+
+def test_history_follows_uploads(client: TestClient, session: Session, inline_ingest):
+    for results in [["Fail", "Pass"], ["Pass", "Skip"]]:
+        upload = {
+            "test_cases": [{"case_id": "TC1", "title": "Login", "test_suite_id": "UI"}],
+            "test_case_results": [{"test_case_id": "TC1", "result": result} for result in results],
+        }
+        response = client.post("/api/test-runs/upload", files={"file": ("results.json", json.dumps(upload), "application/json")})
+        assert response.json()["status"] == "completed"
+
+    # One outcome per run, the one of its last result
+    assert outcomes(session) == {1: "PO"}
+
+
+def test_read_histories(client: TestClient, session: Session):
+    setup_cases(session)
+    add_runs(client, session, [["Pass", "Fail", None], ["Fail", "Fail", None]])
+
+    rows = client.get("/api/test-cases/history").json()
+    assert [(row["test_case_id"], row["outcomes"], row["last_test_run_id"]) for row in rows] == [(1, "PF", 2), (2, "FF", 2)]
+    rows = client.get("/api/test-cases/history", params={"ids": "2,3"}).json()
+    assert [row["test_case_id"] for row in rows] == [2]
+    response = client.get("/api/test-cases/history", params={"limit": 1})
+    rows = client.get("/api/test-cases/history", params={"cursor": response.headers["X-Next-Cursor"]}).json()
+    assert [row["test_case_id"] for row in rows] == [2]
+    assert client.get("/api/test-cases/history", params={"test_suite_id": "API"}).json() == []
+    assert client.get("/api/test-cases/history", params={"ids": "1,x"}).status_code == 400
+
+
+def test_read_history_of_test_case(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_COMMENT_LENGTH", 4)
+    setup_cases(session)
+    add_runs(client, session, [["Pass"], ["Fail"], ["Pass"]])
+    client.post("/api/test-case-results/", json={"test_run_id": 2, "test_case_id": 1, "result": "Pass"})
+
+    response = client.get("/api/test-cases/1/history", params={"limit": 3})
+    entries = response.json()
+    assert [(entry["test_run_id"], entry["result"]) for entry in entries] == [(3, "Pass"), (2, "Pass"), (2, "Fail")]
+    assert entries[0]["comment"] == "run " and entries[0]["created_at"]
+
+    entries = client.get("/api/test-cases/1/history", params={"cursor": response.headers["X-Next-Cursor"]}).json()
+    assert [(entry["test_run_id"], entry["result"]) for entry in entries] == [(1, "Pass")]
+    assert client.get("/api/test-cases/99/history").status_code == 404
+    assert client.get("/api/test-cases/1/history", params={"cursor": "nope"}).status_code == 400
+    assert client.get("/api/test-cases/1/history", params={"cursor": encode_cursor([2, "x"])}).status_code == 400
@@ -0,0 +1,153 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.test_case import TestCase
+from app.models.test_case_log import TestCaseLog, TestCaseLogChunk
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.storage.logs import iter_log_range, store_logs
+
+LOG = "".join(f"{i:05d} step completed\n" for i in range(1000))
+
+
+def create_result(client: TestClient, test_run_id: int, logs: str):
+    response = client.post("/api/test-case-results/", json={
+        "test_run_id": test_run_id, "test_case_id": 1, "result": "Fail", "logs": logs,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_logs_are_stored_compressed_out_of_row(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_CHUNK_SIZE", 4096)
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+
+    first = create_result(client, test_run.id, LOG)
+    second = create_result(client, test_run.id, LOG)
+    assert first["logs_size"] == len(LOG)
+    assert first["logs_digest"] == second["logs_digest"]
+
+    # Identical logs are stored once, compressed in chunks
+    log = session.exec(select(TestCaseLog)).one()
+    chunks = session.exec(select(TestCaseLogChunk).where(TestCaseLogChunk.log_id == log.id)).all()
+    assert len(chunks) == len(LOG) // 4096 + 1
+    assert sum(len(chunk.data) for chunk in chunks) < len(LOG) / 4
+
+    response = client.get(f"/api/test-case-results/{first['id']}")
+    assert response.json()["logs"] == LOG
+    listed = client.get("/api/test-case-results/").json()
+    assert listed[0]["logs"] is None
+    assert listed[0]["logs_size"] == len(LOG)
+
+    # The log is removed with the last result that refers to it
+    client.delete(f"/api/test-case-results/{first['id']}")
+    assert session.exec(select(TestCaseLog)).all() != []
+    client.delete(f"/api/test-case-results/{second['id']}")
+    assert session.exec(select(TestCaseLog)).all() == []
+    assert session.exec(select(TestCaseLogChunk)).all() == []
+
+
+
+def test_logs_are_returned_in_lists_when_asked_for(client: TestClient, session: Session):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    create_result(client, test_run.id, "first log")
+    create_result(client, test_run.id, "")
+
+    run = client.get(f"/api/test-runs/{test_run.id}").json()
+    assert [result["logs_size"] for result in run["test_case_results"]] == [len("first log"), 0]
+    assert "logs" not in run["test_case_results"][0]
+    for params in ({"logs": True}, {"logs": True, "stream": True}):
+        run = client.get(f"/api/test-runs/{test_run.id}", params=params).json()
+        assert [result["logs"] for result in run["test_case_results"]] == ["first log", ""]
+
+    listed = client.get("/api/test-case-results/", params={"logs": True}).json()
+    assert [result["logs"] for result in listed] == ["first log", ""]
+    assert client.get("/api/test-case-results/", params={"logs": True, "fields": "id"}).status_code == 400
+
+
+def test_logs_are_removed_with_test_cases(client: TestClient, session: Session):
+    for case_id in ("TC1", "TC2"):
+        session.add(TestCase(case_id=case_id, title=case_id, version=1, version_string="1.0", test_suite_id="UI"))
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    create_result(client, test_run.id, "first log")
+    client.post("/api/test-case-results/", json={
+        "test_run_id": test_run.id, "test_case_id": 2, "result": "Fail", "logs": "second log",
+    })
+
+    assert client.delete("/api/test-cases/1").status_code == 204
+    assert [log.size for log in session.exec(select(TestCaseLog))] == [len("second log")]
+
+    assert client.delete("/api/test-cases/clear-all/").status_code == 204
+    assert session.exec(select(TestCaseLog)).all() == []
+    assert session.exec(select(TestCaseLogChunk)).all() == []
+
+def test_iter_log_range_reads_covering_chunks(session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_CHUNK_SIZE", 1000)
+    data = LOG.encode()
+    log_id = store_logs(session, [data]).popitem()[1]
+
+    assert b"".join(iter_log_range(session, log_id)) == data
+    assert b"".join(iter_log_range(session, log_id, 990, 2010)) == data[990:2010]
+    assert b"".join(iter_log_range(session, log_id, len(data) - 5)) == data[-5:]
+    assert b"".join(iter_log_range(session, log_id, len(data) + 5)) == b""
+
+
+def test_update_logs(client: TestClient, session: Session):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    result = create_result(client, test_run.id, "before")
+
+    response = client.patch(f"/api/test-case-results/{result['id']}", json={"logs": "after"})
+    assert response.status_code == 200
+    assert client.get(f"/api/test-case-results/{result['id']}").json()["logs"] == "after"
+    assert session.exec(select(TestCaseLog.size)).all() == [5]
+    assert session.get(TestCaseResult, result["id"]).logs_size == 5
+
+    # Only the logs a request detached are checked; one stored by an upload
+    # that has not written its results yet is left alone
+    store_logs(session, [b"upload in flight"])
+    session.commit()
+    assert client.patch(f"/api/test-case-results/{result['id']}", json={"result": "Pass"}).status_code == 200
+    assert client.patch(f"/api/test-case-results/{result['id']}", json={"logs": "again"}).status_code == 200
+    assert sorted(session.exec(select(TestCaseLog.size)).all()) == [5, len("upload in flight")]
+
+
+def test_log_endpoint_range_tail_and_grep(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_CHUNK_SIZE", 1000)
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    result = create_result(client, test_run.id, LOG)
+    url = f"/api/test-case-results/{result['id']}/logs"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.text == LOG
+    # The compressed response is another representation, so its tag is weak
+    assert response.headers["etag"] == f'W/"{result["logs_digest"]}"'
+    assert client.get(url, headers={"Accept-Encoding": "identity"}).headers["etag"] == f'"{result["logs_digest"]}"'
+
+    response = client.get(url, headers={"Range": "bytes=990-2009"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 990-2009/{len(LOG)}"
+    assert response.text == LOG[990:2010]
+    assert client.get(url, headers={"Range": "bytes=-21"}).text == "00999 step completed\n"
+    assert client.get(url, headers={"Range": f"bytes={len(LOG)}-"}).status_code == 416
+
+    lines = LOG.splitlines(keepends=True)
+    assert client.get(url, params={"tail": 3}).text == "".join(lines[-3:])
+    assert client.get(url, params={"tail": 5000}).text == LOG
+    assert client.get(url, params={"tail": 0}).text == ""
+
+    assert client.get(url, params={"grep": "^0099[0-9]"}).text == "".join(lines[990:])
+    assert client.get(url, params={"grep": "^001", "tail": 2}).text == "".join(lines[198:200])
+    assert client.get(url, params={"grep": "("}).status_code == 400
+    assert client.get("/api/test-case-results/999/logs").status_code == 404
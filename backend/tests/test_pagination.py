@@ -0,0 +1,123 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.api.pagination import encode_cursor
+from app.core.config import settings
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+
+
+def add_results(session: Session, count: int) -> TestRun:
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+    for i in range(count):
+        session.add(TestCaseResult(test_run_id=test_run.id, test_case_id=1, result="Pass", comment=f"Result {i}"))
+    session.commit()
+    return test_run
+
+
+def test_cursor_pagination_walks_every_row_once(client: TestClient, session: Session):
+    add_results(session, 7)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/test-case-results/", params=params)
+        assert response.status_code == 200
+        seen += [result["comment"] for result in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"Result {i}" for i in range(7)]
+
+
+def test_skip_limit_still_supported(client: TestClient, session: Session):
+    add_results(session, 5)
+
+    response = client.get("/api/test-case-results/", params={"skip": 2, "limit": 2})
+    assert [result["comment"] for result in response.json()] == ["Result 2", "Result 3"]
+
+    response = client.get("/api/test-case-results/", params={"skip": 4, "limit": 2})
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_test_runs_cursor(client: TestClient, session: Session):
+    for _ in range(3):
+        session.add(TestRun(status="Completed"))
+    session.commit()
+
+    first = client.get("/api/test-runs/", params={"limit": 2})
+    assert [run["id"] for run in first.json()] == [1, 2]
+    second = client.get("/api/test-runs/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [run["id"] for run in second.json()] == [3]
+
+
+def test_invalid_cursor(client: TestClient):
+    response = client.get("/api/test-suites/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+    # Well-formed cursors with a key of the wrong type
+    for key in ("5", {"id": 5}, True, None, [1, 2]):
+        response = client.get("/api/test-case-results/", params={"cursor": encode_cursor(key)})
+        assert response.status_code == 400, key
+    assert client.get("/api/test-case-results/", params={"cursor": encode_cursor(5)}).status_code == 200
+
+
+def test_stream_test_run(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_PAGE_SIZE", 2)
+    test_run = add_results(session, 5)
+
+    expected = client.get(f"/api/test-runs/{test_run.id}").json()["test_case_results"]
+    response = client.get(f"/api/test-runs/{test_run.id}", params={"stream": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == test_run.id
+    assert data["status"] == "Completed"
+    assert data["test_case_results"] == expected
+
+    response = client.get(f"/api/test-runs/{test_run.id}", headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+    assert client.get("/api/test-runs/999", params={"stream": True}).status_code == 404
+
+
+def test_fields_projection(client: TestClient, session: Session):
+    add_results(session, 3)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(session.get_bind(), "before_cursor_execute", record)
+    response = client.get("/api/test-case-results/", params={"fields": "test_case_id,result", "limit": 2})
+    event.remove(session.get_bind(), "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": 1, "test_case_id": 1, "result": "Pass"},
+        {"id": 2, "test_case_id": 1, "result": "Pass"},
+    ]
+    assert "X-Next-Cursor" in response.headers
+    assert not any("comment" in statement for statement in statements)
+
+    assert client.get("/api/test-case-results/", params={"fields": "id,nope"}).status_code == 400
+
+
+def test_large_text_columns_are_deferred(session: Session):
+    add_results(session, 1)
+    session.expunge_all()
+
+    result = session.exec(select(TestCaseResult)).one()
+    assert "comment" not in result.__dict__
+    assert result.comment == "Result 0"
@@ -0,0 +1,89 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.ingest.json_stream import RESULT
+from app.ingest.writer import UploadWriter
+from app.models.test_case import TestCase
+from app.models.test_run import TestRun
+from app.models.test_suite import TestSuite
+
+ERROR_LOG = "opening login page\nERROR Element 'submit-button' not found after 30s\nclosing browser\n"
+
+
+def setup_runs(session: Session):
+    session.add(TestSuite(id="UI", name="UI Test Suite", format="json", version=1, version_string="1.0"))
+    session.add(TestCase(case_id="TC1", title="Login", version=1, version_string="1.0", test_suite_id="UI"))
+    runs = [TestRun(status="Completed"), TestRun(status="Completed")]
+    session.add_all(runs)
+    session.commit()
+    return [run.id for run in runs]
+
+
+def create_result(client: TestClient, test_run_id: int, **fields):
+    response = client.post("/api/test-case-results/", json={
+        "test_run_id": test_run_id, "test_case_id": 1, "result": "Fail", **fields,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def search(client: TestClient, q: str, **params):
+    response = client.get("/api/test-case-results/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_logs_and_comments(client: TestClient, session: Session):
+    first_run, second_run = setup_runs(session)
+    first = create_result(client, first_run, logs=ERROR_LOG)
+    second = create_result(client, second_run, logs=ERROR_LOG, comment="Flaky <submit> button")
+    create_result(client, second_run, logs="all steps passed\n")
+
+    matches = search(client, "submit-button not found")
+    assert [match["id"] for match in matches] == [first, second]
+    assert matches[0]["logs_snippet"] == "ERROR Element &#x27;<mark>submit</mark>-<mark>button</mark>&#x27; <mark>not</mark> <mark>found</mark> after 30s"
+    assert matches[0]["comment_snippet"] is None
+
+    # Comments are searched too, words match as prefixes
+    matches = search(client, "flak")
+    assert [match["id"] for match in matches] == [second]
+    assert matches[0]["comment_snippet"] == "<mark>Flaky</mark> &lt;submit&gt; button"
+
+    assert [match["id"] for match in search(client, "submit", test_run_id=second_run)] == [second]
+    assert [match["id"] for match in search(client, "submit", test_suite_id="UI")] == [first, second]
+    assert search(client, "submit", test_suite_id="API") == []
+    assert search(client, "submit", until="2000-01-01T00:00:00") == []
+
+    response = client.get("/api/test-case-results/search", params={"q": "submit", "limit": 1})
+    assert [match["id"] for match in response.json()] == [first]
+    response = client.get(
+        "/api/test-case-results/search",
+        params={"q": "submit", "limit": 1, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert [match["id"] for match in response.json()] == [second]
+
+
+def test_log_index_follows_deletes(client: TestClient, session: Session):
+    first_run, second_run = setup_runs(session)
+    first = create_result(client, first_run, logs=ERROR_LOG)
+    second = create_result(client, second_run, logs=ERROR_LOG)
+
+    client.delete(f"/api/test-case-results/{first}")
+    assert [match["id"] for match in search(client, "submit")] == [second]
+    client.patch(f"/api/test-case-results/{second}", json={"logs": "timeout waiting for device\n"})
+    assert search(client, "submit") == []
+    assert [match["id"] for match in search(client, "timeout")] == [second]
+
+    client.delete(f"/api/test-runs/{second_run}")
+    assert search(client, "timeout") == []
+
+
+def test_bulk_uploads_are_indexed(client: TestClient, session: Session):
+    first_run, _ = setup_runs(session)
+    writer = UploadWriter(session, first_run)
+    for i in range(3):
+        writer.add(RESULT, {"test_case_id": "TC1", "result": "Fail", "logs": ERROR_LOG if i else "ok\n"})
+    writer.flush()
+    session.commit()
+
+    assert len(search(client, "submit button", test_run_id=first_run)) == 2
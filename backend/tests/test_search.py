@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.test_suite import TestSuite
+
+
+def create_case(client: TestClient, case_id: str, title: str, **fields):
+    response = client.post("/api/test-cases/", json={
+        "case_id": case_id, "title": title, "version": 1, "version_string": "1.0", "test_suite_id": "UI", **fields,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def search(client: TestClient, q: str, **params):
+    response = client.get("/api/test-cases/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [case["case_id"] for case in response.json()]
+
+
+def test_search_test_cases(client: TestClient, session: Session):
+    session.add(TestSuite(id="UI", name="UI Test Suite", format="json", version=1, version_string="1.0"))
+    session.commit()
+    create_case(client, "TC001", "Login with valid password", area="Authentication")
+    create_case(client, "TC002", "Reset settings", description="Log in first, then reset the password")
+    create_case(client, "TC003", "Upload firmware", steps="Open the update page and select the image")
+
+    # Title matches rank above description matches, words match as prefixes
+    assert search(client, "password") == ["TC001", "TC002"]
+    assert search(client, "authent") == ["TC001"]
+    assert search(client, "firmware upd") == ["TC003"]
+    assert search(client, "password firmware") == []
+    # Search syntax is not passed through
+    assert search(client, 'pass* "(') == ["TC001", "TC002"]
+    assert search(client, "password", skip=1, limit=1) == ["TC002"]
+
+    response = client.get("/api/test-cases/search", params={"q": "password", "fields": "case_id"})
+    assert response.json() == [{"id": 1, "case_id": "TC001"}, {"id": 2, "case_id": "TC002"}]
+
+
+def test_search_index_follows_updates_and_deletes(client: TestClient, session: Session):
+    session.add(TestSuite(id="UI", name="UI Test Suite", format="json", version=1, version_string="1.0"))
+    session.commit()
+    case = create_case(client, "TC001", "Login with valid password")
+    create_case(client, "TC002", "Logout")
+
+    client.patch(f"/api/test-cases/{case['id']}", json={"title": "Pair bluetooth headset"})
+    assert search(client, "password") == []
+    assert search(client, "bluetooth") == ["TC001"]
+
+    client.delete(f"/api/test-cases/{case['id']}")
+    assert search(client, "bluetooth") == []
+    assert search(client, "logout") == ["TC002"]
@@ -0,0 +1,79 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models.test_run_stats import TestRunStats
+from app.reports.stats import check_stats, rebuild_stats
+
+from tests.test_summary import setup_runs
+
+
+def stats(session: Session):
+    rows = session.exec(select(TestRunStats)).all()
+    return sorted((row.test_run_id, row.test_suite_id, row.area, row.result, row.count) for row in rows)
+
+
+def test_stats_follow_result_changes(client: TestClient, session: Session):
+    setup_runs(client, session)
+    assert check_stats(session) == []
+    assert (1, "API", "", "Blocked", 1) in stats(session)
+
+    # Changing the outcome moves the result to another row, emptied rows go away
+    client.patch("/api/test-case-results/4", json={"result": "Pass"})
+    assert (1, "API", "", "Blocked", 1) not in stats(session)
+    assert (1, "API", "", "Pass", 1) in stats(session)
+
+    # Other changes leave the statistics alone
+    client.patch("/api/test-case-results/1", json={"comment": "Retried"})
+
+    client.delete("/api/test-case-results/2")
+    assert check_stats(session) == []
+
+    summary = client.get("/api/test-runs/1/summary").json()
+    assert (summary["total"], summary["passed"]) == (3, 3)
+    assert summary["first_result_at"] is not None
+
+
+def test_stats_follow_test_case_changes(client: TestClient, session: Session):
+    setup_runs(client, session)
+
+    client.patch("/api/test-cases/1", json={"area": "Audio"})
+    assert (2, "UI", "Audio", "Pass", 2) in stats(session)
+    assert check_stats(session) == []
+
+    client.delete("/api/test-cases/2")
+    assert check_stats(session) == []
+
+    client.delete("/api/test-runs/2")
+    assert [row for row in stats(session) if row[0] == 2] == []
+    assert check_stats(session) == []
+
+
+def test_stats_follow_uploads(client: TestClient, session: Session, inline_ingest):
+    upload = {
+        "test_suites": [{"id": "UI", "name": "UI", "format": "json", "version": 1, "version_string": "1.0"}],
+        "test_cases": [{"case_id": "TC1", "title": "Login", "test_suite_id": "UI", "area": "Login"}],
+        "test_case_results": [{"test_case_id": "TC1", "result": "Pass"}, {"test_case_id": "TC2", "result": "Fail"}],
+    }
+    response = client.post("/api/test-runs/upload", files={"file": ("results.json", json.dumps(upload), "application/json")})
+    assert response.json()["status"] == "completed"
+
+    assert check_stats(session) == []
+    runs = client.get("/api/test-runs/").json()
+    assert (runs[0]["stats"]["total"], runs[0]["stats"]["passed"], runs[0]["stats"]["failed"]) == (2, 1, 1)
+
+
+def test_rebuild_stats(client: TestClient, session: Session):
+    setup_runs(client, session)
+    expected = stats(session)
+
+    row = session.exec(select(TestRunStats).where(TestRunStats.test_run_id == 2)).first()
+    row.count += 5
+    session.commit()
+    assert check_stats(session) == [2]
+
+    rebuild_stats(session)
+    session.commit()
+    assert check_stats(session) == []
+    assert stats(session) == expected
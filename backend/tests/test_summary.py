@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.test_case import TestCase
+from app.models.test_run import TestRun
+from app.models.test_suite import TestSuite
+
+
+def setup_runs(client: TestClient, session: Session):
+    session.add(TestSuite(db_id=1, id="UI", name="UI", format="json", version=1, version_string="1.0"))
+    session.add(TestSuite(db_id=2, id="API", name="API", format="json", version=1, version_string="1.0"))
+    for case_id, suite, area in [("TC1", "UI", "Login"), ("TC2", "UI", "Audio"), ("TC3", "API", "Login"), ("TC4", "API", None)]:
+        session.add(TestCase(case_id=case_id, title=case_id, version=1, version_string="1.0", test_suite_id=suite, area=area))
+    session.add_all([TestRun(status="Completed"), TestRun(status="Completed"), TestRun(status="In Progress")])
+    session.commit()
+    for test_run_id, results in [(1, ["Pass", "fail", "Passed", "Blocked"]), (2, ["Pass", "Pass", "Pass", "Pass"])]:
+        for test_case_id, result in enumerate(results, 1):
+            client.post("/api/test-case-results/", json={
+                "test_run_id": test_run_id, "test_case_id": test_case_id, "result": result,
+            })
+
+
+def test_run_summary(client: TestClient, session: Session):
+    setup_runs(client, session)
+
+    summary = client.get("/api/test-runs/1/summary").json()
+    assert (summary["total"], summary["passed"], summary["failed"], summary["other"]) == (4, 2, 1, 1)
+    assert summary["pass_rate"] == 0.5
+    assert summary["by_result"] == {"Pass": 1, "fail": 1, "Passed": 1, "Blocked": 1}
+    assert [(group["key"], group["total"], group["passed"]) for group in summary["by_suite"]] == [("API", 2, 1), ("UI", 2, 1)]
+    assert [(group["key"], group["failed"], group["other"]) for group in summary["by_area"]] == [
+        ("Audio", 1, 0), ("Login", 0, 0), (None, 0, 1),
+    ]
+
+    assert client.get("/api/test-runs/99/summary").status_code == 404
+
+
+def test_run_summaries(client: TestClient, session: Session):
+    setup_runs(client, session)
+
+    summaries = client.get("/api/test-runs/summaries", params={"ids": "2,3,99,1"}).json()
+    assert [(summary["test_run_id"], summary["pass_rate"]) for summary in summaries] == [(2, 1.0), (3, None), (1, 0.5)]
+
+    summaries = client.get("/api/test-runs/summaries", params={"limit": 2}).json()
+    assert [summary["test_run_id"] for summary in summaries] == [3, 2]
+    assert client.get("/api/test-runs/summaries", params={"ids": "1,x"}).status_code == 400
@@ -0,0 +1,86 @@
+from datetime import date, datetime
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models.result_trend import ResultTrend
+from app.models.test_case import TestCase
+from app.models.test_run import TestRun
+from app.reports.trends import bucket_start, rebuild_trends
+
+
+def add_run(client: TestClient, session: Session, created_at: datetime, results):
+    test_run = TestRun(status="Completed", created_at=created_at)
+    session.add(test_run)
+    session.commit()
+    for test_case_id, result in enumerate(results, 1):
+        client.post("/api/test-case-results/", json={"test_run_id": test_run.id, "test_case_id": test_case_id, "result": result})
+    return test_run.id
+
+
+def trends(client: TestClient, **params):
+    response = client.get("/api/reports/trends", params=params)
+    assert response.status_code == 200
+    return [(point["bucket"], point["total"], point["passed"], point["failed"]) for point in response.json()]
+
+
+def stored(session: Session):
+    session.expire_all()
+    return {(trend.period, trend.bucket, trend.test_suite_id, trend.area, trend.result): trend.count
+            for trend in session.exec(select(ResultTrend))}
+
+
+def setup_runs(client: TestClient, session: Session):
+    session.add(TestCase(case_id="TC1", title="Login", version=1, version_string="1.0", test_suite_id="UI", area="Login"))
+    session.add(TestCase(case_id="TC2", title="Orders", version=1, version_string="1.0", test_suite_id="API"))
+    session.commit()
+    add_run(client, session, datetime(2025, 3, 3, 9), ["Pass", "Fail"])  # Monday
+    add_run(client, session, datetime(2025, 3, 3, 18), ["Pass", "Pass"])
+    add_run(client, session, datetime(2025, 3, 9, 12), ["Fail", "Blocked"])  # Sunday
+    return add_run(client, session, datetime(2025, 3, 10, 8), ["Pass", "Pass"])
+
+
+def test_bucket_start():
+    assert bucket_start("day", datetime(2025, 3, 9, 23, 59)) == date(2025, 3, 9)
+    assert bucket_start("week", datetime(2025, 3, 9, 23, 59)) == date(2025, 3, 3)
+    assert bucket_start("week", datetime(2025, 3, 10)) == date(2025, 3, 10)
+
+
+def test_read_trends(client: TestClient, session: Session):
+    setup_runs(client, session)
+
+    assert trends(client) == [("2025-03-03", 4, 3, 1), ("2025-03-09", 2, 0, 1), ("2025-03-10", 2, 2, 0)]
+    assert trends(client, period="week") == [("2025-03-03", 6, 3, 2), ("2025-03-10", 2, 2, 0)]
+    assert trends(client, since="2025-03-04", until="2025-03-10") == [("2025-03-09", 2, 0, 1)]
+    assert trends(client, test_suite_id="API") == [("2025-03-03", 2, 1, 1), ("2025-03-09", 1, 0, 0), ("2025-03-10", 1, 1, 0)]
+
+    points = client.get("/api/reports/trends", params={"period": "week", "group_by": "test_suite_id,area"}).json()
+    assert [(point["bucket"], point["test_suite_id"], point["area"], point["pass_rate"]) for point in points] == [
+        ("2025-03-03", "API", None, 0.3333),
+        ("2025-03-03", "UI", "Login", 0.6667),
+        ("2025-03-10", "API", None, 1.0),
+        ("2025-03-10", "UI", "Login", 1.0),
+    ]
+
+    assert client.get("/api/reports/trends", params={"period": "month"}).status_code == 400
+    assert client.get("/api/reports/trends", params={"group_by": "dut"}).status_code == 400
+
+
+def test_trends_follow_changes(client: TestClient, session: Session):
+    last_run = setup_runs(client, session)
+
+    client.patch("/api/test-case-results/1", json={"result": "Fail"})
+    client.delete("/api/test-case-results/2")
+    assert trends(client, period="week") == [("2025-03-03", 5, 2, 2), ("2025-03-10", 2, 2, 0)]
+
+    # Moving a test case moves its results to the new area
+    client.patch("/api/test-cases/2", json={"area": "Orders"})
+    points = client.get("/api/reports/trends", params={"period": "week", "group_by": "area", "test_suite_id": "API"}).json()
+    assert [(point["area"], point["total"]) for point in points] == [("Orders", 2), ("Orders", 1)]
+
+    client.delete(f"/api/test-runs/{last_run}")
+    assert trends(client, period="week") == [("2025-03-03", 5, 2, 2)]
+
+    incremental = stored(session)
+    assert rebuild_trends(session) == len(incremental)
+    assert stored(session) == incremental
@@ -0,0 +1,403 @@
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.upsert import insert_ignore
+from app.ingest.jobs import ingest_workers, IngestJobQueue
+from app.ingest.json_stream import iter_upload_records, SUITE, CASE, RESULT
+from app.ingest.writer import UploadWriter
+from app.models.ingest_job import IngestJob
+from app.models.test_case import TestCase
+from app.models.test_case_result import TestCaseResult
+from app.models.test_run import TestRun
+from app.models.test_suite import TestSuite
+from app.storage.logs import read_logs
+
+
+UPLOAD = {
+    "test_suites": [
+        {"id": "UI-SUITE-001", "name": "UI Test Suite", "format": "json", "version": 1, "version_string": "1.0"}
+    ],
+    "test_cases": [
+        {"case_id": "TC001", "title": "Basic Functionality Test", "test_suite_id": "UI-SUITE-001"},
+        {"case_id": "TC002", "title": "Login Test", "test_suite_id": "UI-SUITE-001"},
+    ],
+    "test_case_results": [
+        {"test_case_id": "TC001", "result": "Pass", "logs": "x" * 5000},
+        {"test_case_id": "TC002", "result": "Fail", "comment": "Timeout"},
+        {"test_case_id": "TC003", "status": "Blocked"},
+    ],
+}
+
+
+pytestmark = pytest.mark.usefixtures("inline_ingest")
+
+
+def upload(client: TestClient, content, filename="results.json", content_type="application/json"):
+    response = client.post(
+        "/api/test-runs/upload",
+        files={"file": (filename, content, content_type)},
+    )
+    assert response.status_code == 202
+    return response.json()
+
+
+def test_iter_upload_records_small_chunks():
+    content = json.dumps(UPLOAD, indent=2).encode()
+    records = list(iter_upload_records(io.BytesIO(content), chunk_size=7))
+
+    assert [kind for kind, _ in records] == [SUITE, CASE, CASE, RESULT, RESULT, RESULT]
+    assert records[3][1]["logs"] == "x" * 5000
+    assert records[5][1] == {"test_case_id": "TC003", "status": "Blocked"}
+
+
+def test_iter_upload_records_legacy_layouts():
+    numbers = b'[{"test_case_id": 12345, "result": "Pass"}]'
+    assert list(iter_upload_records(io.BytesIO(numbers), chunk_size=1)) == [
+        (RESULT, {"test_case_id": 12345, "result": "Pass"})
+    ]
+
+    other_key = b'{"id": 1, "empty": [], "items": [{"id": 7}], "more": [{"id": 8}]}'
+    assert list(iter_upload_records(io.BytesIO(other_key), chunk_size=4)) == [(RESULT, {"id": 7})]
+
+
+def test_iter_upload_records_result_keys():
+    # Lists before the results are not results
+    tags_first = b'{"tags": [{"x": 1}], "test_case_results": [{"id": 7}], "results": [{"id": 8}]}'
+    assert list(iter_upload_records(io.BytesIO(tags_first), chunk_size=4)) == [(RESULT, {"id": 7})]
+
+    # test_case_results wins over results wherever they are
+    results_first = b'{"results": [{"id": 8}], "test_cases": [{"case_id": "TC1"}], "test_case_results": [{"id": 7}]}'
+    assert list(iter_upload_records(io.BytesIO(results_first), chunk_size=4)) == [
+        (CASE, {"case_id": "TC1"}), (RESULT, {"id": 7}),
+    ]
+
+    # results is used when test_case_results is missing, other lists only
+    # when neither has items
+    results_last = b'{"tags": [{"x": 1}], "results": [{"id": 8}, {"id": 9}]}'
+    assert list(iter_upload_records(io.BytesIO(results_last), chunk_size=4)) == [(RESULT, {"id": 8}), (RESULT, {"id": 9})]
+    other_last = b'{"results": [], "tags": [{"x": 1}], "test_cases": []}'
+    assert list(iter_upload_records(io.BytesIO(other_last), chunk_size=4)) == [(RESULT, {"x": 1})]
+
+
+def _original_results(data):
+    """How the original upload handler picked the results of an object."""
+    test_results = data.get("test_case_results", data.get("results", []))
+    if not test_results:
+        for key, value in data.items():
+            if isinstance(value, list) and len(value) > 0 and key != "test_suites" and key != "test_cases":
+                return value
+    return test_results
+
+
+def test_iter_upload_records_picks_results_like_the_original_handler():
+    documents = [
+        {"tags": [{"x": 1}], "test_case_results": [], "results": [{"id": 8}]},
+        {"test_case_results": [], "results": [{"id": 8}], "tags": [{"x": 1}]},
+        {"test_case_results": None, "tags": [], "results": [{"id": 8}], "steps": [{"x": 2}]},
+        {"tags": [{"x": 1}], "results": [{"id": 8}], "steps": [{"x": 2}]},
+        {"tags": [], "results": [], "steps": [{"x": 2}], "more": [{"x": 3}]},
+        {"test_suites": [{"id": "S"}], "tags": [{"x": 1}], "test_case_results": [{"id": 7}], "results": [{"id": 8}]},
+        {"test_cases": [{"case_id": "TC1"}], "results": []},
+    ]
+    for document in documents:
+        records = iter_upload_records(io.BytesIO(json.dumps(document).encode()), chunk_size=4)
+        results = [item for kind, item in records if kind == RESULT]
+        assert results == list(_original_results(document)), document
+
+
+def test_upload_test_results(client: TestClient, session: Session):
+    job = upload(client, json.dumps(UPLOAD))
+    assert job["status"] == "completed"
+    assert job["rows_parsed"] == 6
+    test_run_id = job["test_run_id"]
+
+    results = session.exec(select(TestCaseResult).where(TestCaseResult.test_run_id == test_run_id)).all()
+    assert sorted(result.result for result in results) == ["Blocked", "Fail", "Pass"]
+
+    case_ids = sorted(case.case_id for case in session.exec(select(TestCase)).all())
+    assert case_ids == ["TC001", "TC002", "TC003"]
+
+
+def test_upload_invalid_json_leaves_no_run(client: TestClient, session: Session):
+    job = upload(client, json.dumps(UPLOAD)[:-20])
+    assert job["status"] == "failed"
+    assert job["error"] == "Invalid JSON format"
+    assert job["test_run_id"] is None
+    assert session.exec(select(TestRun)).all() == []
+    assert session.exec(select(TestCaseResult)).all() == []
+
+
+def test_upload_same_content_twice_returns_existing_job(client: TestClient, session: Session):
+    content = json.dumps(UPLOAD)
+    job = upload(client, content)
+
+    response = client.post("/api/test-runs/upload", files={"file": ("copy.json", content, "application/json")})
+    assert response.status_code == 200
+    assert response.json()["id"] == job["id"]
+    assert response.json()["test_run_id"] == job["test_run_id"]
+    assert len(session.exec(select(TestRun)).all()) == 1
+
+    # Once the run is deleted the same file is ingested again
+    assert client.delete(f"/api/test-runs/{job['test_run_id']}").status_code == 204
+    again = upload(client, content)
+    assert again["id"] != job["id"]
+    assert again["status"] == "completed"
+
+
+def test_upload_idempotency_key(client: TestClient, session: Session):
+    headers = {"Idempotency-Key": "nightly-42"}
+    files = {"file": ("results.json", json.dumps(UPLOAD), "application/json")}
+    first = client.post("/api/test-runs/upload", files=files, headers=headers)
+    assert first.status_code == 202
+
+    retry = client.post("/api/test-runs/upload", files=files, headers=headers)
+    assert retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+
+    other = {"file": ("results.json", json.dumps({"test_case_results": []}), "application/json")}
+    assert client.post("/api/test-runs/upload", files=other, headers=headers).status_code == 409
+    assert len(session.exec(select(IngestJob)).all()) == 1
+
+    # The key is given up once the job's test run is deleted
+    assert client.delete(f"/api/test-runs/{first.json()['test_run_id']}").status_code == 204
+    again = client.post("/api/test-runs/upload", files=files, headers=headers)
+    assert again.status_code == 202
+    assert again.json()["id"] != first.json()["id"]
+
+
+def test_upload_idempotency_key_of_failed_job(client: TestClient, session: Session):
+    headers = {"Idempotency-Key": "nightly-43"}
+    broken = client.post("/api/test-runs/upload", files={"file": ("results.json", "{", "application/json")}, headers=headers)
+    assert broken.json()["status"] == "failed"
+
+    files = {"file": ("results.json", json.dumps(UPLOAD), "application/json")}
+    fixed = client.post("/api/test-runs/upload", files=files, headers=headers)
+    assert fixed.status_code == 202
+    assert fixed.json()["status"] == "completed"
+    assert session.get(IngestJob, broken.json()["id"]).idempotency_key is None
+
+
+def test_upload_resolves_existing_rows_in_bulk(client: TestClient, session: Session):
+    session.add(TestSuite(id="UI-SUITE-001", name="Old name", format="json", version=1, version_string="1.0", db_id=1))
+    session.add(TestCase(case_id="TC002", title="Existing", version=1, version_string="1.0", test_suite_id="UI-SUITE-001"))
+    session.commit()
+    existing_case = session.exec(select(TestCase)).one()
+
+    upload_data = {
+        "test_suites": UPLOAD["test_suites"] + [{"id": "API-SUITE-001", "name": "API", "db_id": 1}],
+        "test_case_results": [
+            {"test_case_id": existing_case.id, "result": "Pass"},
+            {"test_case_id": "TC002", "result": "Fail"},
+            {"test_case_id": "TC009", "result": "Pass"},
+            {"test_case_id": "TC009", "result": "Fail"},
+        ],
+    }
+    assert upload(client, json.dumps(upload_data))["status"] == "completed"
+
+    session.expire_all()
+    suites = {suite.id: suite for suite in session.exec(select(TestSuite)).all()}
+    assert suites["UI-SUITE-001"].name == "UI Test Suite"
+    assert suites["API-SUITE-001"].db_id != 1
+
+    results = session.exec(select(TestCaseResult).order_by(TestCaseResult.id)).all()
+    assert [result.test_case_id for result in results[:2]] == [existing_case.id, existing_case.id]
+    assert results[2].test_case_id == results[3].test_case_id
+    assert len(session.exec(select(TestCase).where(TestCase.case_id == "TC009")).all()) == 1
+
+
+def test_upload_writer_suite_db_id_taken_concurrently(session: Session, monkeypatch):
+    test_run = TestRun(status="Completed")
+    session.add(test_run)
+    session.commit()
+
+    # Another upload takes the requested db_id between the check and the insert
+    def racing_insert_ignore(session, table, rows):
+        session.execute(insert(table), [{"db_id": 5, "id": "OTHER", "name": "Other", "format": "json", "version": 1, "version_string": "1.0"}])
+        insert_ignore(session, table, rows)
+    monkeypatch.setattr("app.ingest.writer.insert_ignore", racing_insert_ignore)
+
+    writer = UploadWriter(session, test_run.id)
+    writer.add(SUITE, {"id": "UI", "name": "UI", "db_id": 5})
+    writer.add(SUITE, {"id": "API", "name": "API"})
+    writer.flush()
+
+    db_ids = {suite.id: suite.db_id for suite in session.exec(select(TestSuite))}
+    assert db_ids["OTHER"] == 5
+    assert sorted([db_ids["UI"], db_ids["API"]]) == [6, 7]
+    assert writer.rows_inserted == 2
+
+
+def test_ingest_workers_on_sqlite():
+    assert ingest_workers("sqlite:///./qa_database.db", 2) == 1
+    assert ingest_workers("sqlite:///./qa_database.db", 0) == 0
+    assert ingest_workers("postgresql://postgres@localhost/qa_database", 2) == 2
+
+
+def test_ingest_job_runs_in_worker(client: TestClient, session: Session, monkeypatch):
+    worker_queue = IngestJobQueue(workers=1, queue_size=1, session_factory=lambda: Session(session.get_bind()))
+    monkeypatch.setattr("app.api.api_v1.endpoints.test_runs.ingest_queue", worker_queue)
+
+    job = upload(client, json.dumps(UPLOAD))
+    assert job["status"] == "queued"
+    worker_queue.join()
+    worker_queue.shutdown()
+
+    response = client.get(f"/api/ingest-jobs/{job['id']}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["rows_inserted"] == 7
+    assert session.get(TestRun, data["test_run_id"]) is not None
+    assert session.get(IngestJob, job["id"]).spool_path is None
+
+
+def test_upload_excel_workbook(client: TestClient, session: Session):
+    workbook = Workbook()
+    cases = workbook.active
+    cases.title = "Test Cases"
+    cases.append(["Case ID", "Title", "Test Suite", "Area", "Version"])
+    cases.append(["TC001", "Basic Functionality Test", "UI-SUITE-001", "Core", 2.0])
+    results = workbook.create_sheet("Results")
+    results.append(["Test Case", "Status", "Comments", "Logs", "Title", "Area"])
+    results.append(["TC001", "Pass", "Looks good", None, None, None])
+    results.append(["TC010", "Fail", None, "Timeout after 30s", "Manual login check", "Auth"])
+    results.append([None, None, None, None, None, None])
+    content = io.BytesIO()
+    workbook.save(content)
+
+    job = upload(
+        client,
+        content.getvalue(),
+        filename="manual.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    assert job["status"] == "completed"
+
+    cases = {case.case_id: case for case in session.exec(select(TestCase)).all()}
+    assert cases["TC001"].version == 2
+    assert cases["TC001"].area == "Core"
+    assert cases["TC010"].title == "Manual login check"
+    assert cases["TC010"].area == "Auth"
+
+    results = session.exec(select(TestCaseResult).where(TestCaseResult.test_run_id == job["test_run_id"])).all()
+    by_case = {result.test_case_id: result for result in results}
+    assert by_case[cases["TC001"].id].comment == "Looks good"
+    assert by_case[cases["TC010"].id].result == "Fail"
+    assert read_logs(session, by_case[cases["TC010"].id]) == "Timeout after 30s"
+
+
+def test_upload_invalid_excel_workbook(client: TestClient):
+    job = upload(client, b"not a workbook", filename="manual.xlsx")
+    assert job["status"] == "failed"
+    assert job["error"].startswith("Invalid Excel workbook")
+
+
+NDJSON = b"""{"type": "suite", "id": "UI-SUITE-001", "name": "UI Test Suite"}
+{"type": "case", "case_id": "TC001", "title": "Basic Functionality Test", "test_suite_id": "UI-SUITE-001"}
+
+{"type": "result", "test_case_id": "TC001", "result": "Pass"}
+{"test_case_id": "TC002", "result": "Fail", "logs": "Timeout"}
+"""
+
+
+def test_upload_ndjson_file(client: TestClient, session: Session):
+    job = upload(client, NDJSON, filename="results.ndjson")
+    assert job["status"] == "completed"
+    assert job["rows_parsed"] == 4
+
+    job = upload(client, NDJSON + b'{"type": "run"}\n', filename="results.jsonl")
+    assert job["status"] == "failed"
+    assert job["error"] == "Unknown record type 'run' on line 6"
+
+
+def test_stream_ndjson(client: TestClient, session: Session):
+    def body():
+        # Split lines across chunks like a producer writing as it goes
+        yield NDJSON[:50]
+        yield NDJSON[50:]
+
+    response = client.post("/api/test-runs/stream?batch_size=2", content=body())
+    assert response.status_code == 201
+    data = response.json()
+    assert data["rows_inserted"] == 5
+    assert session.get(TestRun, data["test_run_id"]).status == "Completed"
+
+    # Appending to the run commits every batch that precedes a bad line
+    response = client.post(
+        f"/api/test-runs/stream?batch_size=1&test_run_id={data['test_run_id']}",
+        content=b'{"test_case_id": "TC001", "result": "Fail"}\nnot json\n',
+    )
+    assert response.status_code == 400
+    assert "line 2" in response.json()["detail"]
+    results = session.exec(select(TestCaseResult).where(TestCaseResult.test_run_id == data["test_run_id"])).all()
+    assert len(results) == 3
+
+
+def archive_upload(client: TestClient, content: bytes, filename: str):
+    response = client.post(
+        "/api/test-runs/upload-archive",
+        files={"file": (filename, content, "application/octet-stream")},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_upload_zip_archive(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_PARSE_PROCESSES", 0)
+    other = {"test_case_results": [{"test_case_id": "TC001", "result": "Fail"}]}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("nightly/dut1.json", json.dumps(UPLOAD))
+        archive.writestr("nightly/dut2.ndjson", "\n".join(json.dumps(r) for r in other["test_case_results"]))
+        archive.writestr("nightly/dut3.json", json.dumps(UPLOAD)[:-20])
+        archive.writestr("nightly/README.txt", "not a result file")
+
+    jobs = archive_upload(client, buffer.getvalue(), "nightly.zip")
+
+    assert [job["filename"] for job in jobs] == ["nightly/dut1.json", "nightly/dut2.ndjson", "nightly/dut3.json"]
+    assert [job["status"] for job in jobs] == ["completed", "completed", "failed"]
+    assert jobs[2]["error"] == "Invalid JSON format"
+    assert jobs[2]["test_run_id"] is None
+    run_ids = {job["test_run_id"] for job in jobs[:2]}
+    assert run_ids == {run.id for run in session.exec(select(TestRun)).all()}
+    assert len(session.exec(select(TestCaseResult)).all()) == 4
+
+
+def test_upload_tar_archive_parsed_in_processes(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_PARSE_PROCESSES", 2)
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for i in range(3):
+            content = json.dumps({"test_case_results": [{"test_case_id": f"TC{i}", "result": "Pass"}]}).encode()
+            info = tarfile.TarInfo(f"dut{i}.json")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+        bad = b"{not json"
+        info = tarfile.TarInfo("dut3.json")
+        info.size = len(bad)
+        archive.addfile(info, io.BytesIO(bad))
+
+    jobs = archive_upload(client, buffer.getvalue(), "nightly.tar.gz")
+
+    assert [job["status"] for job in jobs] == ["completed"] * 3 + ["failed"]
+    assert len({job["test_run_id"] for job in jobs[:3]}) == 3
+    assert jobs[3]["error"] == "Invalid JSON format"
+    cases = session.exec(select(TestCase.case_id)).all()
+    assert sorted(cases) == ["TC0", "TC1", "TC2"]
+
+
+def test_upload_invalid_archive(client: TestClient):
+    response = client.post(
+        "/api/test-runs/upload-archive",
+        files={"file": ("nightly.zip", b"not an archive", "application/zip")},
+    )
+    assert response.status_code == 400
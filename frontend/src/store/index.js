@@ -138,10 +138,11 @@ export default createStore({
         commit('SET_LOADING', false)
       }
     },
-    async fetchTestCases({ commit }) {
+    // filters are passed to the server, e.g. { test_suite_id: 'UI', area: 'Login', sort: 'area,-version' }
+    async fetchTestCases({ commit }, filters = {}) {
       commit('SET_LOADING', true)
       try {
-        const response = await axios.get(`${API_URL}/test-cases`)
+        const response = await axios.get(`${API_URL}/test-cases`, { params: filters })
         if (Array.isArray(response.data)) {
           commit('SET_TEST_CASES', response.data)
           commit('SET_ERROR', null)
@@ -194,14 +195,15 @@ export default createStore({
         commit('SET_LOADING', false)
       }
     },
-    async fetchTestCaseResults({ commit }, testRunId) {
+    // Takes a test run id or filters such as { test_run_id: 3, result: 'Fail', test_suite_id: 'UI' }
+    async fetchTestCaseResults({ commit }, filters) {
       commit('SET_LOADING', true)
       try {
-        let url = `${API_URL}/test-case-results`
-        if (testRunId) {
-          url += `?test_run_id=${testRunId}`
+        const params = typeof filters === 'object' && filters !== null ? filters : {}
+        if (filters && typeof filters !== 'object') {
+          params.test_run_id = filters
         }
-        const response = await axios.get(url)
+        const response = await axios.get(`${API_URL}/test-case-results`, { params })
         commit('SET_TEST_CASE_RESULTS', response.data)
         commit('SET_ERROR', null)
       } catch (error) {